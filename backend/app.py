@@ -1,201 +1,493 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import (Flask, Blueprint, Response, current_app, has_request_context, request, jsonify, send_file,
+                   send_from_directory, stream_with_context)
 from flask_cors import CORS
 import os
+import hmac
+import logging
+import math
+import queue
+import re
+import uuid
+from concurrent.futures import CancelledError, Future
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.formparser import parse_form_data
 from werkzeug.utils import secure_filename
 import time
-import threading
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from flask import g
+from services.logging_setup import configure_logging, request_id_var
+from services.tts_engine import get_tts_engine
+from services.tts_dispatcher import audio_mimetype
+from services.speculative import get_speculative_pipeline, text_fingerprint, SPECULATIVE_ENABLED
+from services.scheduler import get_scheduler, estimate_summary_cost, estimate_tts_cost
+from services.document_store import get_document_store
+from services.boilerplate import resolve_toggle, strip_boilerplate, without_page_breaks
+from services.shared_state import create_state_backend, FileTracking, RecentResults
+from services.maintenance import MAINTENANCE_INTERVAL, MaintenanceRunner
+from services.time_estimator import ProcessingTimeEstimator, page_count, summary_model_key, summary_tokens
+from services.bulk_ingest import BULK_MAX_BYTES, BulkIngestor, BulkUpload, IngestLimitExceeded
+from services.tracking_log import (DEFAULT_QUERY_DAYS, MAX_QUERY_DAYS, TrackingLog, is_tracking_log,
+                                   parse_time)
+from services.profiling import (ARM_SECONDS, PROFILE_TOKEN, PROFILING_ENABLED, RequestProfile, list_profiles,
+                                profile_path, profile_report)
+from services.progress_events import HEARTBEAT_SECONDS, ProgressHub, document_channel, format_event, job_channel
+from services.cancellation import (CancelToken, OperationCancelled, REQUEST_DEADLINE_SECONDS, cancel_request,
+                                   register_token, socket_disconnected, unregister_token, wait_future)
 
-app = Flask(__name__)
-CORS(app)
+configure_logging()
+logger = logging.getLogger(__name__)
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 
 UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploads')
-print(f"UPLOAD FOLDER PATH: {UPLOAD_FOLDER}")
+logger.info("Upload folder: %s", UPLOAD_FOLDER)
 
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 AUDIO_OUTPUTS_DIR = os.path.join(BASE_DIR, 'audio_outputs')
 os.makedirs(AUDIO_OUTPUTS_DIR, exist_ok=True)
 
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['AUDIO_OUTPUTS_DIR'] = AUDIO_OUTPUTS_DIR
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
-
 DEFAULT_LANGUAGE = 'en-us'
 DEFAULT_GENDER = 'female'
 
-# Track uploaded files with their timestamps
-file_tracking = {}
+# Shared state (file tracking, check-file dedupe) must be visible to every
+# worker: "file" (default, one host), "redis" (REDIS_URL) or "memory" (one worker)
+STATE_BACKEND = os.environ.get('STATE_BACKEND', 'file')
+STATE_DIR = os.environ.get('STATE_DIR', os.path.join(BASE_DIR, 'shared_state'))
+
+# Import the summarization models in create_app, so a preloading server
+# (gunicorn --preload) shares the weights copy-on-write with its workers
+PRELOAD_MODELS = os.environ.get('PRELOAD_MODELS', '0').lower() in ('1', 'true', 'yes')
 
-# Cleanup configuration
-CLEANUP_INTERVAL = 3600  # 1 hour in seconds
+# Cleanup configuration (runs every MAINTENANCE_INTERVAL seconds)
 MAX_FILE_AGE = 24  # Maximum age in hours before deletion
+CHECK_FILE_DEDUPE_SECONDS = 2
+# How long a cancel request stays visible to other workers
+CANCEL_FLAG_SECONDS = 300
+# Interactive summary/audio requests get 429 + Retry-After when their
+# lane's projected queue wait is longer than this (0 disables)
+ADMISSION_MAX_WAIT_SECONDS = float(os.environ.get('ADMISSION_MAX_WAIT_SECONDS', 60))
 
-recent_check_requests = {}
-# Periodic cleanup function
-def cleanup_old_files():
-    while True:
-        try:
-            print("Running cleanup check...")
-            # Get the current time
-            now = datetime.now()
-            cutoff_time = now - timedelta(hours=MAX_FILE_AGE)
-            cutoff_time_shorter = now - timedelta(hours=1)  # More aggressive cleanup for uploads folder
-            
-            # First clean up the uploads folder directly
-            try:
-                for filename in os.listdir(app.config['UPLOAD_FOLDER']):
-                    # Skip the tracking file
-                    if filename == '_file_tracking.txt':
-                        continue
-                        
-                    file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                    # Check file age based on file system timestamp
-                    file_mtime = os.path.getmtime(file_path)
-                    file_age = time.time() - file_mtime
-                    
-                    # If file is old enough (1 hour), delete it
-                    if file_age > (1 * 3600):
-                        try:
-                            os.remove(file_path)
-                            print(f"Deleted old upload file: {file_path}")
-                        except Exception as e:
-                            print(f"Error deleting file {file_path}: {e}")
-            except Exception as e:
-                print(f"Error cleaning uploads folder: {e}")
+api = Blueprint('api', __name__)
+
+def tracked_files():
+    """Upload tracking shared by all workers of the current app"""
+    return current_app.extensions['file_tracking']
+
+def time_estimator():
+    """Processing-time models shared by all workers of the current app"""
+    return current_app.extensions['time_estimator']
+
+def progress_hub():
+    """Progress event channels shared by all workers of the current app"""
+    return current_app.extensions['progress']
+
+def tracking_log():
+    """Upload log and analytics rollups of the current app"""
+    return current_app.extensions['tracking_log']
+
+def bulk_ingestor():
+    """Bulk upload extraction pool and batch states of the current app"""
+    return current_app.extensions['bulk_ingest']
+
+# Periodic cleanup, run by the elected maintenance process only
+def cleanup_old_files(app):
+    """One cleanup pass over uploads, audio outputs and the document store"""
+    logger.info("Running cleanup check")
+    file_tracking = app.extensions['file_tracking']
+    # Get the current time
+    now = datetime.now()
+    cutoff_time = now - timedelta(hours=MAX_FILE_AGE)
+    
+    # First clean up the uploads folder directly
+    try:
+        for filename in os.listdir(app.config['UPLOAD_FOLDER']):
+            # Skip the tracking log segments
+            if is_tracking_log(filename):
+                continue
+                
+            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+            # Check file age based on file system timestamp
+            file_mtime = os.path.getmtime(file_path)
+            file_age = time.time() - file_mtime
             
-            # Check each tracked file with the new dictionary format
-            for file_id, data in list(file_tracking.items()):
+            # If file is old enough (1 hour), delete it
+            if file_age > (1 * 3600):
                 try:
-                    # Handle the new dictionary format
-                    if isinstance(data, dict) and 'upload_time' in data:
-                        upload_time = data['upload_time']
-                        file_path = data['file_path']
-                        
-                        # If the file is older than the max age, delete it
-                        if upload_time < cutoff_time:
-                            print(f"File {file_id} is older than {MAX_FILE_AGE} hours, deleting...")
-                            
-                            # Delete the uploaded file
-                            if os.path.exists(file_path):
-                                os.remove(file_path)
-                                print(f"Deleted old file: {file_path}")
-                            
-                            # Delete associated audio files
-                            for audio_path in data.get('audio_paths', []):
-                                if os.path.exists(audio_path):
-                                    os.remove(audio_path)
-                                    print(f"Deleted audio file: {audio_path}")
-                            
-                            # Also check for any other audio files matching this file_id
-                            audio_pattern = file_id.replace('.', '_')
-                            audio_files = [f for f in os.listdir(app.config['AUDIO_OUTPUTS_DIR']) 
-                                           if f.startswith(audio_pattern)]
-                                           
-                            for audio_file in audio_files:
-                                audio_path = os.path.join(app.config['AUDIO_OUTPUTS_DIR'], audio_file)
-                                if os.path.exists(audio_path):
-                                    os.remove(audio_path)
-                                    print(f"Deleted additional audio file: {audio_path}")
-                            
-                            # Remove from tracking
-                            del file_tracking[file_id]
-                            print(f"Removed {file_id} from tracking")
-                    
-                    # Handle the old format (timestamp as a number)
-                    elif isinstance(data, (int, float)):
-                        # Calculate file age in seconds
-                        file_age_seconds = time.time() - data
-                        # Convert to hours
-                        file_age_hours = file_age_seconds / 3600
-                        
-                        # If the file is older than the max age, delete it
-                        if file_age_hours > MAX_FILE_AGE:
-                            file_path = os.path.join(app.config['UPLOAD_FOLDER'], file_id)
-                            if os.path.exists(file_path):
-                                os.remove(file_path)
-                                print(f"Deleted old file (legacy format): {file_path}")
-                            
-                            # Delete associated audio files
-                            audio_pattern = file_id.replace('.', '_')
-                            audio_files = [f for f in os.listdir(app.config['AUDIO_OUTPUTS_DIR']) 
-                                           if f.startswith(audio_pattern)]
-                                           
-                            for audio_file in audio_files:
-                                audio_path = os.path.join(app.config['AUDIO_OUTPUTS_DIR'], audio_file)
-                                if os.path.exists(audio_path):
-                                    os.remove(audio_path)
-                                    print(f"Deleted associated audio file: {audio_path}")
-                            
-                            # Remove from tracking
-                            del file_tracking[file_id]
-                
+                    os.remove(file_path)
+                    logger.info("Deleted old upload file: %s", file_path)
                 except Exception as e:
-                    print(f"Error processing file {file_id} during cleanup: {e}")
-            
-            # Check for orphaned files in upload folder that aren't in tracking
-            try:
-                for filename in os.listdir(app.config['UPLOAD_FOLDER']):
-                    # Skip the tracking file
-                    if filename == '_file_tracking.txt':
-                        continue
-                        
-                    # Check if this file is tracked
-                    if filename not in file_tracking:
-                        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                        # Check file age based on file system timestamp
-                        file_mtime = os.path.getmtime(file_path)
-                        file_age = time.time() - file_mtime
-                        
-                        # If file is old enough, delete it
-                        if file_age > (MAX_FILE_AGE * 3600):
-                            try:
-                                os.remove(file_path)
-                                print(f"Deleted orphaned file: {file_path}")
-                            except Exception as e:
-                                print(f"Error deleting orphaned file {file_path}: {e}")
-            except Exception as e:
-                print(f"Error checking for orphaned files: {e}")
-            
-            # Also check for orphaned audio files
-            try:
-                for filename in os.listdir(app.config['AUDIO_OUTPUTS_DIR']):
-                    file_path = os.path.join(app.config['AUDIO_OUTPUTS_DIR'], filename)
-                    # Check file age based on file system timestamp
-                    file_mtime = os.path.getmtime(file_path)
-                    file_age = time.time() - file_mtime
-                    
-                    # If file is old enough, delete it
-                    if file_age > (MAX_FILE_AGE * 3600):
-                        try:
-                            os.remove(file_path)
-                            print(f"Deleted orphaned audio file: {file_path}")
-                        except Exception as e:
-                            print(f"Error deleting orphaned audio file {file_path}: {e}")
-            except Exception as e:
-                print(f"Error checking for orphaned audio files: {e}")
+                    logger.error("Error deleting file %s: %s", file_path, e)
+    except Exception as e:
+        logger.error("Error cleaning uploads folder: %s", e)
+    
+    # Check each tracked file
+    for file_id, data in file_tracking.items():
+        try:
+            # If the file is older than the max age, delete it
+            if data['upload_time'] < cutoff_time:
+                logger.info("File %s is older than %s hours, deleting", file_id, MAX_FILE_AGE)
+                
+                # Delete the uploaded file
+                file_path = data['file_path']
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                    logger.info("Deleted old file: %s", file_path)
                 
-            # Sleep for the cleanup interval
-            print(f"Cleanup finished, next run in {CLEANUP_INTERVAL/3600} hours")
-            time.sleep(CLEANUP_INTERVAL)
+                # Delete associated audio files
+                for audio_path in data.get('audio_paths', []):
+                    if os.path.exists(audio_path):
+                        os.remove(audio_path)
+                        logger.info("Deleted audio file: %s", audio_path)
+                
+                # Also check for any other audio files matching this file_id
+                audio_pattern = file_id.replace('.', '_')
+                audio_files = [f for f in os.listdir(app.config['AUDIO_OUTPUTS_DIR']) 
+                               if f.startswith(audio_pattern)]
+                               
+                for audio_file in audio_files:
+                    audio_path = os.path.join(app.config['AUDIO_OUTPUTS_DIR'], audio_file)
+                    if os.path.exists(audio_path):
+                        os.remove(audio_path)
+                        logger.info("Deleted additional audio file: %s", audio_path)
+                
+                # Remove from tracking
+                file_tracking.remove(file_id)
+                get_speculative_pipeline().cancel(file_id)
+                get_document_store().remove(file_id)
+                app.extensions['progress'].remove(document_channel(file_id))
+                logger.info("Removed %s from tracking", file_id)
         
         except Exception as e:
-            print(f"Error in cleanup thread: {e}")
-            time.sleep(60)  # Wait before retrying in case of error
+            logger.error("Error processing file %s during cleanup: %s", file_id, e)
+    
+    # Check for orphaned files in upload folder that aren't in tracking
+    try:
+        for filename in os.listdir(app.config['UPLOAD_FOLDER']):
+            # Skip the tracking log segments
+            if is_tracking_log(filename):
+                continue
+                
+            # Check if this file is tracked
+            if filename not in file_tracking:
+                file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+                # Check file age based on file system timestamp
+                file_mtime = os.path.getmtime(file_path)
+                file_age = time.time() - file_mtime
+                
+                # If file is old enough, delete it
+                if file_age > (MAX_FILE_AGE * 3600):
+                    try:
+                        os.remove(file_path)
+                        logger.info("Deleted orphaned file: %s", file_path)
+                    except Exception as e:
+                        logger.error("Error deleting orphaned file %s: %s", file_path, e)
+    except Exception as e:
+        logger.error("Error checking for orphaned files: %s", e)
+    
+    # Also check for orphaned audio files
+    try:
+        for filename in os.listdir(app.config['AUDIO_OUTPUTS_DIR']):
+            file_path = os.path.join(app.config['AUDIO_OUTPUTS_DIR'], filename)
+            # Check file age based on file system timestamp
+            file_mtime = os.path.getmtime(file_path)
+            file_age = time.time() - file_mtime
+            
+            # If file is old enough, delete it
+            if file_age > (MAX_FILE_AGE * 3600):
+                try:
+                    os.remove(file_path)
+                    logger.info("Deleted orphaned audio file: %s", file_path)
+                except Exception as e:
+                    logger.error("Error deleting orphaned audio file %s: %s", file_path, e)
+    except Exception as e:
+        logger.error("Error checking for orphaned audio files: %s", e)
+    
+    # Drop stored texts whose upload is gone
+    try:
+        removed = get_document_store().prune(MAX_FILE_AGE * 3600)
+        if removed:
+            logger.info("Pruned %d stored documents", removed)
+    except Exception as e:
+        logger.error("Error pruning document store: %s", e)
+    
+    # Expired check-file results, cancel flags and progress channels
+    try:
+        app.extensions['check_requests'].prune()
+        app.extensions['cancelled_requests'].prune()
+        app.extensions['progress'].prune()
+        app.extensions['tracking_log'].prune()
+        app.extensions['bulk_ingest'].prune()
+    except Exception as e:
+        logger.error("Error pruning check-file results: %s", e)
+        
+    logger.info("Cleanup finished, next run in %s hours", MAINTENANCE_INTERVAL / 3600)
 
-# Start the cleanup thread
-cleanup_thread = threading.Thread(target=cleanup_old_files, daemon=True)
-cleanup_thread.start()
+# Requests a user is actively waiting on; speculative jobs yield to these
+INTERACTIVE_ENDPOINTS = {'api.generate_summary', 'api.generate_summary_stream', 'api.generate_audio',
+                         'api.generate_audio_batch', 'api.regenerate_audio', 'api.upload_file'}
 
-@app.route('/')
+# Client-supplied request IDs (X-Request-Id) are logged only if they look like IDs
+REQUEST_ID_RE = re.compile(r'^[\w.-]{1,64}$')
+
+@api.before_app_request
+def assign_request_id():
+    # Every log line written while serving the request (including by its
+    # scheduler tasks) carries this ID
+    request_id = request.headers.get('X-Request-Id', '')
+    if not REQUEST_ID_RE.match(request_id):
+        request_id = uuid.uuid4().hex[:12]
+    g.request_id = request_id
+    request_id_var.set(request_id)
+
+@api.before_app_request
+def start_background_maintenance():
+    # Per process, after any fork; only the elected process does the work
+    current_app.extensions['maintenance'].start()
+
+@api.before_app_request
+def mark_interactive_request():
+    if request.endpoint in INTERACTIVE_ENDPOINTS:
+        g.interactive = True
+        get_speculative_pipeline().enter_interactive()
+
+@api.after_app_request
+def finish_progress_job(response):
+    # A job's event stream ends with its request
+    request_id = g.pop('progress_job', None)
+    if request_id:
+        progress_hub().publish([job_channel(request_id)], 'done', status_code=response.status_code)
+    return response
+
+@api.after_app_request
+def echo_request_id(response):
+    request_id = request_id_var.get()
+    if request_id:
+        response.headers['X-Request-Id'] = request_id
+    return response
+
+# Request state a streamed response keeps until its body has been sent
+STREAM_TEARDOWN_STATE = ('cancel_token', 'interactive', 'profile', 'request_id')
+
+@api.after_app_request
+def defer_stream_teardown(response):
+    # Flask tears the request down as soon as the view returns. A body
+    # streamed with stream_with_context (flagged by g.streaming) takes this
+    # state along and hands it back when it ends (restore_stream_teardown),
+    # for the teardown that runs again then
+    if g.pop('streaming', False):
+        g.stream_teardown = {name: g.pop(name) for name in STREAM_TEARDOWN_STATE if name in g}
+    return response
+
+def restore_stream_teardown():
+    """Call at the end of a stream_with_context body flagged with g.streaming"""
+    for name, value in g.pop('stream_teardown', {}).items():
+        setattr(g, name, value)
+
+@api.teardown_app_request
+def unmark_interactive_request(exception=None):
+    if g.pop('interactive', False):
+        get_speculative_pipeline().exit_interactive()
+    token = g.pop('cancel_token', None)
+    if token is not None:
+        unregister_token(token)
+    if g.pop('request_id', None):
+        request_id_var.set(None)
+
+def request_progress_channels(file_id=None, data=None):
+    """
+    Progress channels for the current request: the document's, plus the
+    job's when a requestId field / X-Request-Id header was sent. Also
+    kept in g.progress_channels for publish_progress().
+    """
+    data = data or {}
+    request_id = data.get('requestId') or request.headers.get('X-Request-Id')
+    channels = [document_channel(file_id)] if file_id else []
+    if request_id:
+        g.progress_job = str(request_id)[:128]
+        channels.append(job_channel(g.progress_job))
+    g.progress_channels = channels
+    return channels
+
+def publish_progress(event, **data):
+    """Publish a stage event to the current request's progress channels"""
+    channels = g.get('progress_channels')
+    if channels:
+        progress_hub().publish(channels, event, **data)
+
+def request_cancel_token(data=None, file_id=None):
+    """
+    Deadline and cancellation token for the current request.
+    
+    The deadline is REQUEST_DEADLINE_SECONDS, or a shorter deadlineSeconds
+    field / X-Request-Deadline header. The token also trips when the client
+    disconnects, or when POST /api/requests/<requestId>/cancel is called
+    for the requestId field / X-Request-Id header (on any worker).
+    Progress reported through the token is published to the request's
+    progress channels (see request_progress_channels).
+    """
+    data = data or {}
+    channels = request_progress_channels(file_id, data)
+    deadline = data.get('deadlineSeconds') or request.headers.get('X-Request-Deadline')
+    try:
+        deadline = min(float(deadline), REQUEST_DEADLINE_SECONDS) if deadline else REQUEST_DEADLINE_SECONDS
+    except (TypeError, ValueError):
+        deadline = REQUEST_DEADLINE_SECONDS
+    token = CancelToken(deadline, request_id=g.get('progress_job'))
+    
+    sock = request.environ.get('gunicorn.socket') or request.environ.get('werkzeug.socket')
+    if sock is not None:
+        token.add_watcher(lambda: 'disconnected' if socket_disconnected(sock) else None)
+    if token.request_id:
+        cancelled_requests = current_app.extensions['cancelled_requests']
+        token.add_watcher(lambda: 'cancelled' if cancelled_requests.get(token.request_id) else None)
+        register_token(token)
+    if channels:
+        token.add_progress_listener(progress_hub().listener(channels))
+    g.cancel_token = token
+    return token
+
+def run_cancellable(lane, func, *args, cancel_token=None, **kwargs):
+    """
+    get_scheduler().run() with func(..., cancel_token=cancel_token).
+    
+    Stops waiting when the token trips; a task that has not started yet is
+    dropped from the queue.
+    """
+    future = get_scheduler().submit(lane, profiled(func), *args, cancel_token=cancel_token, **kwargs)
+    return wait_future(future, cancel_token)
+
+def profiled(func):
+    """func, wrapped to run under the current request's profile if it is being profiled"""
+    profile = g.get('profile') if has_request_context() else None
+    return profile.wrap(func) if profile else func
+
+def admission_response(lane):
+    """
+    429 response with Retry-After when the lane's projected wait is over
+    ADMISSION_MAX_WAIT_SECONDS, else None (admit the request).
+    """
+    if ADMISSION_MAX_WAIT_SECONDS <= 0:
+        return None
+    wait = get_scheduler().projected_wait(lane)
+    if wait <= ADMISSION_MAX_WAIT_SECONDS:
+        return None
+    retry_after = max(1, math.ceil(wait - ADMISSION_MAX_WAIT_SECONDS))
+    logger.warning("Rejecting %s request: projected wait %.1fs, retry after %ss", lane, wait, retry_after)
+    response = jsonify({"success": False, "busy": True, "projected_wait": round(wait, 1),
+                        "retry_after": retry_after,
+                        "error": f"Server is busy, please retry in {retry_after} seconds"})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def summary_timing(estimator, text, summary_type):
+    """Scheduler timing arguments for summarizing text"""
+    from services.language_detection import detect_document_languages
+    key = summary_model_key(detect_document_languages(text), summary_type)
+    return estimator.task_timing('summary', key, summary_tokens(len(text)))
+
+def tts_timing(estimator, text, language, gender):
+    """Scheduler timing arguments for synthesizing text in one voice"""
+    return estimator.task_timing('tts', f"{language}:{gender}", len(text or ''))
+
+def estimate_processing_eta(estimator, characters, profile=None):
+    """
+    Seconds until a brief summary and default-voice audio would be ready:
+    the current queue waits plus the learned run times.
+    """
+    scheduler = get_scheduler()
+    language = 'hi-in' if profile and profile.get("primary") == 'hi' else DEFAULT_LANGUAGE
+    seconds = (scheduler.projected_wait('summary')
+               + estimator.predict('summary', summary_model_key(profile, 'brief'), summary_tokens(characters))
+               + scheduler.projected_wait('tts')
+               + estimator.predict('tts', f"{language}:{DEFAULT_GENDER}", characters))
+    return int(math.ceil(seconds))
+
+def cancelled_response(error, allow_partial=True, key='summary', stage='summary'):
+    """
+    Response for a request stopped by its token. At a deadline, finished
+    partial results are returned flagged "partial"; otherwise an error.
+    """
+    if error.reason == 'deadline' and error.partial and allow_partial:
+        logger.info("Deadline reached, returning partial %s", key)
+        publish_progress(stage, status='complete', partial=True, reason=error.reason)
+        return jsonify({"success": True, key: error.partial, "partial": True, "reason": error.reason})
+    logger.info("Request stopped: %s", error.reason)
+    publish_progress(stage, status='cancelled', reason=error.reason)
+    status = 504 if error.reason == 'deadline' else 409
+    return jsonify({"success": False, "cancelled": True, "reason": error.reason,
+                    "error": f"Request stopped: {error.reason}"}), status
+
+def client_identity():
+    """Identify the caller for per-client fair scheduling"""
+    client_id = request.headers.get('X-Client-Id')
+    if client_id:
+        return client_id[:64]
+    forwarded = request.headers.get('X-Forwarded-For', '')
+    return forwarded.split(',')[0].strip() or request.remote_addr or 'anonymous'
+
+def queue_speculative_jobs(file_id, text_content, client_id):
+    """Queue stats, TL;DR summary and default-voice audio for a new upload"""
+    pipeline = get_speculative_pipeline()
+    text_hash = text_fingerprint(text_content)
+    file_tracking = tracked_files()  # jobs run outside the app context
+    estimator = time_estimator()
+    hub = progress_hub()
+    channels = [document_channel(file_id)]
+
+    def compute_stats(cancel_token=None):
+        from services.text_processing import get_text_statistics
+        from services.language_detection import detect_document_languages
+        return {
+            "statistics": get_text_statistics(text_content),
+            "estimated_processing_time": estimate_processing_eta(
+                estimator, len(text_content), detect_document_languages(text_content))
+        }
+
+    def compute_summary(cancel_token=None):
+        from services.summary_service import generate_summary_by_type
+        if cancel_token is not None:
+            cancel_token.add_progress_listener(hub.listener(channels))
+        summary = run_cancellable('summary', generate_summary_by_type, text_content, 'tldr',
+                                  cancel_token=cancel_token, client_id=client_id, request_class='speculative',
+                                  cost=estimate_summary_cost(text_content, 'tldr'),
+                                  **summary_timing(estimator, text_content, 'tldr'))
+        if not summary or len(summary.strip()) < 10:
+            return None
+        hub.publish(channels, 'summary', status='complete', summary_type='tldr', speculative=True)
+        return summary
+
+    def compute_audio(cancel_token=None):
+        from services.tts_service import generate_audio_filename, text_to_speech
+        output_path = generate_audio_filename(file_id, DEFAULT_LANGUAGE, DEFAULT_GENDER)
+        if cancel_token is not None:
+            cancel_token.add_progress_listener(hub.listener(channels))
+        if not run_cancellable('tts', text_to_speech, text_content, output_path, DEFAULT_LANGUAGE, DEFAULT_GENDER,
+                               cancel_token=cancel_token, client_id=client_id, request_class='speculative',
+                               cost=estimate_tts_cost(text_content),
+                               **tts_timing(estimator, text_content, DEFAULT_LANGUAGE, DEFAULT_GENDER)):
+            return None
+        file_tracking.add_audio_path(file_id, output_path)
+        hub.publish(channels, 'audio', status='complete', language=DEFAULT_LANGUAGE, gender=DEFAULT_GENDER,
+                    filename=os.path.basename(output_path), speculative=True)
+        return output_path
+
+    def discard_audio(output_path):
+        if output_path and os.path.exists(output_path):
+            os.remove(output_path)
+
+    pipeline.schedule(file_id, 'stats', None, compute_stats, text_hash=text_hash)
+    pipeline.schedule(file_id, 'summary', 'tldr', compute_summary, text_hash=text_hash)
+    pipeline.schedule(file_id, 'audio', (DEFAULT_LANGUAGE, DEFAULT_GENDER), compute_audio,
+                      text_hash=text_hash, on_discard=discard_audio)
+    logger.info("Queued speculative jobs for %s", file_id)
+
+@api.route('/')
 def index():
     return "EdTech Accessibility Hub API is running!"
 
-@app.route('/api/health', methods=['GET'])
+@api.route('/api/health', methods=['GET'])
 def health_check():
     """Simple health check endpoint"""
     try:
@@ -205,7 +497,10 @@ def health_check():
             "upload_folder": UPLOAD_FOLDER,
             "upload_folder_exists": os.path.exists(UPLOAD_FOLDER),
             "audio_folder": AUDIO_OUTPUTS_DIR,
-            "audio_folder_exists": os.path.exists(AUDIO_OUTPUTS_DIR)
+            "audio_folder_exists": os.path.exists(AUDIO_OUTPUTS_DIR),
+            "tts_engine": get_tts_engine().stats(),
+            "speculative": get_speculative_pipeline().stats(),
+            "document_store": get_document_store().stats()
         })
     except Exception as e:
         return jsonify({
@@ -214,60 +509,70 @@ def health_check():
         }), 500
 
 # Update the upload route to handle all file types
-@app.route('/api/upload', methods=['POST'])
+@api.route('/api/upload', methods=['POST'])
 def upload_file():
     try:
         if 'file' not in request.files:
-            print("ERROR: No file part in request")
+            logger.warning("Upload rejected: no file part in request")
             return jsonify({"success": False, "error": "No file provided"}), 400
         
         file = request.files['file']
         if file.filename == '':
-            print("ERROR: Empty filename submitted")
+            logger.warning("Upload rejected: empty filename submitted")
             return jsonify({"success": False, "error": "No file selected"}), 400
         
         # Log the original filename
-        print(f"Original filename: {file.filename}")
+        logger.debug("Original filename: %s", file.filename)
         
         filename = secure_filename(file.filename)
-        print(f"Secured filename: {filename}")
+        logger.debug("Secured filename: %s", filename)
         
         # Create absolute path
         file_path = os.path.join(UPLOAD_FOLDER, filename)
-        print(f"Saving file to: {file_path}")
+        logger.debug("Saving file to: %s", file_path)
         
         # Ensure directory exists again right before saving
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
         
+        # Drop speculative artifacts from any previous upload under this name
+        get_speculative_pipeline().cancel(filename)
+        
         # Save the file
         file.save(file_path)
         
         # Verify file was saved
+        file_size = 0
         if os.path.exists(file_path):
-            print(f"✓ File successfully saved at {file_path}")
             file_size = os.path.getsize(file_path)
-            print(f"File size: {file_size} bytes")
+            logger.info("Saved upload %s (%d bytes)", file_path, file_size)
         else:
-            print(f"✗ CRITICAL ERROR: File not saved at {file_path}")
+            logger.error("File not saved at %s", file_path)
 
         # Track the file with the current timestamp
-        # file_tracking[filename] = time.time()
-        
-        # And update the tracking with correct format
-        file_tracking[filename] = {
-            'upload_time': datetime.now(),
-            'file_path': file_path,
-            'audio_paths': []  # Will be populated when audio is generated
-        }
-
-        # Add persistence to disk for tracking data
-        with open(os.path.join(app.config['UPLOAD_FOLDER'], '_file_tracking.txt'), 'a') as f:
-            f.write(f"{filename}|{file_path}|{datetime.now()}\n")
+        tracked_files().track(filename, file_path)
         
         # Extract text based on file type
+        request_progress_channels(filename, request.form)
+        publish_progress('extraction', status='started')
         try:
             from services.text_processing import extract_text
-            text_content = extract_text(file_path)
+            extract_started = time.time()
+            text_content = None
+            try:
+                text_content = extract_text(file_path)
+            finally:
+                # Upload log and analytics rollups (extraction time only if it succeeded)
+                seconds = time.time() - extract_started
+                extracted = bool(text_content) and not text_content.startswith('Error')
+                tracking_log().record(filename, file_path, file_size, seconds if extracted else None)
+            file_type = filename.rsplit('.', 1)[-1].lower() if '.' in filename else 'unknown'
+            if extracted:
+                pages = page_count(text_content, file_type)
+                time_estimator().observe('extract', file_type, pages, seconds)
+                publish_progress('extraction', status='complete', characters=len(text_content), pages=pages,
+                                 seconds=round(seconds, 3))
+            else:
+                publish_progress('extraction', status='failed')
             
             if not text_content:
                 return jsonify({
@@ -275,42 +580,149 @@ def upload_file():
                     "error": f"Could not extract text from {filename}. Please check if the file contains readable text."
                 }), 400
             
-            print(f"Extracted text from {filename}: {len(text_content)} characters")
+            logger.info("Extracted text from %s: %d characters", filename, len(text_content))
             
-            # Get text statistics and time estimation
-            from services.text_processing import get_text_statistics, estimate_processing_time
-            stats = get_text_statistics(text_content)
-            estimated_time = estimate_processing_time(text_content)
+            # Persist the text once; later requests read it from the store
+            stored = get_document_store().put(filename, text_content, file_path)
+            
+            # Running headers/footers and page numbers are left out of TTS
+            # and summaries (stripBoilerplate form field overrides the default)
+            processed = stored
+            if resolve_toggle(request.form.get('stripBoilerplate')):
+                processed = load_document(file_path, strip=True)
+            
+            # Language profile drives both summary routing and voice suggestions
+            from services.tts_service import suggest_voices
+            language_profile, suggested_voices = suggest_voices(text_content)
+            
+            # Get text statistics and the learned time estimate
+            stats = stored.statistics()
+            estimated_time = estimate_processing_eta(time_estimator(), processed.statistics()["characters"],
+                                                     language_profile)
         except ImportError as e:
-            print(f"Import error in text processing: {e}")
+            logger.error("Import error in text processing: %s", e)
+            publish_progress('extraction', status='failed', error=str(e))
             return jsonify({
                 "success": False,
                 "error": f"Text processing service unavailable: {str(e)}"
             }), 500
         except Exception as e:
-            print(f"Text extraction error: {e}")
+            logger.exception("Text extraction error: %s", e)
+            publish_progress('extraction', status='failed', error=str(e))
             return jsonify({
                 "success": False,
                 "error": f"Error processing file: {str(e)}"
             }), 500
         
-        # DO NOT generate audio here!
+        # DO NOT generate audio here! Only queue opt-in, low-priority speculative jobs
+        speculative = SPECULATIVE_ENABLED or request.form.get('speculative', '').lower() in ('1', 'true')
+        if speculative and not text_content.startswith('Error'):
+            queue_speculative_jobs(filename, processed.text(), client_identity())
+        
         return jsonify({
             "success": True,
             "filename": filename,
-            "text_content": text_content,
+            "text_content": without_page_breaks(text_content),
             "statistics": stats,
             "estimated_processing_time": estimated_time,
+            "speculative_processing": speculative,
+            "language_profile": language_profile,
+            "suggested_voices": suggested_voices,
+            "boilerplate": processed.boilerplate,
             "message": f"Successfully processed {filename}"
         })
     except Exception as e:
-        print(f"Upload error: {e}")
+        logger.exception("Upload error: %s", e)
         return jsonify({
             "success": False,
             "error": f"Server error: {str(e)}"
         }), 500
 
-@app.route('/api/generate-audio', methods=['POST'])
+@api.route('/api/upload/bulk', methods=['POST'])
+def bulk_upload():
+    """
+    Upload many documents at once: several "files" parts, zip archives of
+    PDF/DOCX/TXT files, or both.
+    
+    Files are saved as they are read, within BULK_MAX_BYTES in total, and
+    the response (202) comes before extraction: an ID and event stream per
+    document, plus the batch's statusUrl and eventsUrl. Extraction runs on
+    the bulk ingestor's process pool (see services/bulk_ingest.py).
+    """
+    budget_error = f"Upload exceeds the {BULK_MAX_BYTES} byte budget"
+    if request.content_length and request.content_length > BULK_MAX_BYTES:
+        return jsonify({"success": False, "error": budget_error}), 413
+    
+    upload = BulkUpload(current_app.config['UPLOAD_FOLDER'])
+    try:
+        # Parsed here, with the bulk budget as the body limit, instead of
+        # through request.form/files, which are capped at the single-upload
+        # MAX_CONTENT_LENGTH. File parts spool to temporary files
+        _, form, files = parse_form_data(request.environ, max_content_length=BULK_MAX_BYTES)
+        for file in files.getlist('files') + files.getlist('file'):
+            if file.filename:
+                upload.add(file.filename, file.stream)
+    except (IngestLimitExceeded, RequestEntityTooLarge) as e:
+        upload.discard()
+        error = str(e) if isinstance(e, IngestLimitExceeded) else budget_error
+        logger.warning("Bulk upload rejected: %s", error)
+        return jsonify({"success": False, "error": error}), 413
+    except Exception as e:
+        upload.discard()
+        logger.exception("Bulk upload error: %s", e)
+        return jsonify({"success": False, "error": f"Server error: {str(e)}"}), 500
+    
+    if not upload.documents:
+        return jsonify({"success": False, "error": "No PDF, DOCX or TXT documents provided",
+                        "skipped": upload.skipped}), 400
+    
+    for document in upload.documents:
+        # Drop speculative artifacts from any previous upload under this name
+        get_speculative_pipeline().cancel(document["fileId"])
+        tracked_files().track(document["fileId"], document["path"])
+    
+    app = current_app._get_current_object()
+    client_id = client_identity()
+    strip = resolve_toggle(form.get('stripBoilerplate'))
+    speculative = SPECULATIVE_ENABLED or form.get('speculative', '').lower() in ('1', 'true')
+    
+    def on_extracted(document, result):
+        # Runs on the ingestor's result thread, after this request has returned
+        with app.app_context():
+            if speculative:
+                text_content = load_document(document["path"], strip=strip).text()
+                queue_speculative_jobs(document["fileId"], text_content, client_id)
+            return {"estimated_processing_time": estimate_processing_eta(
+                time_estimator(), result["processed_characters"], result["language_profile"])}
+    
+    batch_id = bulk_ingestor().start(upload.documents, strip=strip, on_extracted=on_extracted)
+    logger.info("Bulk upload %s: %d document(s), %d bytes, %d skipped", batch_id, len(upload.documents),
+                upload.total_bytes, len(upload.skipped))
+    return jsonify({
+        "success": True,
+        "batchId": batch_id,
+        "statusUrl": f"/api/upload/bulk/{batch_id}",
+        "eventsUrl": f"/api/jobs/{batch_id}/events",
+        "bytes": upload.total_bytes,
+        "documents": [{
+            "fileId": document["fileId"],
+            "bytes": document["bytes"],
+            "status": 'queued',
+            "eventsUrl": f"/api/documents/{document['fileId']}/events",
+        } for document in upload.documents],
+        "skipped": upload.skipped,
+        "speculative_processing": speculative,
+    }), 202
+
+@api.route('/api/upload/bulk/<batch_id>', methods=['GET'])
+def bulk_upload_status(batch_id):
+    """Extraction state and statistics of each document in a bulk upload"""
+    state = bulk_ingestor().get(batch_id)
+    if state is None:
+        return jsonify({"success": False, "error": "Unknown or expired batch"}), 404
+    return jsonify(dict(state, success=True, documents=list(state["documents"].values())))
+
+@api.route('/api/generate-audio', methods=['POST'])
 def generate_audio():
     data = request.json
     text = data.get('text')
@@ -318,153 +730,347 @@ def generate_audio():
     language = data.get('language', DEFAULT_LANGUAGE)
     gender = data.get('gender', DEFAULT_GENDER)
     
+    # Don't read running headers/footers and page numbers aloud
+    if text and resolve_toggle(data.get('stripBoilerplate')):
+        text, _ = strip_boilerplate(text)
+    
+    # Extract file_id from text_source if it's a document
+    file_id = text_source if text_source != 'document' else None
+    cancel_token = request_cancel_token(data, file_id)
+    
+    busy = admission_response('tts')
+    if busy:
+        return busy
+    
     # Generate a unique filename
     from services.tts_service import generate_audio_filename, text_to_speech
     output_path = generate_audio_filename(text_source, language, gender)
     
-    # Generate the audio file
-    success = text_to_speech(text, output_path, language, gender)
+    # Generate the audio file; stops early on deadline, cancel or disconnect
+    publish_progress('audio', status='started', language=language, gender=gender)
+    try:
+        success = run_cancellable('tts', text_to_speech, text, output_path, language, gender,
+                                  cancel_token=cancel_token,
+                                  client_id=client_identity(), cost=estimate_tts_cost(text or ''),
+                                  **tts_timing(time_estimator(), text, language, gender))
+    except OperationCancelled as e:
+        return cancelled_response(e, stage='audio')
     
     if success:
-        # Extract file_id from text_source if it's a document
-        file_id = text_source if text_source != 'document' else None
-        
         # After successful audio generation:
-        if file_id and file_id in file_tracking:
-            file_tracking[file_id]['audio_paths'].append(output_path)
+        if file_id:
+            tracked_files().add_audio_path(file_id, output_path)
+        publish_progress('audio', status='complete', language=language, gender=gender,
+                         filename=os.path.basename(output_path))
         
         # Return the relative path to be used in frontend
-        relative_path = os.path.relpath(output_path, start=app.static_folder)
+        relative_path = os.path.relpath(output_path, start=current_app.static_folder)
         return jsonify({
             'success': True, 
             'filename': os.path.basename(output_path),
             'path': f"/static/{relative_path.replace(os.sep, '/')}"
         })
     else:
+        publish_progress('audio', status='failed', language=language, gender=gender)
         return jsonify({'success': False, 'error': 'Failed to generate audio'})
 
-@app.route('/api/regenerate-audio', methods=['POST'])
+def load_document(file_path, strip=False):
+    """
+    Stored (memory-mapped) extracted text for an upload, extracting it on
+    first use. With strip, the variant without running headers, footers
+    and page numbers.
+    """
+    return get_document_store().get_or_extract(os.path.basename(file_path), file_path, strip=strip)
+
+def resolve_upload_path(file_id):
+    """Find an uploaded document by exact name or with a known extension"""
+    file_path = os.path.join(UPLOAD_FOLDER, file_id)
+    if os.path.exists(file_path):
+        return file_path
+    base_file_id = file_id.rsplit('.', 1)[0] if '.' in file_id else file_id
+    for ext in ['.pdf', '.docx', '.txt']:
+        potential_path = os.path.join(UPLOAD_FOLDER, f"{base_file_id}{ext}")
+        if os.path.exists(potential_path):
+            return potential_path
+    return None
+
+@api.route('/api/generate-audio/batch', methods=['POST'])
+def generate_audio_batch():
+    """
+    Render one document in several voices with a single request.
+    
+    Body: {"fileId": ..., or "text": ..., "voices": [{"language": ..., "gender": ...}, ...]}
+    Text is extracted once and pre-processed once per language; all voices
+    are then synthesized concurrently on the TTS lane.
+    """
+    try:
+        data = request.get_json() or {}
+        file_id = data.get('fileId')
+        text = data.get('text')
+        
+        from services.tts_service import (VOICE_MAP, generate_audio_filename,
+                                          prepare_text_for_language, text_to_speech)
+        
+        if not text:
+            if not file_id:
+                return jsonify({"success": False, "error": "Provide fileId or text"}), 400
+            file_path = resolve_upload_path(file_id)
+            if not file_path:
+                return jsonify({"success": False, "error": f"Document '{file_id}' not found"}), 404
+            text = load_document(file_path, strip=resolve_toggle(data.get('stripBoilerplate'))).text()
+            if not text or text.startswith('Error'):
+                return jsonify({"success": False, "error": text or "Could not extract text"}), 400
+        
+        # Default to every supported voice; drop duplicates, keep request order
+        requested = data.get('voices') or [{"language": l, "gender": g} for l, g in VOICE_MAP]
+        voices = []
+        for voice in requested:
+            key = (str(voice.get('language', '')).lower(), str(voice.get('gender', '')).lower())
+            if key not in voices:
+                voices.append(key)
+        
+        busy = admission_response('tts')
+        if busy:
+            return busy
+        
+        # Shared pre-processing: once per language, not once per voice
+        prepared_text = {language: prepare_text_for_language(text, language)
+                         for language in {language for language, _ in voices}}
+        
+        source = file_id or 'document'
+        client_id = client_identity()
+        cancel_token = request_cancel_token(data, file_id)
+        scheduler = get_scheduler()
+        estimator = time_estimator()
+        publish_progress('audio', status='started', voices=len(voices))
+        jobs = []
+        manifest = []
+        for language, gender in voices:
+            if (language, gender) not in VOICE_MAP:
+                manifest.append({"language": language, "gender": gender, "success": False,
+                                 "error": "Unsupported language or gender combination"})
+                continue
+            output_path = generate_audio_filename(source, language, gender)
+            future = scheduler.submit('tts', profiled(text_to_speech), prepared_text[language], output_path,
+                                      language, gender, prepared=True, cancel_token=cancel_token,
+                                      client_id=client_id, cost=estimate_tts_cost(prepared_text[language]),
+                                      **tts_timing(estimator, prepared_text[language], language, gender))
+            entry = {"language": language, "gender": gender, "voice": VOICE_MAP[(language, gender)]}
+            manifest.append(entry)
+            jobs.append((entry, output_path, future))
+        
+        # Once the token trips, voices already rendered are kept and the
+        # rest are dropped
+        stopped = None
+        for entry, output_path, future in jobs:
+            try:
+                if stopped is None:
+                    ok = wait_future(future, cancel_token)
+                else:
+                    future.cancel()
+                    ok = future.done() and not future.cancelled() and future.exception() is None and future.result()
+            except OperationCancelled as e:
+                stopped = e.reason
+                ok = False
+            except Exception as e:
+                logger.error("Batch synthesis error for %s: %s", entry['voice'], e)
+                ok = False
+            entry["success"] = bool(ok)
+            if ok:
+                filename = os.path.basename(output_path)
+                entry["filename"] = filename
+                entry["audioPath"] = f"https://dyslexofly.onrender.com/api/audio/{filename}"
+                if file_id:
+                    tracked_files().add_audio_path(file_id, output_path)
+                publish_progress('audio', status='complete', language=entry["language"],
+                                 gender=entry["gender"], filename=filename)
+            else:
+                entry["error"] = f"Request stopped: {stopped}" if stopped else "Failed to generate audio"
+                publish_progress('audio', status='cancelled' if stopped else 'failed', language=entry["language"],
+                                 gender=entry["gender"], reason=stopped)
+        
+        succeeded = sum(1 for entry in manifest if entry["success"])
+        logger.info("Batch audio for %s: %d/%d voices generated", source, succeeded, len(manifest))
+        return jsonify({
+            "success": succeeded > 0,
+            "source": source,
+            "text_length": len(text),
+            "generated": succeeded,
+            "partial": stopped is not None,
+            "reason": stopped,
+            "manifest": manifest
+        })
+    
+    except Exception as e:
+        logger.exception("Error in generate_audio_batch: %s", e)
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@api.route('/api/regenerate-audio', methods=['POST'])
 def regenerate_audio():
     try:
         data = request.get_json()
         file_id = data.get('fileId')
         language = data.get('language', 'en-us')
         gender = data.get('gender', 'female')
+        strip = resolve_toggle(data.get('stripBoilerplate'))
         
         # For debugging
-        print(f"Regenerating audio for file: {file_id}, language: {language}, gender: {gender}")
+        logger.info("Regenerating audio for file: %s, language: %s, gender: %s", file_id, language, gender)
         
         # Try to find the actual document file
         document_text = None
         
         # Check if it's a known fileId with supported extensions
         potential_paths = [
-            os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}"),
-            os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}.pdf"),
-            os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}.docx"),
-            os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}.txt"),
-            os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}.png"),
-            os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}.jpg"),
-            os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}.jpeg")
+            os.path.join(current_app.config['UPLOAD_FOLDER'], f"{file_id}"),
+            os.path.join(current_app.config['UPLOAD_FOLDER'], f"{file_id}.pdf"),
+            os.path.join(current_app.config['UPLOAD_FOLDER'], f"{file_id}.docx"),
+            os.path.join(current_app.config['UPLOAD_FOLDER'], f"{file_id}.txt"),
+            os.path.join(current_app.config['UPLOAD_FOLDER'], f"{file_id}.png"),
+            os.path.join(current_app.config['UPLOAD_FOLDER'], f"{file_id}.jpg"),
+            os.path.join(current_app.config['UPLOAD_FOLDER'], f"{file_id}.jpeg")
         ]
         
-        # Import the text extraction function from the correct module
-        from services.text_processing import extract_text
-        
-        # Try to find and extract text from the document
+        # Try to find the document and read its stored text
+        document_id = None  # upload filename, for tracking and progress
         for doc_path in potential_paths:
             if os.path.exists(doc_path):
-                print(f"Found document at: {doc_path}")
-                document_text = extract_text(doc_path)
+                logger.debug("Found document at: %s", doc_path)
+                document_text = load_document(doc_path, strip=strip).text()
                 if document_text:
-                    print(f"Successfully extracted text: {len(document_text)} characters")
+                    logger.debug("Extracted text: %d characters", len(document_text))
+                    document_id = os.path.basename(doc_path)
                     break
         
         # If we couldn't find or extract the document, use fallback text
         if not document_text:
-            print(f"Document not found or couldn't extract text. Using sample text.")
+            logger.warning("Document %s not found or no text extracted; using sample text", file_id)
             document_text = "This is a fallback text because the original document could not be found or processed. Please upload the document again or check the file format."
+        else:
+            # The speculative pipeline may already have rendered this voice;
+            # its jobs are keyed by the upload filename, as resolved above
+            ready_path = get_speculative_pipeline().lookup(
+                document_id, 'audio', (language, gender), text_hash=text_fingerprint(document_text))
+            if ready_path and os.path.exists(ready_path):
+                logger.info("Using speculatively generated audio: %s", ready_path)
+                return jsonify({
+                    "success": True,
+                    "audioPath": f"https://dyslexofly.onrender.com/api/audio/{os.path.basename(ready_path)}"
+                })
             
+        cancel_token = request_cancel_token(data, document_id)
+        busy = admission_response('tts')
+        if busy:
+            return busy
+        
         # Generate unique filename
         from services.tts_service import generate_audio_filename, text_to_speech
         output_path = generate_audio_filename(file_id, language, gender)
         
         # Generate audio
-        success = text_to_speech(document_text, output_path, language, gender)
+        publish_progress('audio', status='started', language=language, gender=gender)
+        try:
+            success = run_cancellable('tts', text_to_speech, document_text, output_path, language, gender,
+                                      cancel_token=cancel_token,
+                                      client_id=client_identity(), cost=estimate_tts_cost(document_text),
+                                      **tts_timing(time_estimator(), document_text, language, gender))
+        except OperationCancelled as e:
+            return cancelled_response(e, stage='audio')
         
         if success:
-            print(f"Audio successfully generated at {output_path}")
+            logger.info("Audio generated at %s", output_path)
             # Return full URL with host
             filename = os.path.basename(output_path)
+            if document_id:
+                tracked_files().add_audio_path(document_id, output_path)
+            publish_progress('audio', status='complete', language=language, gender=gender, filename=filename)
             return jsonify({
                 "success": True, 
                 "audioPath": f"https://dyslexofly.onrender.com/api/audio/{filename}"
             })
         else:
+            publish_progress('audio', status='failed', language=language, gender=gender)
             return jsonify({"success": False, "error": "Failed to generate audio"})
             
     except Exception as e:
-        import traceback
-        print(f"Error in regenerate_audio: {e}")
-        traceback.print_exc()
+        logger.exception("Error in regenerate_audio: %s", e)
         return jsonify({"success": False, "error": str(e)})
 
-@app.route('/api/audio/<filename>')
+@api.route('/api/scheduler/metrics', methods=['GET'])
+def scheduler_metrics():
+    """Queue depth, in-flight work and wait times for the heavy endpoints"""
+    from services.summary_batcher import get_summary_batcher
+    return jsonify({"success": True, "lanes": get_scheduler().metrics(),
+                    "summary_batcher": get_summary_batcher().stats(),
+                    "time_models": time_estimator().models(),
+                    "progress_streams": progress_hub().stats(),
+                    "bulk_ingest": bulk_ingestor().stats()})
+
+@api.route('/api/requests/<request_id>/cancel', methods=['POST'])
+def cancel_running_request(request_id):
+    """Cancel a summary/audio request started with this requestId"""
+    # Flag it for whichever worker runs it, and trip it here if it runs here
+    current_app.extensions['cancelled_requests'].put(request_id, True)
+    found = cancel_request(request_id)
+    logger.info("Cancel requested for %s (running in this worker: %s)", request_id, found)
+    return jsonify({"success": True, "requestId": request_id, "cancelled_here": found})
+
+@api.route('/api/audio/<filename>')
 def serve_audio(filename):
     """Serve audio files with proper path handling and error handling"""
     try:
         # Get absolute path to audio file and normalize it
-        filepath = os.path.abspath(os.path.join(app.config['AUDIO_OUTPUTS_DIR'], filename))
+        filepath = os.path.abspath(os.path.join(current_app.config['AUDIO_OUTPUTS_DIR'], filename))
         
         # Debug path information
-        print(f"Serving audio file: {filepath}")
-        print(f"File exists: {os.path.exists(filepath)}")
+        logger.debug("Serving audio file: %s", filepath)
         
         if os.path.exists(filepath):
             # Use directory and basename instead of the full path
             directory = os.path.dirname(filepath)
             basename = os.path.basename(filepath)
             
+            # Local-engine audio may be WAV/AIFF under an .mp3 name; send its real type
+            response = send_from_directory(directory, basename, mimetype=audio_mimetype(filepath))
             # Set CORS headers explicitly
-            response = send_from_directory(directory, basename)
             response.headers.add('Access-Control-Allow-Origin', '*')
             response.headers.add('Cache-Control', 'no-store, no-cache, must-revalidate, max-age=0')
             return response
         else:
-            print(f"ERROR: Audio file not found: {filepath}")
-            print(f"Files available in {app.config['AUDIO_OUTPUTS_DIR']}: {os.listdir(app.config['AUDIO_OUTPUTS_DIR'])}")
+            logger.warning("Audio file not found: %s", filepath)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Files available in %s: %s", current_app.config['AUDIO_OUTPUTS_DIR'],
+                             os.listdir(current_app.config['AUDIO_OUTPUTS_DIR']))
             return "Audio file not found", 404
     except Exception as e:
-        print(f"Error serving audio file: {str(e)}")
+        logger.error("Error serving audio file: %s", e)
         return str(e), 500
 
-@app.route('/api/documents/<file_id>', methods=['GET'])
+@api.route('/api/documents/<file_id>', methods=['GET'])
 def get_document(file_id):
     """Get document metadata and text content"""
     try:
         # Find the upload file path
-        upload_file_path = os.path.join(app.config['UPLOAD_FOLDER'], file_id)
+        upload_file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], file_id)
         
         # Print files for debugging
-        print(f"Files in upload folder: {os.listdir(app.config['UPLOAD_FOLDER'])}")
-        print(f"Checking if file exists: {upload_file_path}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Files in upload folder: %s", os.listdir(current_app.config['UPLOAD_FOLDER']))
         
         if os.path.exists(upload_file_path):
-            print(f"Found file at: {upload_file_path}")
+            logger.debug("Found file at: %s", upload_file_path)
             
-            # Use the new text_processing module
-            from services.text_processing import extract_text
-            extracted_text = extract_text(upload_file_path)
+            extracted_text = without_page_breaks(load_document(upload_file_path).text())
             
             # Validate extracted text
             if not extracted_text or len(extracted_text.strip()) < 50:
-                print(f"Warning: Low text extraction yield ({len(extracted_text)} chars)")
+                logger.warning("Low text extraction yield for %s (%d chars)", file_id, len(extracted_text))
                 
             # Get audio files
-            audio_files = [f for f in os.listdir(app.config['AUDIO_OUTPUTS_DIR']) 
+            audio_files = [f for f in os.listdir(current_app.config['AUDIO_OUTPUTS_DIR']) 
                           if f.startswith(os.path.splitext(file_id)[0])]
             audio_files.sort(key=lambda x: os.path.getctime(
-                os.path.join(app.config['AUDIO_OUTPUTS_DIR'], x)), reverse=True)
+                os.path.join(current_app.config['AUDIO_OUTPUTS_DIR'], x)), reverse=True)
             
             audio_path = f"https://dyslexofly.onrender.com/api/audio/{audio_files[0]}" if audio_files else None
             
@@ -482,29 +1088,27 @@ def get_document(file_id):
                 "text_length": len(extracted_text)  # For debugging
             })
         else:
-            print(f"ERROR: File not found: {upload_file_path}")
+            logger.warning("File not found: %s", upload_file_path)
             return jsonify({
                 "success": False,
                 "error": f"Document '{file_id}' not found"
             }), 404
             
     except Exception as e:
-        print(f"Error getting document: {e}")
+        logger.error("Error getting document: %s", e)
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
-@app.route('/api/documents/<file_id>/extracted-text', methods=['GET'])
+@api.route('/api/documents/<file_id>/extracted-text', methods=['GET'])
 def get_document_text(file_id):
     """Get just the extracted text for a document"""
     try:
-        upload_file_path = os.path.join(app.config['UPLOAD_FOLDER'], file_id)
+        upload_file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], file_id)
         
         if os.path.exists(upload_file_path):
-            # Use the new text_processing module
-            from services.text_processing import extract_text
-            extracted_text = extract_text(upload_file_path)
+            extracted_text = without_page_breaks(load_document(upload_file_path).text())
             
             return jsonify({
                 "success": True,
@@ -518,18 +1122,47 @@ def get_document_text(file_id):
             }), 404
             
     except Exception as e:
-        print(f"Error getting document text: {e}")
+        logger.error("Error getting document text: %s", e)
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
     
-@app.route('/api/documents/<file_id>/status', methods=['GET'])
+@api.route('/api/documents/<file_id>/window', methods=['GET'])
+def get_document_window(file_id):
+    """Get a range of sentences or paragraphs from a document"""
+    try:
+        unit = request.args.get('unit', 'sentence')
+        if unit not in ('sentence', 'paragraph'):
+            return jsonify({"success": False, "error": "unit must be 'sentence' or 'paragraph'"}), 400
+        try:
+            start = int(request.args.get('start', 0))
+            count = min(int(request.args.get('count', 20)), 500)
+        except ValueError:
+            return jsonify({"success": False, "error": "start and count must be integers"}), 400
+
+        upload_file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], file_id)
+        if not os.path.exists(upload_file_path):
+            return jsonify({"success": False, "error": "Document not found"}), 404
+
+        # Only the requested byte range of the stored text is read
+        window = load_document(upload_file_path).window(unit, start, count)
+        window.update({"success": True, "unit": unit})
+        return jsonify(window)
+
+    except Exception as e:
+        logger.error("Error getting document window: %s", e)
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@api.route('/api/documents/<file_id>/status', methods=['GET'])
 def get_document_status(file_id):
     """Check the processing status of a document"""
     try:
         # Find the upload file path
-        upload_file_path = os.path.join(app.config['UPLOAD_FOLDER'], file_id)
+        upload_file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], file_id)
         
         if not os.path.exists(upload_file_path):
             return jsonify({
@@ -538,9 +1171,11 @@ def get_document_status(file_id):
                 "error": "Document not found"
             }), 404
         
-        # Check if audio has been generated
-        audio_files = [f for f in os.listdir(app.config['AUDIO_OUTPUTS_DIR']) 
-                       if f.startswith(file_id.replace('.', '_'))]
+        # Audio generated for the document is recorded in its tracking
+        # entry; no scan of the audio directory. For live updates, use
+        # GET /api/documents/<file_id>/events instead of polling this
+        tracked = tracked_files().get(file_id)
+        audio_files = [path for path in (tracked or {}).get('audio_paths', []) if os.path.exists(path)]
         
         if audio_files:
             return jsonify({
@@ -556,13 +1191,42 @@ def get_document_status(file_id):
             })
             
     except Exception as e:
-        print(f"Error checking document status: {e}")
+        logger.error("Error checking document status: %s", e)
         return jsonify({
             "success": False,
             "status": "error",
             "error": str(e)
         }), 500
 
+def event_stream_response(channel, until_done=False):
+    """text/event-stream response for a progress channel, resuming after Last-Event-ID"""
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId') or 0
+    try:
+        last_id = int(last_id)
+    except ValueError:
+        last_id = 0
+    hub = progress_hub()
+    if not hub.try_open_stream():
+        response = jsonify({"success": False, "error": "Too many open event streams, please retry"})
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+    response = Response(hub.stream(channel, last_id, until_done=until_done), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Frees the slot even if the stream never starts
+    response.call_on_close(hub.close_stream)
+    return response
+
+@api.route('/api/documents/<file_id>/events', methods=['GET'])
+def document_events(file_id):
+    """Server-sent extraction, summary and audio progress events for a document"""
+    return event_stream_response(document_channel(file_id))
+
+@api.route('/api/jobs/<request_id>/events', methods=['GET'])
+def job_events(request_id):
+    """Server-sent progress events for the request sent with this requestId; ends with a 'done' event"""
+    return event_stream_response(job_channel(request_id), until_done=True)
+
 # Add this to handle server shutdown:
 
 # DISABLED: This was causing files to be deleted after every request
@@ -597,49 +1261,40 @@ def get_document_status(file_id):
 
 import atexit
 
-def cleanup_on_exit():
+def cleanup_on_exit(app):
     """Clean up temporary files when server actually shuts down"""
-    print("Server shutdown detected, cleaning up all files...")
+    logger.info("Server shutdown detected, cleaning up all files")
+    file_tracking = app.extensions['file_tracking']
     
-    for file_id, data in list(file_tracking.items()):
+    for file_id, data in file_tracking.items():
         # Delete uploaded file
-        if isinstance(data, dict) and 'file_path' in data and os.path.exists(data['file_path']):
+        if os.path.exists(data['file_path']):
             try:
                 os.remove(data['file_path'])
-                print(f"Deleted uploaded file: {data['file_path']}")
-            except Exception as e:
-                print(f"Error deleting file {data['file_path']}: {e}")
-        
-        # Handle old format of file tracking
-        elif isinstance(data, (int, float)) and os.path.exists(os.path.join(UPLOAD_FOLDER, file_id)):
-            try:
-                os.remove(os.path.join(UPLOAD_FOLDER, file_id))
-                print(f"Deleted old-format file: {file_id}")
+                logger.info("Deleted uploaded file: %s", data['file_path'])
             except Exception as e:
-                print(f"Error deleting old-format file {file_id}: {e}")
+                logger.error("Error deleting file %s: %s", data['file_path'], e)
+        file_tracking.remove(file_id)
     
-    # Clear tracking dictionary
-    file_tracking.clear()
-    print("Cleanup on exit complete")
-
-# Register cleanup function to run on actual server shutdown
-atexit.register(cleanup_on_exit)
+    logger.info("Cleanup on exit complete")
 
 # Debugging endpoints
-print(f"Current working directory: {os.getcwd()}")
-print(f"Files in upload folder at startup: {os.listdir(UPLOAD_FOLDER) if os.path.exists(UPLOAD_FOLDER) else []}")
+logger.info("Current working directory: %s", os.getcwd())
+if logger.isEnabledFor(logging.DEBUG):
+    logger.debug("Files in upload folder at startup: %s",
+                 os.listdir(UPLOAD_FOLDER) if os.path.exists(UPLOAD_FOLDER) else [])
 
-@app.route('/api/debug/files')
+@api.route('/api/debug/files')
 def debug_files():
     """Debug endpoint to list all files and tracking"""
     return jsonify({
         'working_directory': os.getcwd(),
         'upload_folder': UPLOAD_FOLDER,
         'files_in_folder': os.listdir(UPLOAD_FOLDER) if os.path.exists(UPLOAD_FOLDER) else [],
-        'tracking_data': str(file_tracking)
+        'tracking_data': str(dict(tracked_files().items()))
     })
 
-@app.route('/api/audio/cleanup', methods=['POST'])
+@api.route('/api/audio/cleanup', methods=['POST'])
 def cleanup_audio():
     """Log cleanup requests but don't actually delete audio files"""
     try:
@@ -657,10 +1312,9 @@ def cleanup_audio():
             filename = audio_path
         
         # Construct full path
-        full_path = os.path.join(app.config['AUDIO_OUTPUTS_DIR'], filename)
+        full_path = os.path.join(current_app.config['AUDIO_OUTPUTS_DIR'], filename)
         
-        print(f"Request to delete audio file: {full_path}")
-        print(f"Deletion prevented - keeping file for playback")
+        logger.info("Request to delete audio file %s; keeping it for playback", full_path)
         
         # DISABLED: Don't actually delete the file
         # if os.path.exists(full_path):
@@ -670,13 +1324,11 @@ def cleanup_audio():
         return jsonify({"success": True, "message": "Audio file cleanup handled"})
     
     except Exception as e:
-        print(f"Error in cleanup_audio: {e}")
+        logger.error("Error in cleanup_audio: %s", e)
         return jsonify({"success": False, "error": str(e)}), 500
 
-@app.route('/api/check-file', methods=['POST'])
+@api.route('/api/check-file', methods=['POST'])
 def check_file_exists():
-
-    global recent_check_requests
     data = request.json
     file_id = data.get('fileId')
     
@@ -685,15 +1337,13 @@ def check_file_exists():
     
     # Deduplication check - if same request was made within last 2 seconds
     request_key = f"{file_id}_{request.remote_addr}"
-    current_time = time.time()
+    recent_results = current_app.extensions['check_requests']
     
-    if request_key in recent_check_requests:
-        last_request = recent_check_requests[request_key]
-        if current_time - last_request['timestamp'] < 2:  # Within 2 seconds
-            print(f"DEDUPLICATED REQUEST: {file_id} - Using cached result")
-            return last_request['response']
+    cached = recent_results.get(request_key)
+    if cached is not None:
+        logger.debug("Deduplicated check-file request: %s", file_id)
+        return jsonify(cached)
     
-    print(f"Checking file existence for: {file_id}")
     
     # Try exact match first
     file_path = os.path.join(UPLOAD_FOLDER, file_id)
@@ -708,34 +1358,34 @@ def check_file_exists():
         
         for ext in ['.pdf', '.docx', '.txt', '.png', '.jpg', '.jpeg']:
             potential_path = os.path.join(UPLOAD_FOLDER, f"{base_file_id}{ext}")
-            print(f"Trying path: {potential_path}")
+            logger.debug("Trying path: %s", potential_path)
             if os.path.exists(potential_path):
                 exists = True
                 file_path = potential_path
                 break
     
-    print(f"Checking file existence: {file_id} - {'Found' if exists else 'Not found'}")
-    if exists:
-        print(f"Found at: {file_path}")
+    logger.debug("Checking file existence: %s - %s", file_id, file_path if exists else 'not found')
     
     # Store the response for future duplicate requests
     result = {"exists": exists, "filePath": file_path if exists else None}
-    response = jsonify(result)
-    recent_check_requests[request_key] = {
-        'timestamp': current_time,
-        'response': response
-    }
+    recent_results.put(request_key, result)
     
-    return response
+    return jsonify(result)
 
-@app.route('/api/generate-summary', methods=['POST'])
+@api.route('/api/generate-summary', methods=['POST'])
 def generate_summary():
     try:
         data = request.get_json()
         file_id = data.get('fileId')
         summaryType = data.get('summaryType', 'brief')  # default to brief
+        shared_pass = data.get('sharedPass')  # None -> SUMMARY_SHARED_PASS default
+        strip = resolve_toggle(data.get('stripBoilerplate'))
+        mode = data.get('mode', 'abstractive')  # 'extractive': fast, model-free
+        prefilter = data.get('prefilter')  # None -> SUMMARY_PREFILTER default
+        if prefilter is not None:
+            prefilter = str(prefilter).lower() not in ('0', 'false', 'no', 'off')
         
-        print(f"SUMMARY GENERATION REQUEST: file_id={file_id}, summary_type={summaryType}")
+        logger.info("Summary request: file_id=%s, summary_type=%s, mode=%s", file_id, summaryType, mode)
 
         if not file_id:
             return jsonify({"success": False, "error": "No file ID provided"})
@@ -751,45 +1401,257 @@ def generate_summary():
             
             for ext in ['.pdf', '.docx', '.txt', '.png', '.jpg', '.jpeg']:
                 potential_path = os.path.join(UPLOAD_FOLDER, f"{base_file_id}{ext}")
-                print(f"Trying path: {potential_path}")
+                logger.debug("Trying path: %s", potential_path)
                 if os.path.exists(potential_path):
                     file_path = potential_path
                     break
         
         if not os.path.exists(file_path):
-            print(f"File not found: {file_id}")
-            print(f"Available files in upload folder: {os.listdir(UPLOAD_FOLDER) if os.path.exists(UPLOAD_FOLDER) else 'Upload folder does not exist'}")
+            logger.warning("File not found: %s", file_id)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Available files in upload folder: %s",
+                             os.listdir(UPLOAD_FOLDER) if os.path.exists(UPLOAD_FOLDER) else 'Upload folder does not exist')
             return jsonify({"success": False, "error": f"Document '{file_id}' not found. Please ensure the file has been uploaded successfully."})
             
-        print(f"Found file at: {file_path}")
+        logger.debug("Found file at: %s", file_path)
+        
+        # Chunk loops stop at the deadline, on cancel or on disconnect; at a
+        # deadline the chunks finished so far come back flagged "partial".
+        # Chunk progress goes to the document's (and job's) event stream
+        cancel_token = request_cancel_token(data, os.path.basename(file_path))
+        allow_partial = str(data.get('allowPartial', True)).lower() not in ('0', 'false', 'no', 'off')
             
-        # Extract text from the document
-        from services.text_processing import extract_text
-        document_text = extract_text(file_path)
+        stored = load_document(file_path, strip=strip)
+        if stored.boilerplate and stored.boilerplate["chars_removed"]:
+            logger.debug("Stripped %d boilerplate characters before summarizing", stored.boilerplate['chars_removed'])
+        
+        # Extractive mode ranks the stored sentence table directly: no
+        # models, no scheduler lane, milliseconds even for long documents
+        if mode == 'extractive':
+            from services.extractive_summary import EXTRACTIVE_SENTENCES, extractive_summary
+            sentences = [stored.sentence(i) for i in range(len(stored.sentence_starts))]
+            if sum(len(sentence) for sentence in sentences) < 10:
+                return jsonify({"success": False, "error": "Could not extract sufficient text from document. Please ensure the document contains readable text."})
+            if summaryType == 'all':
+                summaries = {kind: extractive_summary(sentences, kind) for kind in EXTRACTIVE_SENTENCES}
+                publish_progress('summary', status='complete', summary_type=summaryType, mode='extractive')
+                return jsonify({"success": True, "summaries": summaries, "mode": "extractive"})
+            summary = extractive_summary(sentences, summaryType)
+            publish_progress('summary', status='complete', summary_type=summaryType, mode='extractive')
+            return jsonify({"success": True, "summary": summary, "mode": "extractive"})
+        
+        document_text = summary_input_text(stored, prefilter)
         
         if not document_text or len(document_text.strip()) < 10:
-            print(f"Text extraction failed or insufficient text. Length: {len(document_text) if document_text else 0}")
+            logger.warning("Text extraction failed or insufficient text. Length: %d", len(document_text) if document_text else 0)
             return jsonify({"success": False, "error": "Could not extract sufficient text from document. Please ensure the document contains readable text."})
             
-        print(f"Extracted text length: {len(document_text)} characters")
+        logger.debug("Extracted text length: %d characters", len(document_text))
+        
+        # Use the speculative TL;DR if it is ready (or already being computed);
+        # it was made with the default pre-filter setting
+        ready_summary = prefilter is None and get_speculative_pipeline().lookup(
+            os.path.basename(file_path), 'summary', summaryType, text_hash=stored.sha1)
+        if ready_summary:
+            logger.info("Using speculatively generated %s summary", summaryType)
+            publish_progress('summary', status='complete', summary_type=summaryType)
+            return jsonify({"success": True, "summary": ready_summary})
+        
+        busy = admission_response('summary')
+        if busy:
+            return busy
+        publish_progress('summary', status='started', summary_type=summaryType)
+        
+        # 'all' returns every summary type from one shared pass
+        if summaryType == 'all':
+            from services.summary_service import generate_all_summaries
+            try:
+                summaries = run_cancellable('summary', generate_all_summaries, document_text,
+                                            prefilter=prefilter, cancel_token=cancel_token,
+                                            client_id=client_identity(),
+                                            cost=estimate_summary_cost(document_text, 'detailed'),
+                                            **summary_timing(time_estimator(), document_text, 'all'))
+            except OperationCancelled as e:
+                return cancelled_response(e, allow_partial, key='summaries')
+            if not summaries.get('detailed') or len(summaries['detailed'].strip()) < 10:
+                publish_progress('summary', status='failed', summary_type=summaryType)
+                return jsonify({"success": False, "error": "Failed to generate summary. The document content may be too short or unclear."})
+            publish_progress('summary', status='complete', summary_type=summaryType)
+            return jsonify({"success": True, "summaries": summaries})
         
         # Generate summary using the summary service
         from services.summary_service import generate_summary_by_type
-        summary = generate_summary_by_type(document_text, summaryType)
+        try:
+            summary = run_cancellable('summary', generate_summary_by_type, document_text, summaryType,
+                                      shared_pass=shared_pass, prefilter=prefilter,
+                                      cancel_token=cancel_token, client_id=client_identity(),
+                                      cost=estimate_summary_cost(document_text, summaryType),
+                                      **summary_timing(time_estimator(), document_text, summaryType))
+        except OperationCancelled as e:
+            return cancelled_response(e, allow_partial)
         
         if not summary or len(summary.strip()) < 10:
+            publish_progress('summary', status='failed', summary_type=summaryType)
             return jsonify({"success": False, "error": "Failed to generate summary. The document content may be too short or unclear."})
         
-        print(f"Generated summary length: {len(summary)} characters")
+        logger.info("Generated summary length: %d characters", len(summary))
+        publish_progress('summary', status='complete', summary_type=summaryType)
         return jsonify({"success": True, "summary": summary})
             
     except Exception as e:
-        import traceback
-        print(f"Error in generate_summary: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Error in generate_summary: %s", e)
         return jsonify({"success": False, "error": f"Server error while generating summary: {str(e)}"})
     
-@app.route('/api/cleanup-document', methods=['POST'])
+def summary_input_text(stored, prefilter=None):
+    """
+    Text the summarizer reads from a stored document. Without the
+    pre-filter, summaries only read the head of the document
+    (MAX_CHAR_LIMIT), so take just that; one extra character keeps the
+    truncation note.
+    """
+    from services.summary_service import MAX_CHAR_LIMIT, PREFILTER_DEFAULT
+    if prefilter if prefilter is not None else PREFILTER_DEFAULT:
+        return stored.text()
+    return stored.head(MAX_CHAR_LIMIT + 1)
+
+@api.route('/api/generate-summary/stream', methods=['POST'])
+def generate_summary_stream():
+    """
+    Abstractive summary streamed as server-sent events while it is generated.
+
+    Takes the generate-summary fields (fileId, summaryType, prefilter,
+    stripBoilerplate, requestId, deadlineSeconds) and answers with
+    text/event-stream events:
+
+    - "chunk": {"text", "done", "total"}: the next piece, in document
+      order. The pieces concatenate to the full summary
+    - "complete": {"summary", "cached"}: the full summary, also cached for
+      later streamed or regular requests
+    - "cancelled": {"reason", "summary"}: stopped at the deadline, on cancel
+      or on disconnect; summary is what was streamed so far (or null)
+    - "error": {"error"}
+
+    Validation failures and 429 (busy) come back as regular JSON.
+    """
+    try:
+        data = request.get_json() or {}
+        file_id = data.get('fileId')
+        summary_type = data.get('summaryType', 'brief')
+        strip = resolve_toggle(data.get('stripBoilerplate'))
+        prefilter = data.get('prefilter')
+        if prefilter is not None:
+            prefilter = str(prefilter).lower() not in ('0', 'false', 'no', 'off')
+        if summary_type not in ('tldr', 'brief', 'detailed'):
+            return jsonify({"success": False, "error": "summaryType must be 'tldr', 'brief' or 'detailed'"}), 400
+        
+        file_path = resolve_upload_path(file_id) if file_id else None
+        if not file_path:
+            return jsonify({"success": False, "error": f"Document '{file_id}' not found. Please ensure the file has been uploaded successfully."})
+        
+        cancel_token = request_cancel_token(data, os.path.basename(file_path))
+        # The job's 'done' event is published when the stream ends, not
+        # when the view returns
+        progress_job = g.pop('progress_job', None)
+        stored = load_document(file_path, strip=strip)
+        document_text = summary_input_text(stored, prefilter)
+        if not document_text or len(document_text.strip()) < 10:
+            return jsonify({"success": False, "error": "Could not extract sufficient text from document. Please ensure the document contains readable text."})
+        
+        from services.summary_service import cached_summary, stream_summary_by_type
+        ready_summary = cached_summary(document_text, summary_type, prefilter) or (
+            prefilter is None and get_speculative_pipeline().lookup(
+                os.path.basename(file_path), 'summary', summary_type, text_hash=stored.sha1))
+        if not ready_summary:
+            busy = admission_response('summary')
+            if busy:
+                return busy
+        
+        pieces = queue.Queue()
+        
+        def produce(cancel_token=None):
+            # Runs on the summary lane; the response below relays the pieces
+            summary = ""
+            for piece, done, total in stream_summary_by_type(document_text, summary_type, cancel_token=cancel_token,
+                                                             prefilter=prefilter):
+                summary += piece
+                pieces.put({"text": piece, "done": done, "total": total})
+            return summary
+        
+        if ready_summary:
+            future = Future()
+            pieces.put({"text": ready_summary, "done": 1, "total": 1})
+            future.set_result(ready_summary)
+        else:
+            publish_progress('summary', status='started', summary_type=summary_type)
+            future = get_scheduler().submit('summary', profiled(produce), cancel_token=cancel_token,
+                                            client_id=client_identity(),
+                                            cost=estimate_summary_cost(document_text, summary_type),
+                                            **summary_timing(time_estimator(), document_text, summary_type))
+        # Ends the relay once the task has finished, failed or been dropped
+        future.add_done_callback(lambda _: pieces.put(None))
+        
+        def events():
+            sent = []
+            last_beat = time.monotonic()
+            try:
+                while True:
+                    try:
+                        piece = pieces.get(timeout=0.25)
+                    except queue.Empty:
+                        if cancel_token.cancelled:
+                            # Drops the task if it has not started yet
+                            future.cancel()
+                        if time.monotonic() - last_beat >= HEARTBEAT_SECONDS:
+                            last_beat = time.monotonic()
+                            yield ": keep-alive\n\n"
+                        continue
+                    if piece is None:
+                        break
+                    sent.append(piece["text"])
+                    last_beat = time.monotonic()
+                    yield format_event({"id": len(sent), "event": 'chunk', "data": piece})
+                
+                try:
+                    summary = future.result()
+                except (OperationCancelled, CancelledError) as e:
+                    reason = getattr(e, 'reason', None) or cancel_token.reason or 'cancelled'
+                    partial = "".join(sent) or None
+                    logger.info("Summary stream stopped: %s", reason)
+                    publish_progress('summary', status='cancelled', reason=reason, summary_type=summary_type)
+                    yield format_event({"id": len(sent) + 1, "event": 'cancelled',
+                                        "data": {"reason": reason, "summary": partial}})
+                    return
+                if not summary or len(summary.strip()) < 10:
+                    publish_progress('summary', status='failed', summary_type=summary_type)
+                    yield format_event({"id": len(sent) + 1, "event": 'error', "data": {
+                        "error": "Failed to generate summary. The document content may be too short or unclear."}})
+                    return
+                publish_progress('summary', status='complete', summary_type=summary_type)
+                yield format_event({"id": len(sent) + 1, "event": 'complete',
+                                    "data": {"summary": summary, "cached": bool(ready_summary)}})
+            except Exception as e:
+                logger.exception("Error in summary stream: %s", e)
+                publish_progress('summary', status='failed', summary_type=summary_type)
+                yield format_event({"id": len(sent) + 1, "event": 'error',
+                                    "data": {"error": f"Server error while generating summary: {str(e)}"}})
+            finally:
+                if not future.done():
+                    # Client went away mid-stream
+                    cancel_token.cancel('disconnected')
+                if progress_job:
+                    progress_hub().publish([job_channel(progress_job)], 'done', status_code=200)
+                restore_stream_teardown()
+        
+        # The token, interactive mark and any profile stay live until the stream ends
+        g.streaming = True
+        return Response(stream_with_context(events()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+            
+    except Exception as e:
+        logger.exception("Error in generate_summary_stream: %s", e)
+        return jsonify({"success": False, "error": f"Server error while generating summary: {str(e)}"})
+
+@api.route('/api/cleanup-document', methods=['POST'])
 def cleanup_document():
     """Clean up a specific document and its associated files"""
     try:
@@ -799,7 +1661,7 @@ def cleanup_document():
         if not file_id:
             return jsonify({"success": False, "error": "No file ID provided"}), 400
         
-        print(f"CLEANUP REQUEST: {file_id}")
+        logger.info("Cleanup request: %s", file_id)
         
         # Find and delete the uploaded file
         file_path = os.path.join(UPLOAD_FOLDER, file_id)
@@ -808,7 +1670,7 @@ def cleanup_document():
         if os.path.exists(file_path):
             os.remove(file_path)
             deleted_files.append(file_path)
-            print(f"Deleted uploaded file: {file_path}")
+            logger.info("Deleted uploaded file: %s", file_path)
         
         # Try with different extensions if exact match not found
         if not deleted_files:
@@ -818,25 +1680,27 @@ def cleanup_document():
                 if os.path.exists(potential_path):
                     os.remove(potential_path)
                     deleted_files.append(potential_path)
-                    print(f"Deleted file with extension: {potential_path}")
+                    logger.info("Deleted file with extension: %s", potential_path)
                     break
         
         # Delete associated audio files
         audio_pattern = file_id.replace('.', '_')
-        audio_files = [f for f in os.listdir(app.config['AUDIO_OUTPUTS_DIR']) 
+        audio_files = [f for f in os.listdir(current_app.config['AUDIO_OUTPUTS_DIR']) 
                        if f.startswith(audio_pattern)]
         
         for audio_file in audio_files:
-            audio_path = os.path.join(app.config['AUDIO_OUTPUTS_DIR'], audio_file)
+            audio_path = os.path.join(current_app.config['AUDIO_OUTPUTS_DIR'], audio_file)
             if os.path.exists(audio_path):
                 os.remove(audio_path)
                 deleted_files.append(audio_path)
-                print(f"Deleted audio file: {audio_path}")
+                logger.info("Deleted audio file: %s", audio_path)
         
-        # Remove from tracking
-        if file_id in file_tracking:
-            del file_tracking[file_id]
-            print(f"Removed {file_id} from tracking")
+        # Remove from tracking and stop any speculative work for it
+        get_speculative_pipeline().cancel(file_id)
+        get_document_store().remove(file_id)
+        if file_id in tracked_files():
+            tracked_files().remove(file_id)
+            logger.info("Removed %s from tracking", file_id)
         
         return jsonify({
             "success": True, 
@@ -845,18 +1709,18 @@ def cleanup_document():
         })
         
     except Exception as e:
-        print(f"Error in cleanup_document: {e}")
+        logger.error("Error in cleanup_document: %s", e)
         return jsonify({"success": False, "error": str(e)}), 500
 
-@app.route('/api/debug-summary', methods=['POST'])
+@api.route('/api/debug-summary', methods=['POST'])
 def debug_summary():
     """Debug endpoint to test summary generation with minimal requirements"""
     data = request.get_json()
     file_id = data.get('fileId')
     summary_type = data.get('summaryType', 'brief')
     
-    print(f"DEBUG SUMMARY REQUEST: file_id={file_id}, summary_type={summary_type}")
-    print(f"Request JSON: {data}")
+    logger.debug("Debug summary request: file_id=%s, summary_type=%s", file_id, summary_type)
+    logger.debug("Request JSON: %s", data)
     
     # Send back a simple response for debugging
     return jsonify({
@@ -865,7 +1729,7 @@ def debug_summary():
         "request_received": True
     })
 
-@app.route('/api/file-stats', methods=['POST'])
+@api.route('/api/file-stats', methods=['POST'])
 def get_file_stats():
     """Get file statistics and processing time estimation"""
     try:
@@ -876,66 +1740,334 @@ def get_file_stats():
             return jsonify({"success": False, "error": "No file ID provided"}), 400
         
         # Check if file exists in tracking
-        if file_id not in file_tracking:
+        tracked = tracked_files().get(file_id)
+        if not tracked:
             return jsonify({"success": False, "error": "File not found"}), 404
         
-        file_path = file_tracking[file_id]['file_path']
-        
-        # Extract text and get statistics
-        from services.text_processing import extract_text, get_text_statistics, estimate_processing_time
-        text_content = extract_text(file_path)
-        if not text_content:
-            return jsonify({"success": False, "error": "Could not extract text"}), 400
+        file_path = tracked['file_path']
         
-        stats = get_text_statistics(text_content)
-        estimated_time = estimate_processing_time(text_content)
+        # Speculative stats skip re-extracting the document
+        ready = get_speculative_pipeline().lookup(file_id, 'stats', None)
+        if ready:
+            stats = ready['statistics']
+            estimated_time = ready['estimated_processing_time']
+        else:
+            # Statistics are stored with the text; no need to read it
+            stored = load_document(file_path)
+            if not stored.byte_size:
+                return jsonify({"success": False, "error": "Could not extract text"}), 400
+            
+            stats = stored.statistics()
+            estimated_time = estimate_processing_eta(time_estimator(), stats["characters"])
         
         return jsonify({
             "success": True,
             "statistics": stats,
             "estimated_processing_time": estimated_time,
             "file_info": {
-                "upload_time": file_tracking[file_id]['upload_time'].isoformat(),
+                "upload_time": tracked['upload_time'].isoformat(),
                 "file_size": os.path.getsize(file_path),
                 "file_path": file_path
             }
         })
     
     except Exception as e:
-        print(f"File stats error: {e}")
+        logger.error("File stats error: %s", e)
         return jsonify({"success": False, "error": str(e)}), 500
 
-@app.route('/api/file-tracking', methods=['GET'])
+def not_modified(etag):
+    """304 for a conditional GET whose If-None-Match matches etag, else None"""
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        return response
+    return None
+
+@api.route('/api/file-tracking', methods=['GET'])
 def get_file_tracking():
-    """Get file tracking data for analytics"""
+    """
+    Raw upload log (every kept segment). Prefer /api/analytics, which
+    serves precomputed rollups; both answer 304 while nothing changed.
+    """
     try:
-        tracking_file_path = os.path.join(app.config['UPLOAD_FOLDER'], '_file_tracking.txt')
+        log = tracking_log()
+        etag = log.etag('log')
+        unchanged = not_modified(etag)
+        if unchanged:
+            return unchanged
         
-        if not os.path.exists(tracking_file_path):
-            return jsonify({
+        content = log.read_all()
+        if not content:
+            response = jsonify({
                 "success": True,
                 "data": "",
                 "message": "No file tracking data available"
             })
-        
-        with open(tracking_file_path, 'r') as f:
-            content = f.read()
-        
-        return jsonify({
-            "success": True,
-            "data": content
-        })
+        else:
+            response = jsonify({
+                "success": True,
+                "data": content
+            })
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     
     except Exception as e:
-        print(f"Error reading file tracking: {e}")
+        logger.error("Error reading file tracking: %s", e)
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
+
+@api.route('/api/analytics', methods=['GET'])
+def get_analytics():
+    """
+    Upload analytics from the precomputed rollups.
+    
+    Query parameters:
+        from, to: ISO 8601 date/time (UTC unless an offset is given) or
+            epoch seconds; default the last DEFAULT_QUERY_DAYS days
+        bucket: 'day' (default) or 'hour'
+    
+    Returns totals and a series of non-empty buckets for the range (uploads,
+    bytes, average/max size, file types, average extraction seconds,
+    failed extractions), plus all-time totals. Responses carry an ETag
+    that changes only with new uploads or a new range, so a refresh with
+    If-None-Match is answered 304.
+    """
+    try:
+        bucket = request.args.get('bucket', 'day')
+        if bucket not in ('day', 'hour'):
+            return jsonify({"success": False, "error": "bucket must be 'day' or 'hour'"}), 400
+        try:
+            # An open-ended range runs to the end of the current hour
+            end = parse_time(request.args['to']) if request.args.get('to') else (
+                datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(hours=1))
+            start = parse_time(request.args['from']) if request.args.get('from') else (
+                end - timedelta(days=DEFAULT_QUERY_DAYS))
+        except ValueError:
+            return jsonify({"success": False, "error": "from/to must be ISO 8601 dates or epoch seconds"}), 400
+        if start >= end:
+            return jsonify({"success": False, "error": "from must be before to"}), 400
+        if end - start > timedelta(days=MAX_QUERY_DAYS):
+            return jsonify({"success": False, "error": f"Range is limited to {MAX_QUERY_DAYS} days"}), 400
+        
+        log = tracking_log()
+        etag = log.etag('analytics', start.isoformat(), end.isoformat(), bucket)
+        unchanged = not_modified(etag)
+        if unchanged:
+            return unchanged
+        
+        result = log.query(start, end, bucket)
+        response = jsonify({
+            "success": True,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "bucket": bucket,
+            "totals": result["totals"],
+            "series": result["series"],
+            "all_time": log.all_time(),
+        })
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    
+    except Exception as e:
+        logger.error("Error building analytics: %s", e)
+        return jsonify({"success": False, "error": str(e)}), 500
+    
+# Profiling hooks; create_app registers them only when PROFILE_TOKEN is set
+PROFILE_EXCLUDED_ENDPOINTS = {'api.list_request_profiles', 'api.get_request_profile', 'api.arm_request_profile',
+                              'api.document_events', 'api.job_events'}
+# Endpoints that parse their own body (reading request.form would apply the
+# default body limit and consume it)
+PROFILE_NO_FORM_ENDPOINTS = {'api.bulk_upload'}
+
+def profile_request_label():
+    """Document named by the current request (fileId or the uploaded file), if any"""
+    if request.endpoint in PROFILE_NO_FORM_ENDPOINTS:
+        return None
+    data = request.get_json(silent=True) if request.is_json else None
+    file_id = (data or {}).get('fileId') or request.form.get('fileId')
+    if not file_id and 'file' in request.files:
+        file_id = secure_filename(request.files['file'].filename or '')
+    return str(file_id)[:100] if file_id else None
+
+def take_armed_profile(file_id):
+    """True (and one use consumed) if the document was armed for profiling"""
+    armed = current_app.extensions['profile_armed']
+    entry = armed.get(file_id)
+    if not entry:
+        return False
+    if entry["remaining"] > 1:
+        armed.put(file_id, {"remaining": entry["remaining"] - 1})
+    else:
+        armed.backend.delete(armed.namespace, file_id)
+    return True
+
+def start_request_profile():
+    if request.endpoint is None or request.endpoint in PROFILE_EXCLUDED_ENDPOINTS:
+        return
+    label = profile_request_label()
+    header = request.headers.get('X-Profile-Token', '')
+    if not (header and hmac.compare_digest(header, PROFILE_TOKEN)) and not (label and take_armed_profile(label)):
+        return
+    logger.info("Profiling %s for %s", request.endpoint, label or 'request')
+    g.profile = RequestProfile(request.endpoint.split('.')[-1], label)
+    g.profile.start()
+
+def record_profile_status(response):
+    if g.get('profile') is not None:
+        g.profile_status = response.status_code
+        # Saved once the request finishes, under this name
+        response.headers['X-Profile-Name'] = g.profile.name
+    return response
+
+def finish_request_profile(exception=None):
+    # Runs after a streamed response has finished, so the trace covers it
+    profile = g.pop('profile', None)
+    if profile is None:
+        return
+    profile.stop()
+    try:
+        if profile.save(status_code=g.get('profile_status')):
+            logger.info("Saved profile %s (%d thread(s), %d skipped)", profile.name, profile.threads, profile.skipped)
+    except Exception as e:
+        logger.error("Error saving profile: %s", e)
+
+def profile_access_error():
+    """404 while profiling is disabled, 403 without the right X-Profile-Token; None if allowed"""
+    if not PROFILING_ENABLED:
+        return jsonify({"success": False, "error": "Not found"}), 404
+    if not hmac.compare_digest(request.headers.get('X-Profile-Token', ''), PROFILE_TOKEN):
+        return jsonify({"success": False, "error": "Invalid profile token"}), 403
+    return None
+
+@api.route('/api/admin/profiles', methods=['GET'])
+def list_request_profiles():
+    """Saved request traces, newest first"""
+    denied = profile_access_error()
+    if denied:
+        return denied
+    return jsonify({"success": True, "profiles": list_profiles()})
+
+@api.route('/api/admin/profiles/<name>', methods=['GET'])
+def get_request_profile(name):
+    """
+    Download a trace as a pstats dump (<name>.prof), or with
+    ?format=text the top functions (?sort=cumulative|tottime|calls, ?limit=)
+    """
+    denied = profile_access_error()
+    if denied:
+        return denied
+    path = profile_path(name)
+    if not path:
+        return jsonify({"success": False, "error": "Profile not found"}), 404
+    if request.args.get('format') == 'text':
+        sort = request.args.get('sort', 'cumulative')
+        if sort not in ('cumulative', 'tottime', 'calls'):
+            return jsonify({"success": False, "error": "sort must be cumulative, tottime or calls"}), 400
+        limit = min(request.args.get('limit', 40, type=int), 500)
+        return Response(profile_report(path, sort, limit), mimetype='text/plain')
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True,
+                     download_name=os.path.basename(path))
+
+@api.route('/api/admin/profiles/arm', methods=['POST'])
+def arm_request_profile():
+    """
+    Profile the next request(s) naming a document, for clients that cannot
+    send X-Profile-Token. Body: {"fileId": ..., "count": 1}; expires after
+    ARM_SECONDS.
+    """
+    denied = profile_access_error()
+    if denied:
+        return denied
+    data = request.get_json() or {}
+    file_id = data.get('fileId')
+    if not file_id:
+        return jsonify({"success": False, "error": "No file ID provided"}), 400
+    count = max(1, min(int(data.get('count', 1)), 20))
+    current_app.extensions['profile_armed'].put(str(file_id)[:100], {"remaining": count})
+    return jsonify({"success": True, "fileId": file_id, "count": count, "expires_in": ARM_SECONDS})
+
+def create_app(config=None):
+    """
+    Application factory.
+    
+    Builds the shared-state backend and the maintenance runner but starts
+    no threads: those start per process on the first request (or from the
+    gunicorn post_fork hook), so the app can be preloaded and forked.
+    
+    Args:
+        config (dict): Optional overrides for app.config
+    
+    Returns:
+        Flask: The configured app
+    """
+    app = Flask(__name__)
+    CORS(app)
+    app.config.update(
+        UPLOAD_FOLDER=UPLOAD_FOLDER,
+        AUDIO_OUTPUTS_DIR=AUDIO_OUTPUTS_DIR,
+        MAX_CONTENT_LENGTH=16 * 1024 * 1024,
+        STATE_BACKEND=STATE_BACKEND,
+        STATE_DIR=STATE_DIR,
+        REDIS_URL=os.environ.get('REDIS_URL'),
+        MAINTENANCE_LOCK_FILE=os.environ.get('MAINTENANCE_LOCK_FILE', os.path.join(STATE_DIR, 'maintenance.lock')),
+        PRELOAD_MODELS=PRELOAD_MODELS,
+    )
+    app.config.update(config or {})
     
+    backend = create_state_backend(app.config['STATE_BACKEND'], app.config['STATE_DIR'], app.config['REDIS_URL'])
+    app.extensions['file_tracking'] = FileTracking(backend)
+    app.extensions['check_requests'] = RecentResults(backend, 'check_file', CHECK_FILE_DEDUPE_SECONDS)
+    app.extensions['cancelled_requests'] = RecentResults(backend, 'cancelled_requests', CANCEL_FLAG_SECONDS)
+    app.extensions['time_estimator'] = ProcessingTimeEstimator(backend)
+    app.extensions['progress'] = ProgressHub(backend)
+    app.extensions['tracking_log'] = TrackingLog(app.config['UPLOAD_FOLDER'], backend)
+    app.extensions['profile_armed'] = RecentResults(backend, 'profile_armed', ARM_SECONDS)
+    app.extensions['bulk_ingest'] = BulkIngestor(backend, app.extensions['progress'], app.extensions['tracking_log'],
+                                                 app.extensions['time_estimator'])
+    # Rollups for a log written before they existed (no-op afterwards)
+    app.extensions['tracking_log'].backfill()
+    
+    def run_cleanup():
+        with app.app_context():
+            cleanup_old_files(app)
+    
+    lock_path = app.config['MAINTENANCE_LOCK_FILE']
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    app.extensions['maintenance'] = MaintenanceRunner(run_cleanup, lock_path=lock_path)
+    app.register_blueprint(api)
+    
+    # Without PROFILE_TOKEN the profiling hooks are not registered at all
+    if PROFILING_ENABLED:
+        app.before_request(start_request_profile)
+        app.after_request(record_profile_status)
+        app.teardown_request(finish_request_profile)
+        logger.info("Request profiling enabled (X-Profile-Token)")
+    
+    # Deleting every tracked file on exit is only safe when the tracking
+    # belongs to this process; shared tracking outlives any one worker
+    if backend.process_local:
+        atexit.register(cleanup_on_exit, app)
+    
+    if app.config['PRELOAD_MODELS']:
+        logger.info("Preloading summarization models")
+        import services.summary_service  # noqa: F401  (loads the models at import)
+    
+    logger.info("App created with %s state backend", app.config['STATE_BACKEND'])
+    return app
+
+app = create_app()
+
 if __name__ == "__main__":
-    print("Starting Flask server...")
+    logger.info("Starting Flask server")
     port = int(os.environ.get('PORT', 10000))  # Render uses port 10000 by default
     debug = os.environ.get('FLASK_ENV') != 'production'
-    print(f"Server starting on host 0.0.0.0 port {port}")
+    logger.info("Server starting on host 0.0.0.0 port %s", port)
+    # Start maintenance now rather than on the first request (in the
+    # reloader's child process only, which is the one serving requests)
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        app.extensions['maintenance'].start()
     app.run(debug=debug, host='0.0.0.0', port=port, threaded=True)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Before/after benchmark for TTS text preprocessing.
+
+Compares the previous behaviour (per-call re.sub passes for Hindi, no
+preprocessing for English) with the precompiled per-language pipelines in
+services.text_preprocessing, whole-text and streamed, on PDF-shaped
+extracted text. Reports throughput and output character count, since every
+character left in the text is spoken by edge-tts.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_preprocessing
+    python -m benchmarks.bench_preprocessing --sizes 5000,25000 --output prep.json
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import unicodedata
+
+from benchmarks.bench_processing import time_call
+from benchmarks.corpus import generate_extracted_text
+
+DEFAULT_SIZES = (5000, 25000)
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), "results", "preprocessing.json")
+STREAM_CHUNK_CHARS = 8192
+
+def legacy_prepare_hindi_text(text):
+    """prepare_hindi_text as it was before the preprocessing registry"""
+    normalized = unicodedata.normalize('NFC', text)
+    normalized = re.sub(r'[\u200c\u200d]', '', normalized)
+    normalized = re.sub(r'([।,?!])', r' \1 ', normalized)
+    normalized = re.sub(r'\s+', ' ', normalized).strip()
+    return normalized
+
+def legacy_prepare(text, language):
+    return legacy_prepare_hindi_text(text) if language == "hi" else text
+
+def _streamed(preprocessor, text):
+    chunks = (text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS))
+    return "".join(preprocessor.process_stream(chunks))
+
+def run_benchmarks(sizes, repeat):
+    from services.text_preprocessing import PREPROCESSORS
+
+    results = {}
+    for words in sizes:
+        for language in ("en", "hi"):
+            text = generate_extracted_text(words, language)
+            preprocessor = PREPROCESSORS[language]
+            variants = {
+                "legacy": lambda t: legacy_prepare(t, language),
+                "registry": preprocessor,
+                "registry-stream": lambda t: _streamed(preprocessor, t),
+            }
+            for variant, func in variants.items():
+                name = f"{variant}[{language}-{words}w]"
+                output = func(text)  # warm-up, and the output we report
+                stats = time_call(func, repeat, text)
+                stats.update({
+                    "input_chars": len(text),
+                    "output_chars": len(output),
+                    "mb_per_s": len(text.encode("utf-8")) / stats["median_s"] / 1e6,
+                })
+                results[name] = stats
+                print(f"  {name:<32} {stats['median_s'] * 1000:8.2f} ms  "
+                      f"{stats['mb_per_s']:7.1f} MB/s  {len(text):>8} -> {len(output):>8} chars")
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TTS preprocessing before/after benchmark")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma-separated corpus sizes in words")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the JSON results")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = run_benchmarks(sizes, args.repeat)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({"sizes": sizes, "repeat": args.repeat, "results": results}, f, indent=2)
+    print(f"Results written to {args.output}")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
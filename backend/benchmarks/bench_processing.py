@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Offline micro-benchmarks for text extraction, chunking and statistics.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_processing --output benchmarks/baseline.json
+    python -m benchmarks.bench_processing --compare benchmarks/baseline.json
+
+The second form exits with status 1 if any case got slower than the
+baseline by more than --threshold (default 25%).
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.corpus import build_corpus, WhitespaceTokenizer
+
+DEFAULT_SIZES = (500, 5000, 25000)
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), "results", "latest.json")
+
+def time_call(func, repeat, *args):
+    """Run func(*args) repeat times and return timing stats in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "mean_s": statistics.fmean(timings),
+        "runs": repeat,
+    }
+
+def collect_cases(corpus):
+    """Build the list of (case_name, func, args) to benchmark"""
+    from services.text_processing import extract_text_from_pdf, extract_text_from_docx, get_text_statistics
+    from services.text_chunking import _chunk_text_tokenizer, _clean_text
+    from services.document_model import ParsedDocument
+    from services.boilerplate import strip_boilerplate
+    from services.tts_service import prepare_hindi_text
+    from services.extractive_summary import select_sentences
+
+    tokenizer = WhitespaceTokenizer()
+    cases = []
+    for doc in corpus:
+        label = f"{doc['language']}-{doc['words']}w"
+        if doc["kind"] == "pdf":
+            cases.append((f"extract_text_from_pdf[{label}]", extract_text_from_pdf, (doc["path"],)))
+            cases.append((f"strip_boilerplate[{label}]", strip_boilerplate, (extract_text_from_pdf(doc["path"]),)))
+        elif doc["kind"] == "docx":
+            cases.append((f"extract_text_from_docx[{label}]", extract_text_from_docx, (doc["path"],)))
+        else:
+            # The TXT variant carries the raw text for the pure-text functions
+            text = doc["text"]
+            # get_text_statistics is cached per text; time the uncached parse too
+            cases.append((f"get_text_statistics[{label}]", get_text_statistics, (text,)))
+            cases.append((f"ParsedDocument[{label}]", ParsedDocument, (text,)))
+            cases.append((f"_chunk_text_tokenizer[{label}]", _chunk_text_tokenizer, (_clean_text(text), tokenizer)))
+            cases.append((f"select_sentences[{label}]", select_sentences, (list(ParsedDocument(text).sentences()), 3)))
+            if doc["language"] == "hi":
+                cases.append((f"prepare_hindi_text[{label}]", prepare_hindi_text, (text,)))
+    return cases
+
+def run_benchmarks(sizes, repeat, only=None):
+    """Generate the corpus, time every case and return the results document"""
+    workdir = tempfile.mkdtemp(prefix="dyslexofly-bench-")
+    try:
+        print(f"Generating corpus in {workdir} for sizes {list(sizes)}...")
+        corpus = build_corpus(workdir, sizes)
+        results = {}
+        for name, func, args in collect_cases(corpus):
+            if only and only not in name:
+                continue
+            func(*args)  # warm-up (imports, caches)
+            results[name] = time_call(func, repeat, *args)
+            print(f"  {name:<45} median {results[name]['median_s'] * 1000:9.2f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": list(sizes),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+def compare_results(current, baseline, threshold):
+    """
+    Compare median timings against a baseline.
+
+    Returns a list of regression dicts for cases slower than
+    baseline * (1 + threshold).
+    """
+    regressions = []
+    for name, stats in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            print(f"  {name:<45} (no baseline)")
+            continue
+        ratio = stats["median_s"] / base["median_s"] if base["median_s"] else float("inf")
+        flag = "SLOWER" if ratio > 1 + threshold else "ok"
+        print(f"  {name:<45} {ratio:6.2f}x  {flag}")
+        if ratio > 1 + threshold:
+            regressions.append({
+                "case": name,
+                "baseline_s": base["median_s"],
+                "current_s": stats["median_s"],
+                "ratio": ratio,
+            })
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline DyslexoFly processing benchmarks")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma-separated corpus sizes in words")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--only", help="Only run cases whose name contains this string")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown before a case is flagged (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    current = run_benchmarks(sizes, args.repeat, args.only)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(current, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nComparing against {args.compare} (threshold {args.threshold:.0%}):")
+        regressions = compare_results(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} case(s) slower than baseline")
+            return False
+        print("\n✅ No regressions beyond threshold")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,233 @@
+"""
+Synthetic document corpora for the offline benchmarks.
+
+Everything here is generated locally and deterministically (seeded), so
+benchmark runs never need the network or any sample uploads.
+"""
+import os
+import random
+
+ENGLISH_WORDS = (
+    "the energy cell plant water light student chapter process system "
+    "history empire trade river science experiment result teacher reading "
+    "because during between important example however therefore mountain "
+    "carbon oxygen temperature pressure government revolution village story "
+    "character journey ancient modern simple complex answer question learn"
+).split()
+
+HINDI_WORDS = (
+    "विज्ञान पानी पौधा प्रकाश ऊर्जा छात्र अध्याय इतिहास नदी व्यापार "
+    "शिक्षक कहानी गाँव सरकार प्रश्न उत्तर सीखना महत्वपूर्ण उदाहरण पर्वत "
+    "तापमान ऑक्सीजन कार्बन यात्रा प्राचीन आधुनिक सरल कठिन"
+).split()
+
+# Zero-width joiners show up in real Hindi text and exercise prepare_hindi_text
+HINDI_ZW_CHARS = ("\u200c", "\u200d")
+
+RUNNING_HEADER = "DyslexoFly Sample Textbook - Chapter 3"
+
+def generate_text(word_count, language="en", seed=42):
+    """Generate paragraph-structured text of roughly word_count words"""
+    rng = random.Random(f"{seed}-{language}-{word_count}")
+    words = HINDI_WORDS if language == "hi" else ENGLISH_WORDS
+    terminators = ["।", "।", "?", "!"] if language == "hi" else [".", ".", ".", "?", "!"]
+
+    paragraphs = []
+    sentence_words = []
+    paragraph = []
+    for i in range(word_count):
+        word = rng.choice(words)
+        if language == "hi" and rng.random() < 0.03:
+            word = word[:1] + rng.choice(HINDI_ZW_CHARS) + word[1:]
+        sentence_words.append(word)
+        if len(sentence_words) >= rng.randint(8, 20) or i == word_count - 1:
+            sentence = " ".join(sentence_words)
+            if language != "hi":
+                sentence = sentence[0].upper() + sentence[1:]
+            if rng.random() < 0.2:
+                sentence = sentence.replace(" ", ", ", 1)
+            paragraph.append(sentence + rng.choice(terminators))
+            sentence_words = []
+            if len(paragraph) >= rng.randint(3, 6):
+                paragraphs.append(" ".join(paragraph))
+                paragraph = []
+    if paragraph:
+        paragraphs.append(" ".join(paragraph))
+    return "\n".join(paragraphs)
+
+def _wrap_lines(text, width=90):
+    """Wrap text into fixed-width lines for PDF pages"""
+    lines = []
+    for paragraph in text.split("\n"):
+        line = ""
+        for word in paragraph.split():
+            if line and len(line) + 1 + len(word) > width:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        if line:
+            lines.append(line)
+        lines.append("")
+    return lines
+
+# Ligatures that PDF text extraction commonly leaves in place
+PDF_LIGATURES = {"fi": "\ufb01", "fl": "\ufb02", "ff": "\ufb00"}
+
+def generate_extracted_text(word_count, language="en", seed=42, lines_per_page=48):
+    """
+    Text shaped like PDF extraction output: wrapped lines, words hyphenated
+    across line breaks, ligature characters and a page-number line per page.
+    """
+    rng = random.Random(f"extracted-{seed}-{language}-{word_count}")
+    out = []
+    carry = ""
+    for i, line in enumerate(_wrap_lines(generate_text(word_count, language, seed))):
+        line = f"{carry}{line}" if carry and line else carry or line
+        carry = ""
+        if language == "en":
+            for plain, ligature in PDF_LIGATURES.items():
+                if rng.random() < 0.3:
+                    line = line.replace(plain, ligature)
+            # Hyphenate the last word across the line break
+            head, _, last = line.rpartition(" ")
+            if head and len(last) > 6 and last.isalpha() and last.islower() and rng.random() < 0.3:
+                cut = len(last) // 2
+                line, carry = f"{head} {last[:cut]}-", last[cut:] + " "
+        out.append(line)
+        if (i + 1) % lines_per_page == 0:
+            out.append(str((i + 1) // lines_per_page))
+    if carry:
+        out.append(carry.strip())
+    return "\n".join(out)
+
+def _pdf_escape(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_pdf(path, text, lines_per_page=48):
+    """
+    Write a minimal text-based PDF (Helvetica, one content stream per page).
+
+    Each page carries a running header and a page-number footer, like the
+    textbook PDFs users upload. Only Latin-1 text is supported, which is
+    why the Hindi corpora are generated as DOCX/TXT only.
+    """
+    lines = _wrap_lines(text)
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = []  # object bodies, object number = index + 1
+    objects.append("<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(None)  # pages tree, filled in once the kids are known
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    kids = []
+    for number, page_lines in enumerate(pages, start=1):
+        ops = ["BT", "/F1 10 Tf", "13 TL", "50 800 Td", f"({_pdf_escape(RUNNING_HEADER)}) Tj", "T* T*"]
+        for line in page_lines:
+            ops.append(f"({_pdf_escape(line)}) Tj T*")
+        ops.append("ET")
+        ops.append(f"BT /F1 9 Tf 280 30 Td (Page {number}) Tj ET")
+        stream = "\n".join(ops).encode("latin-1", errors="replace")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n".encode("latin-1") + stream + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_ref} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        if isinstance(body, str):
+            body = body.encode("latin-1")
+        out += f"{number} 0 obj\n".encode("latin-1") + body + b"\nendobj\n"
+    xref_offset = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("latin-1")
+
+    with open(path, "wb") as f:
+        f.write(out)
+    return path
+
+def write_docx(path, text, sections=3):
+    """Write a DOCX with body paragraphs, a table and repeated headers/footers"""
+    from docx import Document
+
+    doc = Document()
+    paragraphs = text.split("\n")
+    per_section = max(1, len(paragraphs) // sections)
+    for index, paragraph in enumerate(paragraphs):
+        if index and index % per_section == 0 and len(doc.sections) < sections:
+            doc.add_section()
+        doc.add_paragraph(paragraph)
+
+    table = doc.add_table(rows=4, cols=3)
+    for r, row in enumerate(table.rows):
+        for c, cell in enumerate(row.cells):
+            cell.text = f"Row {r + 1} column {c + 1}"
+    # A merged cell is visited once per grid position by python-docx
+    table.cell(0, 0).merge(table.cell(0, 2))
+
+    for section in doc.sections:
+        section.header.paragraphs[0].text = RUNNING_HEADER
+        section.footer.paragraphs[0].text = "DyslexoFly benchmark corpus"
+
+    doc.save(path)
+    return path
+
+def write_txt(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+def build_corpus(directory, sizes, seed=42):
+    """
+    Generate the benchmark corpus into directory.
+
+    Returns a list of dicts with keys: name, kind, language, words, path, text.
+    """
+    os.makedirs(directory, exist_ok=True)
+    corpus = []
+    for words in sizes:
+        for language in ("en", "hi"):
+            text = generate_text(words, language, seed)
+            kinds = ("pdf", "docx", "txt") if language == "en" else ("docx", "txt")
+            for kind in kinds:
+                name = f"{language}-{words}w.{kind}"
+                path = os.path.join(directory, name)
+                if kind == "pdf":
+                    write_pdf(path, text)
+                elif kind == "docx":
+                    write_docx(path, text)
+                else:
+                    write_txt(path, text)
+                corpus.append({
+                    "name": name,
+                    "kind": kind,
+                    "language": language,
+                    "words": words,
+                    "path": path,
+                    "text": text,
+                })
+    return corpus
+
+class WhitespaceTokenizer:
+    """
+    Offline stand-in for a Hugging Face tokenizer.
+
+    Only implements encode(), which is all _chunk_text_tokenizer needs.
+    Long words are split into 4-character pieces to roughly mimic
+    subword token counts.
+    """
+
+    def encode(self, text):
+        ids = []
+        for word in text.split():
+            for start in range(0, len(word), 4):
+                ids.append(hash(word[start:start + 4]) & 0xFFFF)
+        return ids
@@ -0,0 +1,91 @@
+"""
+Local stand-in for edge_tts.Communicate.
+
+Lets the load tests exercise /api/generate-audio and /api/regenerate-audio
+without talking to Microsoft's service. Latency, chunk cadence and failure
+rate are configurable, either through configure() or environment variables:
+
+    FAKE_TTS_FIRST_CHUNK_LATENCY  seconds before the first audio chunk (default 0.3)
+    FAKE_TTS_LATENCY_PER_CHAR     synthesis seconds per input character (default 0.002)
+    FAKE_TTS_CHUNK_INTERVAL       seconds between streamed chunks (default 0.05)
+    FAKE_TTS_FAILURE_RATE         probability a synthesis fails mid-stream (default 0.0)
+    FAKE_TTS_SEED                 seed for the failure RNG (default unseeded)
+"""
+import asyncio
+import math
+import os
+import random
+
+# edge-tts produces ~48 kbit/s MP3 and speech runs at roughly 15 chars/s
+BYTES_PER_CHAR = 400
+
+CONFIG = {
+    "first_chunk_latency": float(os.environ.get("FAKE_TTS_FIRST_CHUNK_LATENCY", 0.3)),
+    "latency_per_char": float(os.environ.get("FAKE_TTS_LATENCY_PER_CHAR", 0.002)),
+    "chunk_interval": float(os.environ.get("FAKE_TTS_CHUNK_INTERVAL", 0.05)),
+    "failure_rate": float(os.environ.get("FAKE_TTS_FAILURE_RATE", 0.0)),
+}
+
+_rng = random.Random(os.environ.get("FAKE_TTS_SEED"))
+
+# Simple counters so a driver can see what the fake actually served
+stats = {"started": 0, "completed": 0, "failed": 0, "characters": 0}
+
+def configure(**kwargs):
+    """Override fake TTS settings (keys as in CONFIG)"""
+    for key, value in kwargs.items():
+        if key not in CONFIG:
+            raise KeyError(f"Unknown fake TTS setting: {key}")
+        CONFIG[key] = float(value)
+
+class FakeTTSError(Exception):
+    """Raised when the fake service simulates an upstream failure"""
+
+class FakeCommunicate:
+    """Drop-in replacement for edge_tts.Communicate(text, voice)"""
+
+    def __init__(self, text, voice="en-US-JennyNeural", **kwargs):
+        self.text = text
+        self.voice = voice
+
+    async def stream(self):
+        """Yield audio and WordBoundary messages the way edge-tts does"""
+        stats["started"] += 1
+        stats["characters"] += len(self.text)
+
+        total_time = CONFIG["latency_per_char"] * len(self.text)
+        interval = max(CONFIG["chunk_interval"], 0.001)
+        chunk_count = max(1, math.ceil(total_time / interval))
+        chunk_bytes = max(1, (len(self.text) * BYTES_PER_CHAR) // chunk_count)
+        fail_at = chunk_count // 2 if _rng.random() < CONFIG["failure_rate"] else None
+
+        await asyncio.sleep(CONFIG["first_chunk_latency"])
+        words = self.text.split()
+        for index in range(chunk_count):
+            if index == fail_at:
+                stats["failed"] += 1
+                raise FakeTTSError(f"Simulated failure for voice {self.voice}")
+            await asyncio.sleep(interval)
+            if words:
+                yield {
+                    "type": "WordBoundary",
+                    "offset": index * 10_000_000,
+                    "duration": 5_000_000,
+                    "text": words[index % len(words)],
+                }
+            yield {"type": "audio", "data": b"\x00" * chunk_bytes}
+        stats["completed"] += 1
+
+    async def save(self, audio_fname, metadata_fname=None):
+        """Write the streamed audio bytes to audio_fname"""
+        with open(audio_fname, "wb") as audio:
+            async for message in self.stream():
+                if message["type"] == "audio":
+                    audio.write(message["data"])
+
+def install():
+    """Replace edge_tts.Communicate with the fake for this process"""
+    import edge_tts
+
+    edge_tts.Communicate = FakeCommunicate
+    print(f"Fake edge-tts installed: {CONFIG}")
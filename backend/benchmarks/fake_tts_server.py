@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Run the Flask backend with the local edge-tts stand-in installed.
+
+    python -m benchmarks.fake_tts_server --port 10001 --latency-per-char 0.002 --failure-rate 0.05
+
+Point benchmarks.load_driver at it to measure how many concurrent audio
+requests the server sustains without calling Microsoft's service.
+"""
+import argparse
+
+from benchmarks import fake_tts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DyslexoFly backend with fake TTS")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=10001)
+    parser.add_argument("--first-chunk-latency", type=float, default=fake_tts.CONFIG["first_chunk_latency"])
+    parser.add_argument("--latency-per-char", type=float, default=fake_tts.CONFIG["latency_per_char"])
+    parser.add_argument("--chunk-interval", type=float, default=fake_tts.CONFIG["chunk_interval"])
+    parser.add_argument("--failure-rate", type=float, default=fake_tts.CONFIG["failure_rate"])
+    args = parser.parse_args(argv)
+
+    fake_tts.configure(
+        first_chunk_latency=args.first_chunk_latency,
+        latency_per_char=args.latency_per_char,
+        chunk_interval=args.chunk_interval,
+        failure_rate=args.failure_rate,
+    )
+    fake_tts.install()
+
+    from flask import jsonify
+    from app import app
+
+    @app.route('/api/loadtest/fake-tts-stats', methods=['GET'])
+    def fake_tts_stats():
+        """Counters from the fake TTS backend"""
+        return jsonify({"config": fake_tts.CONFIG, "stats": fake_tts.stats})
+
+    print(f"Starting backend with fake TTS on {args.host}:{args.port}")
+    app.run(debug=False, host=args.host, port=args.port, threaded=True)
+
+if __name__ == "__main__":
+    main()
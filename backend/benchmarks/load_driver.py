@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Load-testing driver for the Flask backend.
+
+Replays a weighted mix of upload, summary and audio requests at increasing
+concurrency and reports throughput, p50/p95/p99 latency and error rate per
+level. Start the server with the fake TTS first:
+
+    python -m benchmarks.fake_tts_server --port 10001
+    python -m benchmarks.load_driver --url http://127.0.0.1:10001 --concurrency 1,4,8,16
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.corpus import generate_text
+
+DEFAULT_MIX = "upload=1,summary=1,audio=4,regenerate=2"
+VOICES = [
+    ("en-us", "female"), ("en-us", "male"), ("en-us", "child"),
+    ("en-gb", "female"), ("en-gb", "male"),
+]
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def parse_mix(mix):
+    """Parse 'upload=1,audio=4' into ([kinds], [weights])"""
+    kinds, weights = [], []
+    for part in mix.split(","):
+        kind, _, weight = part.partition("=")
+        kinds.append(kind.strip())
+        weights.append(float(weight or 1))
+    return kinds, weights
+
+class LoadDriver:
+    """Issues the individual request types against a running backend"""
+
+    def __init__(self, base_url, words, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.text = generate_text(words, "en")
+        self.audio_text = self.text[:1500]
+        self.file_id = None
+        self._upload_counter = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _session(self):
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _upload(self, name):
+        files = {"file": (name, self.text.encode("utf-8"), "text/plain")}
+        response = self._session().post(f"{self.base_url}/api/upload", files=files, timeout=self.timeout)
+        return response, response.ok and response.json().get("success", False)
+
+    def prepare(self):
+        """Upload the shared document that summary/audio requests refer to"""
+        response, ok = self._upload("loadtest_document.txt")
+        if not ok:
+            raise RuntimeError(f"Initial upload failed: {response.status_code} {response.text[:200]}")
+        self.file_id = response.json()["filename"]
+
+    def upload(self):
+        with self._lock:
+            self._upload_counter += 1
+            name = f"loadtest_upload_{self._upload_counter}.txt"
+        return self._upload(name)
+
+    def summary(self):
+        payload = {"fileId": self.file_id, "summaryType": random.choice(["tldr", "brief", "detailed"])}
+        response = self._session().post(f"{self.base_url}/api/generate-summary", json=payload, timeout=self.timeout)
+        return response, response.ok and response.json().get("success", False)
+
+    def audio(self):
+        language, gender = random.choice(VOICES)
+        payload = {"text": self.audio_text, "source": self.file_id, "language": language, "gender": gender}
+        response = self._session().post(f"{self.base_url}/api/generate-audio", json=payload, timeout=self.timeout)
+        return response, response.ok and response.json().get("success", False)
+
+    def regenerate(self):
+        language, gender = random.choice(VOICES)
+        payload = {"fileId": self.file_id, "language": language, "gender": gender}
+        response = self._session().post(f"{self.base_url}/api/regenerate-audio", json=payload, timeout=self.timeout)
+        return response, response.ok and response.json().get("success", False)
+
+    def run_one(self, kind):
+        """Run one request; returns (kind, latency_seconds, ok)"""
+        start = time.perf_counter()
+        try:
+            _, ok = getattr(self, kind)()
+        except Exception as e:
+            print(f"  {kind} request error: {e}")
+            ok = False
+        return kind, time.perf_counter() - start, ok
+
+def summarize_level(concurrency, samples, elapsed):
+    """Aggregate raw samples for one concurrency level"""
+    def describe(rows):
+        latencies = [latency for _, latency, _ in rows]
+        errors = sum(1 for _, _, ok in rows if not ok)
+        return {
+            "requests": len(rows),
+            "errors": errors,
+            "error_rate": errors / len(rows) if rows else 0.0,
+            "p50_s": percentile(latencies, 50),
+            "p95_s": percentile(latencies, 95),
+            "p99_s": percentile(latencies, 99),
+        }
+
+    report = describe(samples)
+    report["concurrency"] = concurrency
+    report["elapsed_s"] = elapsed
+    report["throughput_rps"] = len(samples) / elapsed if elapsed else 0.0
+    report["by_kind"] = {
+        kind: describe([s for s in samples if s[0] == kind])
+        for kind in sorted({s[0] for s in samples})
+    }
+    return report
+
+def run_level(driver, concurrency, total_requests, kinds, weights, rng):
+    """Fire total_requests requests from the mix using concurrency workers"""
+    plan = rng.choices(kinds, weights=weights, k=total_requests)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(driver.run_one, plan))
+    return summarize_level(concurrency, samples, time.perf_counter() - start)
+
+def print_report(report):
+    fmt = lambda v: f"{v * 1000:8.0f}" if v is not None else "     n/a"
+    print(f"concurrency {report['concurrency']:>3}: {report['throughput_rps']:6.2f} req/s  "
+          f"p50 {fmt(report['p50_s'])} ms  p95 {fmt(report['p95_s'])} ms  p99 {fmt(report['p99_s'])} ms  "
+          f"errors {report['error_rate']:.1%}")
+    for kind, row in report["by_kind"].items():
+        print(f"    {kind:<11} n={row['requests']:<4} p50 {fmt(row['p50_s'])} ms  "
+              f"p95 {fmt(row['p95_s'])} ms  errors {row['error_rate']:.1%}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DyslexoFly backend load test")
+    parser.add_argument("--url", default="http://127.0.0.1:10001")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=40, help="Requests per concurrency level")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted request mix, e.g. upload=1,audio=4")
+    parser.add_argument("--words", type=int, default=800, help="Size of the synthetic document")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Optional JSON file for the full report")
+    args = parser.parse_args(argv)
+
+    kinds, weights = parse_mix(args.mix)
+    unknown = [k for k in kinds if k not in ("upload", "summary", "audio", "regenerate")]
+    if unknown:
+        parser.error(f"Unknown request kinds in mix: {unknown}")
+
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    driver = LoadDriver(args.url, args.words, args.timeout)
+    driver.prepare()
+    print(f"Uploaded shared document as {driver.file_id}; mix {args.mix}\n")
+
+    reports = []
+    for level in [int(c) for c in args.concurrency.split(",") if c.strip()]:
+        report = run_level(driver, level, args.requests, kinds, weights, rng)
+        print_report(report)
+        reports.append(report)
+
+    try:
+        fake_stats = requests.get(f"{driver.base_url}/api/loadtest/fake-tts-stats", timeout=5).json()
+        print(f"\nFake TTS: {fake_stats['stats']}")
+    except Exception:
+        fake_stats = None
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"mix": args.mix, "levels": reports, "fake_tts": fake_stats}, f, indent=2)
+        print(f"Report written to {args.output}")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
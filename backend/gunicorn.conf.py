@@ -0,0 +1,34 @@
+"""
+Gunicorn settings for running several workers.
+
+The app is imported once in the master (preload_app) and forked, so model
+weights loaded at import are shared copy-on-write. Worker-local threads
+(scheduler lanes, TTS engine, maintenance election) start after the fork.
+
+    gunicorn -c gunicorn.conf.py app:app
+"""
+import gc
+import os
+
+# Several workers need state every worker can see
+os.environ.setdefault('STATE_BACKEND', 'file')
+os.environ.setdefault('PRELOAD_MODELS', '1')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 10000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+# Threaded workers, so open progress event streams (which each hold a
+# thread, mostly idle) do not block other requests; the stream limit
+# (PROGRESS_MAX_STREAMS) is sized from this
+os.environ.setdefault('GUNICORN_THREADS', '32')
+threads = int(os.environ['GUNICORN_THREADS'])
+timeout = 120
+preload_app = True
+
+def pre_fork(server, worker):
+    # Objects allocated so far (the preloaded models) are left out of GC
+    # passes in the workers, which would otherwise write to and copy their pages
+    gc.freeze()
+
+def post_fork(server, worker):
+    from app import app
+    app.extensions['maintenance'].start()
@@ -0,0 +1,130 @@
+"""
+Running header/footer and page-number stripping for extracted text.
+
+PDF extraction separates pages with PAGE_BREAK. Lines in the header and
+footer zone of each page (the first and last few non-empty lines) are
+normalized (case, whitespace) and removed when:
+- the same line repeats on enough pages (a running header or footer);
+- a number in the line advances with the page index across enough pages,
+  the rest of the line being the same ("Page 3", "Report - 17"); numbered
+  headings such as "Chapter 2" do not follow the page index and are kept;
+- the line is an explicit page label ("Page 3 of 10", "- 4 -").
+Text without page breaks (DOCX, TXT) passes through unchanged. PAGE_BREAK
+stays internal: without_page_breaks() removes it from text sent to clients.
+
+Disabled by default (STRIP_BOILERPLATE=1 to enable); requests can override
+it with a ``stripBoilerplate`` field.
+"""
+import math
+import os
+import re
+from collections import Counter
+
+PAGE_BREAK = '\f'
+
+STRIP_BOILERPLATE_DEFAULT = os.environ.get('STRIP_BOILERPLATE', '0') == '1'
+
+# Non-empty lines at the top and bottom of a page treated as header/footer zone
+ZONE_LINES = 3
+
+# A zone line is boilerplate when it repeats (or its number follows the
+# page index) on this share of pages, and on at least MIN_REPEAT_PAGES pages
+MIN_PAGE_SHARE = 0.5
+MIN_REPEAT_PAGES = 2
+
+# Lines that are page labels on their own; a bare number is not enough
+# (it may be a year or a list entry) and must follow the page index instead
+_PAGE_NUMBER_LINE = re.compile(r'\s*(?:page\s+\d{1,4}(?:\s*(?:of|/)\s*\d{1,4})?|\d{1,4}\s+of\s+\d{1,4}'
+                               r'|[-\u2013]\s*\d{1,4}\s*[-\u2013])\s*', re.IGNORECASE)
+_DIGITS = re.compile(r'\d+')
+
+def resolve_toggle(value):
+    """Interpret a request's stripBoilerplate value; None means the default"""
+    if value is None:
+        return STRIP_BOILERPLATE_DEFAULT
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+def without_page_breaks(text):
+    """Text for clients: PAGE_BREAK lines become paragraph breaks"""
+    return text.replace(PAGE_BREAK, '') if text else text
+
+def _normalize(line):
+    """A line with case and spacing normalized away"""
+    return ' '.join(line.lower().split())
+
+def _running_keys(line, page):
+    """
+    Keys of a line's numbers relative to its page: (hash of the line with
+    digits -> '#', position of the number, number - page index). A page
+    counter gives the same key on every page.
+    """
+    numbers = _DIGITS.findall(line)
+    if not numbers:
+        return set()
+    pattern = hash(_DIGITS.sub('#', line))
+    return {(pattern, field, int(number) - page) for field, number in enumerate(numbers)}
+
+def _zone(lines):
+    """Indexes of the first and last ZONE_LINES non-empty lines"""
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    return set(filled[:ZONE_LINES] + filled[-ZONE_LINES:])
+
+def strip_boilerplate(text):
+    """
+    Remove running headers, footers and page numbers.
+
+    Returns:
+        tuple: (text, report) where report is {"applied", "pages",
+        "lines_removed", "chars_removed", "chars_before", "chars_after",
+        "samples"}
+    """
+    report = {
+        "applied": False,
+        "pages": text.count(PAGE_BREAK) + 1 if text else 0,
+        "lines_removed": 0,
+        "chars_removed": 0,
+        "chars_before": len(text),
+        "chars_after": len(text),
+        "samples": [],
+    }
+    if PAGE_BREAK not in text:
+        return text, report
+
+    pages = [page.split('\n') for page in text.split(PAGE_BREAK)]
+    zones = [_zone(lines) for lines in pages]
+
+    # Line-frequency indexes, counting pages: exact normalized lines, and
+    # numbers relative to the page index
+    frequency = Counter()
+    running = Counter()
+    for page, (lines, zone) in enumerate(zip(pages, zones)):
+        normalized = {_normalize(lines[i]) for i in zone}
+        frequency.update(normalized)
+        running.update(set().union(*(_running_keys(line, page) for line in normalized)))
+    threshold = max(MIN_REPEAT_PAGES, math.ceil(MIN_PAGE_SHARE * len(pages)))
+
+    removed_lines = 0
+    samples = {}  # one example line per distinct pattern
+    for page, (lines, zone) in enumerate(zip(pages, zones)):
+        for i in sorted(zone):
+            line = lines[i]
+            key = _normalize(line)
+            if (frequency[key] >= threshold
+                    or any(running[k] >= threshold for k in _running_keys(key, page))
+                    or _PAGE_NUMBER_LINE.fullmatch(line)):
+                if len(samples) < 5:
+                    samples.setdefault(_DIGITS.sub('#', key), line.strip())
+                lines[i] = None
+                removed_lines += 1
+
+    cleaned = PAGE_BREAK.join('\n'.join(line for line in lines if line is not None) for lines in pages)
+    report.update({
+        "applied": True,
+        "lines_removed": removed_lines,
+        "chars_removed": len(text) - len(cleaned),
+        "chars_after": len(cleaned),
+        "samples": list(samples.values()),
+    })
+    return cleaned, report
@@ -0,0 +1,379 @@
+"""
+Bulk ingestion: many documents, or zip archives of them, in one request.
+
+The request streams each file (each archive member, decompressed) into the
+upload folder in COPY_CHUNK_BYTES pieces, charging its bytes against the
+request's byte budget, and answers right away with a batch ID and one
+document ID per file. Extraction then runs in a process pool, outside the
+web workers' GIL. Each pool task extracts the text, writes it and its
+index to the document store, computes statistics and detects the
+languages; only those small results come back.
+
+Settings:
+
+- BULK_MAX_BYTES: byte budget per request (stored bytes, after unzipping)
+- BULK_MAX_FILES: documents per request
+- BULK_EXTRACT_PROCESSES: pool processes per worker (0 extracts in a
+  thread of the worker instead, e.g. where memory is tight)
+- BULK_MAX_CONCURRENT: files of one batch extracting at once. The rest
+  wait for a slot, so a large batch cannot occupy the whole pool while
+  other uploads queue behind it.
+
+Progress is published per document ("doc:<file_id>") and per batch
+("job:<batch_id>", ending with 'done'). The batch's state lives in the
+shared-state backend, so any worker can report it.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.utils import secure_filename
+
+from services.logging_setup import configure_logging
+from services.progress_events import document_channel, job_channel
+from services.time_estimator import page_count
+
+logger = logging.getLogger(__name__)
+
+BULK_MAX_BYTES = int(os.environ.get('BULK_MAX_BYTES', 64 * 1024 * 1024))
+BULK_MAX_FILES = int(os.environ.get('BULK_MAX_FILES', 50))
+BULK_EXTRACT_PROCESSES = int(os.environ.get('BULK_EXTRACT_PROCESSES', min(2, os.cpu_count() or 1)))
+BULK_MAX_CONCURRENT = max(1, int(os.environ.get('BULK_MAX_CONCURRENT', 2)))
+# Batch states are dropped by maintenance once this old
+BATCH_TTL_SECONDS = int(os.environ.get('BULK_BATCH_TTL', 24 * 3600))
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+ARCHIVE_EXTENSIONS = ('.zip',)
+COPY_CHUNK_BYTES = 1024 * 1024
+
+# Pool processes start from a small server process with these modules
+# loaded, instead of forking a threaded web worker
+_POOL_PRELOAD = ['services.text_processing', 'services.document_store', 'services.language_detection']
+
+class IngestLimitExceeded(Exception):
+    """The request went over its byte budget or file count"""
+
+def _extract_document(key, file_path, strip=False):
+    """
+    Pool task: extract, store and profile one upload.
+
+    Returns:
+        dict: seconds, characters, pages, statistics, language_profile and
+            boilerplate (of the stripped variant, with strip); or seconds
+            and error if no text could be extracted
+    """
+    from services.document_store import get_document_store
+    from services.language_detection import detect_document_languages
+    from services.text_processing import extract_text
+
+    started = time.time()
+    text = extract_text(file_path)
+    seconds = time.time() - started
+    if not text or not text.strip() or text.startswith('Error'):
+        return {"seconds": seconds, "error": text if text and text.startswith('Error') else "No readable text found"}
+    store = get_document_store()
+    stored = store.put(key, text, file_path)
+    processed = store.get_or_extract(key, file_path, strip=True) if strip else stored
+    file_type = key.rsplit('.', 1)[-1].lower()
+    return {
+        "seconds": seconds,
+        "characters": len(text),
+        "pages": page_count(text, file_type),
+        "statistics": stored.statistics(),
+        "processed_characters": processed.statistics()["characters"],
+        "boilerplate": processed.boilerplate,
+        "language_profile": detect_document_languages(text),
+    }
+
+class BulkUpload:
+    """The documents of one bulk request, saved into the upload folder within a byte budget"""
+
+    def __init__(self, directory, max_bytes=BULK_MAX_BYTES, max_files=BULK_MAX_FILES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.remaining = max_bytes
+        self.documents = []  # {"fileId", "path", "bytes"}, in upload order
+        self.skipped = []  # {"name", "error"}
+
+    @property
+    def total_bytes(self):
+        return self.max_bytes - self.remaining
+
+    def add(self, name, stream):
+        """Save one uploaded file; zip archives are unpacked into their documents"""
+        if os.path.splitext(name)[1].lower() in ARCHIVE_EXTENSIONS:
+            self.add_archive(name, stream)
+        else:
+            self._add(name, stream)
+
+    def add_archive(self, name, stream):
+        try:
+            archive = zipfile.ZipFile(stream)
+        except zipfile.BadZipFile:
+            self.skipped.append({"name": name, "error": "Not a valid zip archive"})
+            return
+        with archive:
+            for member in archive.infolist():
+                member_name = os.path.basename(member.filename)
+                if member.is_dir() or not member_name or member_name.startswith('.') \
+                        or member.filename.startswith('__MACOSX/'):
+                    continue
+                try:
+                    with archive.open(member) as source:
+                        self._add(member_name, source)
+                except (zipfile.BadZipFile, RuntimeError, NotImplementedError, EOFError) as e:
+                    # Corrupt, encrypted or unsupported compression
+                    self.skipped.append({"name": f"{name}/{member.filename}", "error": str(e)})
+
+    def _add(self, name, source):
+        filename = secure_filename(os.path.basename(name))
+        if os.path.splitext(filename)[1].lower() not in SUPPORTED_EXTENSIONS:
+            self.skipped.append({"name": name, "error": "Unsupported file format. Use PDF, DOCX or TXT files."})
+            return
+        if len(self.documents) >= self.max_files:
+            raise IngestLimitExceeded(f"At most {self.max_files} documents per request")
+        filename = self._unique(filename)
+        path = os.path.join(self.directory, filename)
+        size = self._copy(source, path)
+        self.documents.append({"fileId": filename, "path": path, "bytes": size})
+
+    def _unique(self, filename):
+        """filename, or filename-2, -3... if an earlier file in this request took it"""
+        taken = {document["fileId"] for document in self.documents}
+        stem, ext = os.path.splitext(filename)
+        candidate, n = filename, 1
+        while candidate in taken:
+            n += 1
+            candidate = f"{stem}-{n}{ext}"
+        return candidate
+
+    def _copy(self, source, path):
+        """Stream source to path, charging the budget; the file appears only when complete"""
+        partial = path + '.part'
+        size = 0
+        try:
+            with open(partial, 'wb') as target:
+                while True:
+                    chunk = source.read(COPY_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.remaining:
+                        raise IngestLimitExceeded(f"Upload exceeds the {self.max_bytes} byte budget")
+                    target.write(chunk)
+            os.replace(partial, path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        self.remaining -= size
+        return size
+
+    def discard(self):
+        """Delete the files saved so far (when the request is rejected)"""
+        for document in self.documents:
+            try:
+                os.remove(document["path"])
+            except FileNotFoundError:
+                pass
+        self.documents = []
+
+class _Batch:
+    def __init__(self, batch_id, documents, strip, on_extracted):
+        self.id = batch_id
+        self.pending = deque(documents)
+        self.strip = strip
+        self.on_extracted = on_extracted
+        self.running = 0
+        self.remaining = len(documents)
+
+class BulkIngestor:
+    """Runs the extraction of bulk batches on a process pool and records their progress"""
+
+    namespace = 'ingest'
+
+    def __init__(self, backend, hub, tracking_log, estimator, processes=BULK_EXTRACT_PROCESSES,
+                 max_concurrent=BULK_MAX_CONCURRENT):
+        self.backend = backend
+        self.hub = hub
+        self.tracking_log = tracking_log
+        self.estimator = estimator
+        self.processes = processes
+        self.max_concurrent = max(1, max_concurrent)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._active = 0
+
+    def _pool(self):
+        """This process's executor, created on first use (after any fork)"""
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                if self.processes > 0:
+                    methods = multiprocessing.get_all_start_methods()
+                    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                    if 'forkserver' in methods:
+                        context.set_forkserver_preload(_POOL_PRELOAD)
+                    self._executor = ProcessPoolExecutor(self.processes, mp_context=context,
+                                                         initializer=configure_logging)
+                else:
+                    self._executor = ThreadPoolExecutor(1, thread_name_prefix='bulk-extract')
+            return self._executor
+
+    def _reset_pool(self, executor):
+        # A crashed pool process breaks the whole pool; the next task gets a new one
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def start(self, documents, strip=False, on_extracted=None):
+        """
+        Queue a batch of saved uploads for extraction.
+
+        Args:
+            documents (list): {"fileId", "path", "bytes"} dicts from BulkUpload
+            strip (bool): Also store the boilerplate-stripped variant
+            on_extracted (callable): on_extracted(document, result) -> dict of
+                extra fields for the document's state, called for each
+                extracted document on the pool's result thread
+
+        Returns:
+            str: The batch ID (its progress channel is job_channel(batch_id))
+        """
+        batch_id = uuid.uuid4().hex[:16]
+        now = time.time()
+        self.backend.set(self.namespace, batch_id, {
+            "batchId": batch_id,
+            "status": 'processing',
+            "created": now,
+            "updated": now,
+            "total": len(documents),
+            "completed": 0,
+            "failed": 0,
+            "documents": {document["fileId"]: {"fileId": document["fileId"], "bytes": document["bytes"],
+                                               "status": 'queued'} for document in documents},
+        })
+        batch = _Batch(batch_id, documents, strip, on_extracted)
+        with self._lock:
+            self._active += 1
+        logger.info("Bulk batch %s: %d document(s) queued", batch_id, len(documents))
+        self._pump(batch)
+        return batch_id
+
+    def _pump(self, batch):
+        """Submit the batch's next documents while it has fewer than max_concurrent running"""
+        while True:
+            with self._lock:
+                if batch.running >= self.max_concurrent or not batch.pending:
+                    return
+                document = batch.pending.popleft()
+                batch.running += 1
+            self.hub.publish([document_channel(document["fileId"]), job_channel(batch.id)], 'extraction',
+                             status='started', fileId=document["fileId"])
+            executor = self._pool()
+            try:
+                future = executor.submit(_extract_document, document["fileId"], document["path"], batch.strip)
+            except (BrokenProcessPool, RuntimeError) as e:
+                self._reset_pool(executor)
+                future = Future()
+                future.set_exception(e)
+            future.add_done_callback(
+                lambda f, document=document, executor=executor: self._finished(batch, document, executor, f))
+
+    def _finished(self, batch, document, executor, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error("Bulk extraction of %s failed: %s", document["fileId"], e)
+            if isinstance(e, BrokenProcessPool):
+                self._reset_pool(executor)
+            result = {"seconds": None, "error": f"Extraction failed: {e}"}
+        try:
+            self._record(batch, document, result)
+        except Exception:
+            logger.exception("Error recording bulk extraction of %s", document["fileId"])
+        with self._lock:
+            batch.running -= 1
+            batch.remaining -= 1
+            finished = batch.remaining == 0
+            if finished:
+                self._active -= 1
+        if finished:
+            self._finish_batch(batch)
+        else:
+            self._pump(batch)
+
+    def _record(self, batch, document, result):
+        """Fold one extraction into the tracking log, time model, progress and batch state"""
+        file_id = document["fileId"]
+        failed = "error" in result
+        seconds = result.get("seconds")
+        self.tracking_log.record(file_id, document["path"], document["bytes"], None if failed else seconds)
+        entry = {"fileId": file_id, "bytes": document["bytes"],
+                 "seconds": round(seconds, 3) if seconds is not None else None}
+        if failed:
+            entry.update(status='failed', error=result["error"])
+        else:
+            self.estimator.observe('extract', file_id.rsplit('.', 1)[-1].lower(), result["pages"], seconds)
+            entry.update(status='complete', characters=result["characters"], pages=result["pages"],
+                         statistics=result["statistics"], language_profile=result["language_profile"],
+                         boilerplate=result["boilerplate"])
+            if batch.on_extracted is not None:
+                try:
+                    entry.update(batch.on_extracted(document, result) or {})
+                except Exception:
+                    logger.exception("Error in bulk extraction callback for %s", file_id)
+
+        def update(state):
+            if state is None:
+                return None  # pruned meanwhile
+            state["documents"][file_id] = entry
+            state["failed" if failed else "completed"] += 1
+            state["updated"] = time.time()
+            return state
+
+        self.backend.update(self.namespace, batch.id, update)
+        event = {key: entry[key] for key in ('status', 'error', 'characters', 'pages', 'seconds') if key in entry}
+        self.hub.publish([document_channel(file_id), job_channel(batch.id)], 'extraction', fileId=file_id, **event)
+
+    def _finish_batch(self, batch):
+        def update(state):
+            if state is None:
+                return None
+            state["status"] = 'complete'
+            state["updated"] = time.time()
+            return state
+
+        state = self.backend.update(self.namespace, batch.id, update) or {}
+        logger.info("Bulk batch %s finished: %s extracted, %s failed", batch.id,
+                    state.get("completed"), state.get("failed"))
+        self.hub.publish([job_channel(batch.id)], 'done', completed=state.get("completed"),
+                         failed=state.get("failed"))
+
+    def get(self, batch_id):
+        """State of a batch (any worker's), or None"""
+        return self.backend.get(self.namespace, batch_id)
+
+    def stats(self):
+        with self._lock:
+            return {"active_batches": self._active, "processes": self.processes,
+                    "max_concurrent_per_batch": self.max_concurrent}
+
+    def prune(self, max_age=BATCH_TTL_SECONDS):
+        """Drop batch states not updated for max_age seconds"""
+        cutoff = time.time() - max_age
+        removed = 0
+        for batch_id, state in self.backend.items(self.namespace):
+            if state.get("updated", 0) < cutoff:
+                self.backend.delete(self.namespace, batch_id)
+                removed += 1
+        return removed
@@ -0,0 +1,184 @@
+"""
+Request deadlines and cooperative cancellation.
+
+A CancelToken travels with one long-running operation (a summary, a
+synthesis) into its loops, which call check() between units of work:
+chunks for summaries, segments and audio chunks for TTS. A token trips
+when:
+
+- its deadline passes (reason "deadline"),
+- cancel() is called, e.g. from the cancel endpoint or when speculative
+  work for a document is dropped (reason "cancelled"),
+- one of its watchers reports a reason, e.g. the client's socket has
+  closed (reason "disconnected") or another worker recorded a cancel.
+
+check() raises OperationCancelled. Loops that can return something useful
+attach what they finished so far as the exception's partial result.
+
+Since the token already reaches every such loop, it also carries progress
+listeners: report() passes (stage, data) events to them, e.g. for the
+progress event streams.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Default request deadline. Kept under the gunicorn worker timeout (120s)
+# so a slow request answers (possibly partially) before its worker is killed
+REQUEST_DEADLINE_SECONDS = float(os.environ.get('REQUEST_DEADLINE_SECONDS', 110))
+
+# Minimum seconds between watcher polls (socket peeks, shared-state reads)
+WATCH_INTERVAL_SECONDS = 0.5
+
+class OperationCancelled(Exception):
+    """Raised by CancelToken.check(); partial holds any finished results"""
+
+    def __init__(self, reason, partial=None):
+        super().__init__(f"Operation stopped: {reason}")
+        self.reason = reason
+        self.partial = partial
+
+class CancelToken:
+    """Deadline plus cancellation flag shared by the pieces of one operation"""
+
+    def __init__(self, deadline_seconds=None, request_id=None):
+        self.request_id = request_id
+        self.deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+        self.reason = None
+        self._watchers = []
+        self._callbacks = []
+        self._progress_listeners = []
+        self._last_watch = 0.0
+        self._lock = threading.Lock()
+
+    def add_watcher(self, watcher):
+        """watcher() -> reason string or None, polled at most every WATCH_INTERVAL_SECONDS"""
+        self._watchers.append(watcher)
+
+    def add_callback(self, callback):
+        """Call callback(reason) once when the token trips (now, if it already has)"""
+        with self._lock:
+            if self.reason is None:
+                self._callbacks.append(callback)
+                return
+        callback(self.reason)
+
+    def add_progress_listener(self, listener):
+        """Call listener(stage, data) for every progress report"""
+        self._progress_listeners.append(listener)
+
+    def report(self, stage, **data):
+        for listener in self._progress_listeners:
+            try:
+                listener(stage, data)
+            except Exception as e:
+                logger.error("Error in progress listener: %s", e)
+
+    def cancel(self, reason='cancelled'):
+        with self._lock:
+            if self.reason is not None:
+                return
+            self.reason = reason
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(reason)
+            except Exception as e:
+                logger.error("Error in cancellation callback: %s", e)
+
+    def remaining(self):
+        """Seconds until the deadline, or None without one"""
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def cancelled(self):
+        """True once the token has tripped (polls deadline and watchers)"""
+        if self.reason is not None:
+            return True
+        now = time.monotonic()
+        if self.deadline is not None and now >= self.deadline:
+            self.cancel('deadline')
+            return True
+        if self._watchers and now - self._last_watch >= WATCH_INTERVAL_SECONDS:
+            self._last_watch = now
+            for watcher in self._watchers:
+                try:
+                    reason = watcher()
+                except Exception:
+                    reason = None
+                if reason:
+                    self.cancel(reason)
+                    return True
+        return False
+
+    def check(self, partial=None):
+        """Raise OperationCancelled (carrying partial) if the token has tripped"""
+        if self.cancelled:
+            raise OperationCancelled(self.reason, partial)
+
+def check(cancel_token, partial=None):
+    """CancelToken.check() that accepts None for uncancellable callers"""
+    if cancel_token is not None:
+        cancel_token.check(partial)
+
+def report(cancel_token, stage, **data):
+    """CancelToken.report() that accepts None for callers without a token"""
+    if cancel_token is not None:
+        cancel_token.report(stage, **data)
+
+def wait_future(future, cancel_token, poll=0.25):
+    """
+    Wait for a concurrent.futures.Future, giving up when the token trips.
+
+    A future that has not started yet is cancelled; the caller's
+    OperationCancelled is raised either way.
+    """
+    if cancel_token is None:
+        return future.result()
+    while True:
+        if future.done():
+            return future.result()
+        if cancel_token.cancelled:
+            future.cancel()
+            cancel_token.check()
+        try:
+            return future.result(timeout=poll)
+        except FutureTimeoutError:
+            pass
+
+def socket_disconnected(sock):
+    """True if the peer has closed sock (non-blocking peek; data waiting means alive)"""
+    try:
+        return sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b''
+    except (BlockingIOError, InterruptedError):
+        return False
+    except OSError:
+        return True
+
+_tokens = {}  # request_id -> CancelToken, for this process
+_tokens_lock = threading.Lock()
+
+def register_token(token):
+    if token.request_id:
+        with _tokens_lock:
+            _tokens[token.request_id] = token
+
+def unregister_token(token):
+    if token.request_id:
+        with _tokens_lock:
+            if _tokens.get(token.request_id) is token:
+                del _tokens[token.request_id]
+
+def cancel_request(request_id, reason='cancelled'):
+    """Trip the token registered for request_id in this process; True if found"""
+    with _tokens_lock:
+        token = _tokens.get(request_id)
+    if token is None:
+        return False
+    token.cancel(reason)
+    return True
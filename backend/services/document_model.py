@@ -0,0 +1,183 @@
+"""
+Parsed document model shared by stats, summarization, TTS and text windows.
+
+A ParsedDocument is built once per document text (and cached by hash). It
+scans the text a single time and stores paragraph and sentence boundaries
+as compact array('I') offset tables, so consumers never re-split the text
+themselves. Sentence ends recognise . ! ? and the Devanagari danda (। ॥).
+"""
+import hashlib
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+# Non-empty lines are paragraphs (same definition get_text_statistics used)
+_PARAGRAPH_RE = re.compile(r'[^\n]*\S[^\n]*')
+
+# A sentence runs to a terminator followed by whitespace/end, or to end of line
+_SENTENCE_RE = re.compile(r'\S.*?(?:[.!?।॥]+(?=\s|\Z)|(?=\n)|\Z)')
+
+PARSED_CACHE_SIZE = 32
+
+class ParsedDocument:
+    """Text plus paragraph/sentence offset tables"""
+
+    __slots__ = ('text', 'word_count', 'paragraph_starts', 'paragraph_ends',
+                 'sentence_starts', 'sentence_ends', 'sentence_paragraph')
+
+    def __init__(self, text):
+        self.text = text
+        self.word_count = len(text.split())
+        self.paragraph_starts = array('I')
+        self.paragraph_ends = array('I')
+        self.sentence_starts = array('I')
+        self.sentence_ends = array('I')
+        self.sentence_paragraph = array('I')
+
+        for p_index, paragraph in enumerate(_PARAGRAPH_RE.finditer(text)):
+            start, end = paragraph.span()
+            self.paragraph_starts.append(start)
+            self.paragraph_ends.append(end)
+            for sentence in _SENTENCE_RE.finditer(text, start, end):
+                self.sentence_starts.append(sentence.start())
+                self.sentence_ends.append(sentence.end())
+                self.sentence_paragraph.append(p_index)
+
+    @property
+    def paragraph_count(self):
+        return len(self.paragraph_starts)
+
+    @property
+    def sentence_count(self):
+        return len(self.sentence_starts)
+
+    def paragraph(self, index):
+        return self.text[self.paragraph_starts[index]:self.paragraph_ends[index]]
+
+    def sentence(self, index):
+        return self.text[self.sentence_starts[index]:self.sentence_ends[index]].strip()
+
+    def sentences(self, start=0, stop=None):
+        """Iterate sentence strings in [start, stop)"""
+        stop = self.sentence_count if stop is None else min(stop, self.sentence_count)
+        for index in range(start, stop):
+            yield self.sentence(index)
+
+    def sentences_before(self, char_limit):
+        """Number of sentences that start before char_limit"""
+        return bisect_left(self.sentence_starts, char_limit)
+
+    def window(self, unit='sentence', start=0, count=20):
+        """
+        Return a slice of the document by sentence or paragraph index.
+
+        Returns:
+            dict: {"text", "start", "count", "total", "char_start", "char_end"}
+        """
+        if unit == 'paragraph':
+            starts, ends = self.paragraph_starts, self.paragraph_ends
+        else:
+            starts, ends = self.sentence_starts, self.sentence_ends
+        total = len(starts)
+        start = max(0, min(start, total))
+        stop = max(start, min(start + count, total))
+        if start == stop:
+            return {"text": "", "start": start, "count": 0, "total": total, "char_start": None, "char_end": None}
+        char_start, char_end = starts[start], ends[stop - 1]
+        return {
+            "text": self.text[char_start:char_end],
+            "start": start,
+            "count": stop - start,
+            "total": total,
+            "char_start": char_start,
+            "char_end": char_end,
+        }
+
+    def statistics(self):
+        """Same fields as text_processing.get_text_statistics"""
+        words = self.word_count
+        return {
+            "words": words,
+            "characters": len(self.text),
+            "sentences": self.sentence_count,
+            "paragraphs": self.paragraph_count,
+            "reading_time_minutes": max(1, words // 200),
+            "complexity": "Simple" if words < 500 else "Medium" if words < 2000 else "Complex"
+        }
+
+    def chunk_by_tokens(self, tokenizer, max_tokens=900, sentence_indexes=None, char_limit=None):
+        """
+        Group sentences into chunks of at most max_tokens model tokens.
+
+        Each sentence is encoded once and token counts are summed, instead
+        of re-encoding the growing chunk for every sentence. Whitespace in
+        each chunk is collapsed. A single sentence longer than max_tokens
+        becomes its own chunk.
+
+        Args:
+            sentence_indexes: Optional iterable of sentence indexes to use
+            char_limit: Optional character offset to clip the text at
+        """
+        overhead = len(tokenizer.encode(""))  # special tokens added per call
+        if sentence_indexes is None:
+            sentence_indexes = range(self.sentence_count)
+
+        chunks = []
+        current = []
+        current_tokens = overhead
+        for index in sentence_indexes:
+            start, end = self.sentence_starts[index], self.sentence_ends[index]
+            if char_limit is not None:
+                if start >= char_limit:
+                    break
+                end = min(end, char_limit)
+            sentence = " ".join(self.text[start:end].split())
+            if not sentence:
+                continue
+            tokens = max(0, len(tokenizer.encode(sentence)) - overhead)
+            if current and current_tokens + tokens > max_tokens:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], overhead
+            current.append(sentence)
+            current_tokens += tokens
+        if current:
+            chunks.append(" ".join(current))
+        return chunks
+
+    def tts_segments(self, max_chars=4000):
+        """Split the text at sentence boundaries into segments of <= max_chars"""
+        if len(self.text) <= max_chars:
+            return [self.text] if self.text.strip() else []
+        segments = []
+        seg_start = None
+        seg_end = None
+        for start, end in zip(self.sentence_starts, self.sentence_ends):
+            if seg_start is not None and end - seg_start > max_chars:
+                segments.append(self.text[seg_start:seg_end])
+                seg_start = None
+            if seg_start is None:
+                seg_start = start
+            seg_end = end
+        if seg_start is not None:
+            segments.append(self.text[seg_start:seg_end])
+        return segments
+
+_parsed_cache = OrderedDict()
+_parsed_lock = threading.Lock()
+
+def get_parsed_document(text):
+    """Return the cached ParsedDocument for text, building it if needed"""
+    key = hashlib.sha1(text.encode('utf-8', errors='replace')).hexdigest()
+    with _parsed_lock:
+        parsed = _parsed_cache.get(key)
+        if parsed is not None:
+            _parsed_cache.move_to_end(key)
+            return parsed
+    parsed = ParsedDocument(text)
+    with _parsed_lock:
+        _parsed_cache[key] = parsed
+        while len(_parsed_cache) > PARSED_CACHE_SIZE:
+            _parsed_cache.popitem(last=False)
+    return parsed
@@ -0,0 +1,317 @@
+"""
+On-disk store for extracted document text.
+
+Each document's text is extracted once and written as UTF-8 (<key>.txt),
+together with a byte-offset index of its paragraphs and sentences
+(<key>.idx) and a small metadata file (<key>.json: source size/mtime,
+sha1, statistics). Reads go through mmap, so serving a window, returning
+statistics or taking the head of a document for summarization only touch
+the pages they need, and the OS page cache is shared by all workers.
+
+Entries are invalidated when the source upload changes size or mtime.
+A boilerplate-stripped variant of a document is stored alongside it
+(key + CLEAN_SUFFIX) with the stripping report in its metadata.
+"""
+import codecs
+import hashlib
+import json
+import logging
+import mmap
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from services.document_model import get_parsed_document
+from services.boilerplate import strip_boilerplate
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+DOCUMENT_STORE_DIR = os.environ.get('DOCUMENT_STORE_DIR', os.path.join(BASE_DIR, 'document_store'))
+
+# Documents kept open (mapped) per process
+OPEN_DOCUMENT_LIMIT = int(os.environ.get('DOCUMENT_STORE_OPEN_LIMIT', 64))
+
+# Key suffix of the boilerplate-stripped variant of a document
+CLEAN_SUFFIX = '.clean'
+
+# Bytes decoded per step when reading the head of a document
+HEAD_READ_BYTES = 64 * 1024
+
+def _source_signature(source_path):
+    if not source_path or not os.path.exists(source_path):
+        return None
+    stat = os.stat(source_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def _byte_offsets(text, *offset_tables):
+    """Convert character offset tables to UTF-8 byte offsets in one pass"""
+    if text.isascii():
+        return [array('Q', table) for table in offset_tables]
+    positions = sorted(set().union(*offset_tables))
+    mapping = {}
+    byte_pos = char_pos = 0
+    for pos in positions:
+        byte_pos += len(text[char_pos:pos].encode('utf-8', errors='replace'))
+        char_pos = pos
+        mapping[pos] = byte_pos
+    return [array('Q', (mapping[pos] for pos in table)) for table in offset_tables]
+
+class StoredDocument:
+    """
+    Read-only, memory-mapped view of one stored document.
+
+    The map is never closed explicitly: a request may still be reading an
+    evicted or replaced document, so it is released when the last
+    reference goes away.
+    """
+
+    def __init__(self, key, meta, text_path, index_path):
+        self.key = key
+        self.meta = meta
+        self._file = open(text_path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap cannot map an empty file
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+        index = array('Q')
+        with open(index_path, 'rb') as f:
+            index.fromfile(f, 2 * meta["paragraph_count"] + 2 * meta["sentence_count"])
+        p, s = meta["paragraph_count"], meta["sentence_count"]
+        self.paragraph_starts = index[0:p]
+        self.paragraph_ends = index[p:2 * p]
+        self.sentence_starts = index[2 * p:2 * p + s]
+        self.sentence_ends = index[2 * p + s:]
+
+    @property
+    def sha1(self):
+        """Same value as speculative.text_fingerprint() of the text"""
+        return self.meta["sha1"]
+
+    @property
+    def byte_size(self):
+        return len(self._map)
+
+    def statistics(self):
+        return dict(self.meta["statistics"])
+
+    @property
+    def boilerplate(self):
+        """Stripping report for a clean variant, else None"""
+        return self.meta.get("boilerplate")
+
+    def read(self, byte_start=0, byte_end=None):
+        """Decode the byte range [byte_start, byte_end)"""
+        return self._map[byte_start:byte_end].decode('utf-8', errors='replace')
+
+    def text(self):
+        """The whole extracted text"""
+        return self.read()
+
+    def paragraph(self, index):
+        return self.read(self.paragraph_starts[index], self.paragraph_ends[index])
+
+    def sentence(self, index):
+        return self.read(self.sentence_starts[index], self.sentence_ends[index]).strip()
+
+    def head(self, char_limit):
+        """The first char_limit characters, decoding only as many pages as needed"""
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        parts = []
+        chars = 0
+        for start in range(0, len(self._map), HEAD_READ_BYTES):
+            part = decoder.decode(self._map[start:start + HEAD_READ_BYTES])
+            parts.append(part)
+            chars += len(part)
+            if chars >= char_limit:
+                break
+        else:
+            parts.append(decoder.decode(b'', final=True))
+        return ''.join(parts)[:char_limit]
+
+    def window(self, unit='sentence', start=0, count=20):
+        """
+        Return a slice of the document by sentence or paragraph index.
+
+        Returns:
+            dict: {"text", "start", "count", "total", "byte_start", "byte_end"}
+        """
+        if unit == 'paragraph':
+            starts, ends = self.paragraph_starts, self.paragraph_ends
+        else:
+            starts, ends = self.sentence_starts, self.sentence_ends
+        total = len(starts)
+        start = max(0, min(start, total))
+        stop = max(start, min(start + count, total))
+        if start == stop:
+            return {"text": "", "start": start, "count": 0, "total": total, "byte_start": None, "byte_end": None}
+        byte_start, byte_end = starts[start], ends[stop - 1]
+        return {
+            "text": self.read(byte_start, byte_end),
+            "start": start,
+            "count": stop - start,
+            "total": total,
+            "byte_start": byte_start,
+            "byte_end": byte_end,
+        }
+
+class DocumentStore:
+    """Directory of extracted texts plus their offset indexes"""
+
+    def __init__(self, root=DOCUMENT_STORE_DIR, open_limit=OPEN_DOCUMENT_LIMIT):
+        self.root = root
+        self.open_limit = max(1, open_limit)
+        self._open = OrderedDict()  # key -> StoredDocument
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _paths(self, key):
+        base = os.path.join(self.root, key)
+        return base + '.txt', base + '.idx', base + '.json'
+
+    def put(self, key, text, source_path=None, extra_meta=None):
+        """Write text and its index for key, replacing any previous version"""
+        text_path, index_path, meta_path = self._paths(key)
+        parsed = get_parsed_document(text)
+        data = text.encode('utf-8', errors='replace')
+        p_starts, p_ends, s_starts, s_ends = _byte_offsets(
+            text, parsed.paragraph_starts, parsed.paragraph_ends,
+            parsed.sentence_starts, parsed.sentence_ends)
+        meta = {
+            "source_path": source_path,
+            "source": _source_signature(source_path),
+            "sha1": hashlib.sha1(data).hexdigest(),
+            "byte_size": len(data),
+            "paragraph_count": parsed.paragraph_count,
+            "sentence_count": parsed.sentence_count,
+            "statistics": parsed.statistics(),
+        }
+        meta.update(extra_meta or {})
+
+        # Unique temp names so concurrent writers never share a file. The old
+        # metadata is dropped first and the new one goes last, so a reader
+        # never pairs a text with the wrong index
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.remove(meta_path)
+        except FileNotFoundError:
+            pass
+        with open(text_path + suffix, 'wb') as f:
+            f.write(data)
+        with open(index_path + suffix, 'wb') as f:
+            (p_starts + p_ends + s_starts + s_ends).tofile(f)
+        with open(meta_path + suffix, 'w') as f:
+            json.dump(meta, f)
+        os.replace(text_path + suffix, text_path)
+        os.replace(index_path + suffix, index_path)
+        os.replace(meta_path + suffix, meta_path)
+
+        self._forget(key)
+        return self.open(key, source_path)
+
+    def open(self, key, source_path=None):
+        """Return the StoredDocument for key, or None if missing or stale"""
+        text_path, index_path, meta_path = self._paths(key)
+        signature = _source_signature(source_path) if source_path else None
+        with self._lock:
+            document = self._open.get(key)
+            if document is not None:
+                if signature is None or document.meta["source"] == signature:
+                    self._open.move_to_end(key)
+                    return document
+                del self._open[key]
+
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if signature is not None and meta.get("source") != signature:
+            return None
+        try:
+            document = StoredDocument(key, meta, text_path, index_path)
+        except (OSError, ValueError, EOFError) as e:
+            logger.error("Error opening stored document %s: %s", key, e)
+            return None
+
+        with self._lock:
+            self._open[key] = document
+            self._open.move_to_end(key)
+            while len(self._open) > self.open_limit:
+                self._open.popitem(last=False)
+        return document
+
+    def get_or_extract(self, key, source_path, strip=False):
+        """
+        Open the stored text for an upload, extracting it on first use.
+
+        With strip, return the boilerplate-stripped variant (built from the
+        stored text on first use; see services.boilerplate).
+        """
+        document = self.open(key, source_path)
+        if document is None:
+            from services.text_processing import extract_text
+            document = self.put(key, extract_text(source_path) or "", source_path)
+        if not strip:
+            return document
+
+        clean = self.open(key + CLEAN_SUFFIX, source_path)
+        if clean is None:
+            text, report = strip_boilerplate(document.text())
+            clean = self.put(key + CLEAN_SUFFIX, text, source_path, extra_meta={"boilerplate": report})
+        return clean
+
+    def _forget(self, key):
+        with self._lock:
+            self._open.pop(key, None)
+
+    def remove(self, key):
+        """Delete the stored text, index and metadata for key (and its clean variant)"""
+        for variant in (key, key + CLEAN_SUFFIX):
+            self._forget(variant)
+            for path in self._paths(variant):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def prune(self, max_age_seconds):
+        """Remove entries whose upload is gone or that are older than max_age_seconds"""
+        removed = 0
+        cutoff = time.time() - max_age_seconds
+        for filename in os.listdir(self.root):
+            path = os.path.join(self.root, filename)
+            if not os.path.exists(path):
+                continue  # removed with its raw document earlier in the loop
+            if filename.endswith('.tmp'):
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                continue
+            if not filename.endswith('.json'):
+                continue
+            key = filename[:-len('.json')]
+            try:
+                with open(path) as f:
+                    source_path = json.load(f).get("source_path")
+            except (OSError, ValueError):
+                source_path = None
+            if os.path.getmtime(path) < cutoff or not source_path or not os.path.exists(source_path):
+                self.remove(key)
+                removed += 1
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {"root": self.root, "open_documents": len(self._open)}
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_document_store():
+    """Return the process-wide document store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DocumentStore()
+        return _store
@@ -0,0 +1,175 @@
+"""
+Extractive summarization with NumPy: TF-IDF sentence vectors ranked by
+LexRank-style centrality.
+
+Runs in milliseconds per document, needs no model and reads the whole
+document, so it serves both as a fast summary mode and as a pre-filter
+that picks the most salient sentences of a long document for the
+abstractive models (which only see MAX_CHAR_LIMIT characters).
+
+The sentence-term matrix is kept as coordinate arrays (row, column,
+weight). Rows are L2-normalized, so sentence similarities are dot
+products, and every matrix-vector product the power iteration needs
+(S v = X (X^T v)) is two np.bincount calls: the n x n similarity matrix
+is never built.
+"""
+import re
+import numpy as np
+
+# Words: Latin letters/digits plus the whole Devanagari block, so Hindi
+# vowel signs stay inside their word
+_WORD_RE = re.compile(r'[\w\u0900-\u097f]+')
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have
+having he her here hers herself him himself his how i if in into is it its itself just me more most
+my myself no nor not now of off on once only or other our ours ourselves out over own same she
+should so some such than that the their theirs them themselves then there these they this those
+through to too under until up very was we were what when where which while who whom why will with
+would you your yours yourself yourselves also may might must shall upon within without however
+के का की है हैं में को से और यह वह था थे थी पर भी ने एक इस उस कि तो ही जो कर हो गया किया लिए तक या
+""".split())
+
+DAMPING = 0.15
+MAX_ITERATIONS = 30
+TOLERANCE = 1e-6
+# Degrees at or below this are treated as 0 (no similar sentences)
+DEGREE_EPSILON = 1e-9
+
+# A candidate this similar to an already chosen sentence is skipped
+REDUNDANCY_THRESHOLD = 0.7
+
+# Sentences per extractive summary type
+EXTRACTIVE_SENTENCES = {'tldr': 3, 'brief': 7, 'detailed': 15}
+
+def _term_matrix(sentences):
+    """
+    TF-IDF matrix in coordinate form.
+
+    Returns:
+        tuple: (rows, cols, weights, vocabulary_size), rows L2-normalized
+    """
+    vocabulary = {}
+    rows, cols = [], []
+    for index, sentence in enumerate(sentences):
+        for word in _WORD_RE.findall(sentence.lower()):
+            if word in STOPWORDS or len(word) < 2:
+                continue
+            rows.append(index)
+            cols.append(vocabulary.setdefault(word, len(vocabulary)))
+    if not rows:
+        return None
+
+    n, v = len(sentences), len(vocabulary)
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    # Sum repeated (sentence, term) pairs into term frequencies
+    pair, tf = np.unique(rows * v + cols, return_counts=True)
+    rows, cols = pair // v, pair % v
+
+    df = np.bincount(cols, minlength=v)
+    idf = np.log((1 + n) / (1 + df)) + 1.0
+    weights = (1.0 + np.log(tf)) * idf[cols]
+    norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=n))
+    weights /= np.where(norms > 0, norms, 1.0)[rows]
+    return rows, cols, weights, v
+
+def rank_sentences(sentences):
+    """
+    Centrality score per sentence (higher is more central).
+
+    LexRank over cosine similarities without a threshold: a damped random
+    walk on the sentence graph, solved by power iteration. Sentences with
+    no content words score zero.
+    """
+    n = len(sentences)
+    if n == 0:
+        return np.zeros(0)
+    matrix = _term_matrix(sentences)
+    if matrix is None:
+        return np.zeros(n)
+    rows, cols, weights, v = matrix
+
+    def similarity_times(vector):
+        # S v with the self-similarity (1 for each non-empty row) removed
+        projected = np.bincount(cols, weights=weights * vector[rows], minlength=v)
+        product = np.bincount(rows, weights=weights * projected[cols], minlength=n)
+        return product - vector * has_terms
+
+    has_terms = (np.bincount(rows, minlength=n) > 0).astype(float)
+    degree = similarity_times(np.ones(n))
+    # Isolated sentences come out as rounding residue, not exactly 0; they
+    # must not divide by it (that would act as a self-loop)
+    degree = np.where(degree > DEGREE_EPSILON, degree, 1.0)
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(MAX_ITERATIONS):
+        updated = DAMPING / n + (1 - DAMPING) * similarity_times(scores / degree)
+        if np.abs(updated - scores).sum() < TOLERANCE:
+            scores = updated
+            break
+        scores = updated
+    return scores * has_terms
+
+def select_sentences(sentences, max_sentences=None, char_budget=None):
+    """
+    Pick the most central, non-redundant sentences.
+
+    Args:
+        sentences (list): Sentence strings in document order
+        max_sentences (int): Stop after this many sentences
+        char_budget (int): Stop before the chosen sentences exceed this many characters
+
+    Returns:
+        list: Chosen sentence indexes in document order
+    """
+    n = len(sentences)
+    if n == 0:
+        return []
+    matrix = _term_matrix(sentences)
+    if matrix is None:
+        return list(range(min(n, max_sentences or n)))
+    scores = rank_sentences(sentences)
+    rows, cols, weights, v = matrix
+
+    # Each row's entries, looked up only for candidates
+    order = np.argsort(rows, kind='stable')
+    starts = np.searchsorted(rows[order], np.arange(n + 1))
+
+    chosen = []
+    chosen_rows = []
+    used = 0
+    for index in np.argsort(-scores, kind='stable'):
+        if max_sentences is not None and len(chosen) >= max_sentences:
+            break
+        if scores[index] <= 0:
+            break
+        length = len(sentences[index]) + 1
+        if char_budget is not None and used + length > char_budget:
+            continue
+        span = order[starts[index]:starts[index + 1]]
+        row_cols, row_weights = cols[span], weights[span]
+        if chosen_rows and max(float(row_weights @ other[row_cols]) for other in chosen_rows) > REDUNDANCY_THRESHOLD:
+            continue
+        dense = np.zeros(v)
+        dense[row_cols] = row_weights
+        chosen_rows.append(dense)
+        chosen.append(int(index))
+        used += length
+    return sorted(chosen)
+
+def extractive_summary(sentences, summary_type='tldr'):
+    """
+    Summary made of the most central sentences, in document order.
+
+    Args:
+        sentences (list): Sentence strings in document order
+        summary_type (str): 'tldr', 'brief' or 'detailed' (sentence count)
+
+    Returns:
+        str: The chosen sentences joined with spaces
+    """
+    count = EXTRACTIVE_SENTENCES.get(summary_type, EXTRACTIVE_SENTENCES['detailed'])
+    chosen = select_sentences(sentences, max_sentences=count)
+    return " ".join(" ".join(sentences[i].split()) for i in chosen)
@@ -0,0 +1,113 @@
+"""
+Language detection for summarization routing and TTS voice suggestions.
+
+Two levels:
+
+- classify_segment() decides Hindi vs. not-Hindi from the share of
+  Devanagari letters. It is deterministic and cheap enough to run on every
+  sentence, and it is what routes chunks to mT5 or distilbart.
+- detect_document_languages() builds a document profile from a handful of
+  evenly spaced sample segments, using a seeded langdetect detector for the
+  non-Devanagari ones. Profiles are cached per document hash, so the upload,
+  summary and TTS paths all see the same answer.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+SAMPLE_SEGMENTS = 12
+SAMPLE_SEGMENT_CHARS = 400
+DEVANAGARI_THRESHOLD = 0.3
+PROFILE_CACHE_SIZE = 256
+DETECTOR_SEED = 0
+
+_profile_cache = OrderedDict()
+_profile_lock = threading.Lock()
+
+def _devanagari_share(segment):
+    """Fraction of letters in segment that are Devanagari"""
+    devanagari = letters = 0
+    for ch in segment:
+        if '\u0900' <= ch <= '\u097f':
+            devanagari += 1
+            letters += 1
+        elif ch.isalpha():
+            letters += 1
+    return devanagari / letters if letters else 0.0
+
+def classify_segment(segment):
+    """Return 'hi' for Devanagari-dominant text, otherwise 'en'"""
+    return 'hi' if _devanagari_share(segment) >= DEVANAGARI_THRESHOLD else 'en'
+
+def _detect_seeded(segment):
+    """langdetect with a fixed seed so repeated calls agree"""
+    try:
+        from langdetect import DetectorFactory, detect
+        DetectorFactory.seed = DETECTOR_SEED
+        return detect(segment)
+    except Exception:
+        return 'en'
+
+def _sample_segments(text):
+    """Up to SAMPLE_SEGMENTS evenly spaced windows across the whole text"""
+    if len(text) <= SAMPLE_SEGMENT_CHARS * SAMPLE_SEGMENTS:
+        return [text[i:i + SAMPLE_SEGMENT_CHARS] for i in range(0, len(text), SAMPLE_SEGMENT_CHARS)]
+    step = len(text) // SAMPLE_SEGMENTS
+    return [text[i * step:i * step + SAMPLE_SEGMENT_CHARS] for i in range(SAMPLE_SEGMENTS)]
+
+def detect_document_languages(text):
+    """
+    Detect the languages in a document from sampled segments.
+
+    Returns:
+        dict: {"primary": code, "distribution": {code: share},
+               "mixed": bool, "segments_sampled": n}
+    """
+    key = hashlib.sha1(text.encode('utf-8', errors='replace')).hexdigest()
+    with _profile_lock:
+        if key in _profile_cache:
+            _profile_cache.move_to_end(key)
+            return _profile_cache[key]
+
+    counts = {}
+    segments = [s for s in _sample_segments(text) if s.strip()]
+    for segment in segments:
+        language = 'hi' if classify_segment(segment) == 'hi' else _detect_seeded(segment)
+        counts[language] = counts.get(language, 0) + 1
+
+    total = sum(counts.values())
+    distribution = {lang: n / total for lang, n in counts.items()} if total else {'en': 1.0}
+    primary = max(distribution, key=distribution.get)
+    profile = {
+        "primary": primary,
+        "distribution": distribution,
+        "mixed": 'hi' in distribution and len(distribution) > 1 and min(distribution.values()) >= 0.1,
+        "segments_sampled": len(segments),
+    }
+
+    with _profile_lock:
+        _profile_cache[key] = profile
+        while len(_profile_cache) > PROFILE_CACHE_SIZE:
+            _profile_cache.popitem(last=False)
+    return profile
+
+def language_runs(sentences, min_run_words=4):
+    """
+    Group consecutive same-language sentences.
+
+    Args:
+        sentences (list): Sentence strings in document order
+
+    Returns:
+        list: [(language, start_index, stop_index), ...]. Sentences shorter
+        than min_run_words join the current run, so a stray English term in
+        Hindi text does not split the chunk.
+    """
+    runs = []
+    for index, sentence in enumerate(sentences):
+        language = classify_segment(sentence)
+        if runs and (runs[-1][0] == language or len(sentence.split()) < min_run_words):
+            runs[-1][2] = index + 1
+        else:
+            runs.append([language, index, index + 1])
+    return [tuple(run) for run in runs]
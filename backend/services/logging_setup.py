@@ -0,0 +1,137 @@
+"""
+Logging for the backend: one leveled logger per module, written by a
+background thread as structured JSON lines.
+
+Modules log through logging.getLogger(__name__). configure_logging() puts
+a QueueHandler on the root logger, so a logging call only resolves its
+message and enqueues the record. A QueueListener thread formats the
+records and does the stdout writes; under gunicorn those are synchronous
+and contend on a lock. Records below a logger's level are dropped before
+any formatting. Guard expensive payloads (directory listings, text
+previews) with logger.isEnabledFor(logging.DEBUG).
+
+Each line is a JSON object with time, level, logger, message, the
+request_id of the request being served (also inside scheduler tasks,
+which run in the submitting request's context), and any extra= fields.
+
+Settings:
+
+- LOG_LEVEL: root level (default INFO)
+- LOG_LEVELS: per-module overrides, e.g.
+  "services.tts_service=DEBUG,services.scheduler=WARNING"
+- LOG_FORMAT: "json" (default) or "text" for local development
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_LEVELS = os.environ.get('LOG_LEVELS', '')
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json').lower()
+
+# Set per request by the app; scheduler tasks copy the submitter's context
+request_id_var = contextvars.ContextVar('request_id', default=None)
+
+# LogRecord attributes that are not extra= fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'request_id'}
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the request ID of the thread that logs them"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+class _ResolvingQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Resolve the message and traceback now; args may change before
+        # the listener gets to them. Formatting is left to the listener
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            entry["request_id"] = record.request_id
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s')
+
+    def format(self, record):
+        record.request_id = getattr(record, 'request_id', None) or '-'
+        return super().format(record)
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to the current sys.stdout, which may be swapped (e.g. by test output capture)"""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+_queue_handler = None
+_listener = None
+
+def _start_listener():
+    """(Re)start the writer thread with a fresh queue, e.g. in a forked worker"""
+    global _listener
+    stream_handler = _StdoutHandler()
+    stream_handler.setFormatter(TextFormatter() if LOG_FORMAT == 'text' else JsonFormatter())
+    _queue_handler.queue = queue.SimpleQueue()
+    _listener = QueueListener(_queue_handler.queue, stream_handler, respect_handler_level=False)
+    _listener.start()
+
+def _stop_listener():
+    # Flush what is queued at interpreter exit
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def configure_logging():
+    """Install the queue handler and writer thread (once per process; later calls are no-ops)"""
+    global _queue_handler
+    if _queue_handler is not None:
+        return
+    _queue_handler = _ResolvingQueueHandler(queue.SimpleQueue())
+    _queue_handler.addFilter(RequestIdFilter())
+    root = logging.getLogger()
+    root.handlers = [_queue_handler]
+    root.setLevel(LOG_LEVEL)
+    for override in filter(None, (part.strip() for part in LOG_LEVELS.split(','))):
+        name, _, level = override.partition('=')
+        logging.getLogger(name.strip()).setLevel(level.strip().upper())
+    _start_listener()
+    # A forked worker inherits the queue but not the writer thread
+    os.register_at_fork(after_in_child=_start_listener)
+    atexit.register(_stop_listener)
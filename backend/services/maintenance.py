@@ -0,0 +1,100 @@
+"""
+Background maintenance (file cleanup, store pruning) for one process only.
+
+Every worker process runs a small thread that tries to take an exclusive,
+non-blocking flock on a lock file. The one that gets it becomes the leader
+and runs the maintenance task every interval; the others retry now and
+then, so if the leader exits the kernel drops its lock and another worker
+takes over. Without fcntl (Windows) every process acts as leader.
+
+Threads are started per process (start_maintenance() is pid-checked), so
+the app can be preloaded in a gunicorn master and forked safely.
+"""
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+MAINTENANCE_INTERVAL = int(os.environ.get('MAINTENANCE_INTERVAL', 3600))
+# How often a non-leader checks whether the leader has gone away
+ELECTION_RETRY_SECONDS = int(os.environ.get('MAINTENANCE_ELECTION_RETRY', 60))
+
+class MaintenanceRunner:
+    """Runs task() periodically in whichever process holds the lock file"""
+
+    def __init__(self, task, interval=MAINTENANCE_INTERVAL, lock_path=None,
+                 retry_interval=ELECTION_RETRY_SECONDS):
+        self.task = task
+        self.interval = interval
+        self.lock_path = lock_path
+        self.retry_interval = retry_interval
+        self._lock_file = None
+        self._leader_pid = None
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self.runs = 0
+        self.last_run = None
+
+    @property
+    def is_leader(self):
+        return self._leader_pid == os.getpid()
+
+    def start(self):
+        """Start the election/maintenance thread once per process"""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            # A lock file inherited across fork belongs to the parent
+            self._lock_file = None
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="maintenance", daemon=True)
+            self._thread.start()
+
+    def _try_acquire(self):
+        if not FCNTL_AVAILABLE or not self.lock_path:
+            return True
+        lock_file = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        # Held for the life of the process; released by the kernel on exit
+        self._lock_file = lock_file
+        return True
+
+    def _run(self):
+        while not self.is_leader:
+            if self._try_acquire():
+                self._leader_pid = os.getpid()
+                logger.info("Process %d elected for background maintenance", os.getpid())
+                break
+            time.sleep(self.retry_interval)
+
+        while True:
+            try:
+                self.task()
+                self.runs += 1
+                self.last_run = time.time()
+                time.sleep(self.interval)
+            except Exception as e:
+                logger.exception("Error in maintenance thread: %s", e)
+                time.sleep(60)  # Wait before retrying in case of error
+
+    def stats(self):
+        return {
+            "pid": os.getpid(),
+            "leader": self.is_leader,
+            "runs": self.runs,
+            "last_run": self.last_run,
+            "interval": self.interval,
+        }
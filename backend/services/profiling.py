@@ -0,0 +1,170 @@
+"""
+On-demand cProfile traces for single production requests.
+
+Disabled unless PROFILE_TOKEN is set; the request hooks are then not even
+registered. When enabled, a request is profiled if it:
+
+- carries an X-Profile-Token header equal to PROFILE_TOKEN, or
+- names a document (fileId, or the uploaded file's name) that has been
+  armed through the admin endpoint, for when the client cannot add
+  headers.
+
+A profiled request runs its own thread under cProfile, and every task it
+hands to the scheduler is wrapped to run under a profiler on the worker
+thread. Extraction, summarization and TTS therefore all show up in one
+trace. Forward passes shared through the summary micro-batcher run on the
+batcher thread and are not captured; only the wait for them is (set
+SUMMARY_MICROBATCH=0 to see model time). Python 3.12+ allows one active
+profiler per process, so overlapping profiled work there is run
+unprofiled and counted as skipped.
+
+Traces are saved as standard pstats dumps (<name>.prof, for pstats,
+snakeviz or gprof2dot), each with a small JSON sidecar for listings.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from datetime import datetime
+
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+PROFILING_ENABLED = bool(PROFILE_TOKEN)
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')), 'profiles'))
+# Oldest traces beyond this many are deleted when a new one is saved
+MAX_PROFILES = int(os.environ.get('PROFILE_MAX_FILES', 50))
+# How long an armed document waits for its request
+ARM_SECONDS = 600
+
+_NAME_RE = re.compile(r'^[\w.-]+$')
+
+class RequestProfile:
+    """cProfile captures for one request, merged across the threads it used"""
+
+    def __init__(self, endpoint, label=None):
+        self.endpoint = endpoint
+        self.label = label
+        self.started = time.time()
+        stamp = datetime.fromtimestamp(self.started).strftime('%Y%m%d-%H%M%S-%f')
+        self.name = re.sub(r'[^\w.-]+', '_', "-".join(part for part in (stamp, endpoint, label) if part))[:150]
+        self.threads = 0
+        self.skipped = 0
+        self._stats = None
+        self._lock = threading.Lock()
+        self._request_profiler = None
+
+    def _add(self, profiler):
+        with self._lock:
+            self.threads += 1
+            if self._stats is None:
+                self._stats = pstats.Stats(profiler)
+            else:
+                self._stats.add(profiler)
+
+    def start(self):
+        """Profile the calling (request) thread until stop()"""
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            self.skipped += 1
+            return
+        self._request_profiler = profiler
+
+    def stop(self):
+        if self._request_profiler is not None:
+            self._request_profiler.disable()
+            self._add(self._request_profiler)
+            self._request_profiler = None
+
+    def run(self, func, *args, **kwargs):
+        """func(*args, **kwargs) under a profiler on the current thread"""
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            self.skipped += 1
+            return func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            self._add(profiler)
+
+    def wrap(self, func):
+        """func wrapped to run under this profile on whichever thread calls it"""
+        def profiled(*args, **kwargs):
+            return self.run(func, *args, **kwargs)
+        return profiled
+
+    def save(self, directory=PROFILE_DIR, status_code=None):
+        """
+        Write <name>.prof and <name>.json; returns the name, or None if
+        nothing was captured.
+        """
+        with self._lock:
+            stats = self._stats
+        if stats is None:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        name = self.name
+        stats.dump_stats(os.path.join(directory, name + '.prof'))
+        with open(os.path.join(directory, name + '.json'), 'w') as f:
+            json.dump({
+                "name": name,
+                "endpoint": self.endpoint,
+                "label": self.label,
+                "started": datetime.fromtimestamp(self.started).isoformat(),
+                "seconds": round(time.time() - self.started, 3),
+                "status_code": status_code,
+                "threads": self.threads,
+                "skipped": self.skipped,
+                "total_calls": stats.total_calls,
+            }, f)
+        prune_profiles(directory)
+        return name
+
+def list_profiles(directory=PROFILE_DIR):
+    """Metadata of saved traces, newest first"""
+    if not os.path.isdir(directory):
+        return []
+    result = []
+    for filename in sorted(os.listdir(directory), reverse=True):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as f:
+                entry = json.load(f)
+            entry["bytes"] = os.path.getsize(os.path.join(directory, entry["name"] + '.prof'))
+        except (OSError, ValueError, KeyError):
+            continue
+        result.append(entry)
+    return result
+
+def profile_path(name, directory=PROFILE_DIR):
+    """Path of a saved trace, or None for unknown or unsafe names"""
+    if not _NAME_RE.match(name or ''):
+        return None
+    path = os.path.join(directory, name + '.prof')
+    return path if os.path.exists(path) else None
+
+def profile_report(path, sort='cumulative', limit=40):
+    """pstats text report of a saved trace"""
+    out = io.StringIO()
+    stats = pstats.Stats(path, stream=out)
+    stats.sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+def prune_profiles(directory=PROFILE_DIR, keep=MAX_PROFILES):
+    """Delete the oldest traces beyond keep"""
+    names = sorted(filename[:-len('.json')] for filename in os.listdir(directory) if filename.endswith('.json'))
+    for name in names[:-keep] if keep else names:
+        for ext in ('.prof', '.json'):
+            try:
+                os.remove(os.path.join(directory, name + ext))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,157 @@
+"""
+Progress events for documents and jobs, streamed as server-sent events.
+
+Extraction, summarization and TTS publish events to channels: one per
+document ("doc:<file_id>") and one per request that sent a requestId
+("job:<request_id>"). Each channel keeps its last EVENT_HISTORY events
+with increasing ids in the shared-state backend. Events therefore reach
+a stream on any worker. A client that reconnects with Last-Event-ID gets
+only the events it missed.
+
+Streams wake up as soon as their own process publishes. With a shared
+backend they also re-read the channel every SHARED_POLL_SECONDS, to pick
+up events from other workers. That is one small read per stream, instead
+of clients polling the status endpoints.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+EVENT_HISTORY = int(os.environ.get('PROGRESS_EVENT_HISTORY', 200))
+# Channels with no events for this long are dropped by maintenance
+EVENT_TTL_SECONDS = int(os.environ.get('PROGRESS_EVENT_TTL', 3600))
+# Streams end after this long; EventSource reconnects with Last-Event-ID,
+# so a long wait does not hold a worker thread indefinitely
+STREAM_MAX_SECONDS = int(os.environ.get('PROGRESS_STREAM_MAX_SECONDS', 300))
+# Open streams allowed per process. Each holds a server thread, so by
+# default every thread of the worker (GUNICORN_THREADS) but
+# STREAM_RESERVED_THREADS, which are kept for ordinary requests
+STREAM_RESERVED_THREADS = 8
+MAX_STREAMS = int(os.environ.get('PROGRESS_MAX_STREAMS') or
+                  max(4, int(os.environ.get('GUNICORN_THREADS', 32)) - STREAM_RESERVED_THREADS))
+HEARTBEAT_SECONDS = 15
+SHARED_POLL_SECONDS = 0.5
+# Suggested client reconnect delay (SSE "retry" field)
+RETRY_MILLISECONDS = 3000
+
+def document_channel(file_id):
+    return f"doc:{file_id}"
+
+def job_channel(request_id):
+    return f"job:{request_id}"
+
+def format_event(entry):
+    """One event in text/event-stream format"""
+    return f"id: {entry['id']}\nevent: {entry['event']}\ndata: {json.dumps(entry['data'])}\n\n"
+
+class ProgressHub:
+    """Publishes progress events and streams them per channel"""
+
+    namespace = 'progress'
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._cond = threading.Condition()
+        self._version = 0  # bumped by every publish in this process
+        self._streams = 0
+
+    def publish(self, channels, event, **data):
+        """
+        Append an event to each channel.
+
+        Args:
+            channels (list): Channel names (None entries are skipped)
+            event (str): Stage name: 'extraction', 'summary', 'audio' or 'done'
+            data: JSON-serializable fields, e.g. status, done, total
+        """
+        data["time"] = time.time()
+
+        def append(log):
+            log = log or {"next_id": 1, "events": []}
+            log["events"] = (log["events"] + [{"id": log["next_id"], "event": event, "data": data}])[-EVENT_HISTORY:]
+            log["next_id"] += 1
+            log["updated"] = data["time"]
+            return log
+
+        for channel in channels:
+            if not channel:
+                continue
+            try:
+                self.backend.update(self.namespace, channel, append)
+            except Exception as e:
+                logger.error("Error publishing %s progress to %s: %s", event, channel, e)
+        with self._cond:
+            self._version += 1
+            self._cond.notify_all()
+
+    def events(self, channel, after_id=0):
+        """Stored events on a channel with ids above after_id"""
+        log = self.backend.get(self.namespace, channel)
+        if not log:
+            return []
+        return [entry for entry in log["events"] if entry["id"] > after_id]
+
+    def listener(self, channels):
+        """CancelToken progress listener that publishes to channels"""
+        return lambda stage, data: self.publish(channels, stage, **data)
+
+    def try_open_stream(self):
+        """Reserve a stream slot; False when MAX_STREAMS are open"""
+        with self._cond:
+            if self._streams >= MAX_STREAMS:
+                return False
+            self._streams += 1
+            return True
+
+    def close_stream(self):
+        """Release a slot taken by try_open_stream()"""
+        with self._cond:
+            self._streams -= 1
+
+    def stream(self, channel, last_id=0, until_done=False):
+        """
+        Generate text/event-stream output for a channel, starting after
+        last_id.
+
+        Args:
+            until_done (bool): End after a 'done' event (job channels)
+        """
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        started = last_beat = time.monotonic()
+        poll = HEARTBEAT_SECONDS if self.backend.process_local else SHARED_POLL_SECONDS
+        while time.monotonic() - started < STREAM_MAX_SECONDS:
+            with self._cond:
+                version = self._version
+            for entry in self.events(channel, last_id):
+                last_id = entry["id"]
+                last_beat = time.monotonic()
+                yield format_event(entry)
+                if until_done and entry["event"] == 'done':
+                    return
+            with self._cond:
+                if self._version == version:
+                    self._cond.wait(poll)
+            if time.monotonic() - last_beat >= HEARTBEAT_SECONDS:
+                last_beat = time.monotonic()
+                yield ": keep-alive\n\n"
+
+    def stats(self):
+        with self._cond:
+            return {"open_streams": self._streams, "max_streams": MAX_STREAMS}
+
+    def remove(self, channel):
+        self.backend.delete(self.namespace, channel)
+
+    def prune(self, max_age=EVENT_TTL_SECONDS):
+        """Drop channels with no events for max_age seconds"""
+        cutoff = time.time() - max_age
+        removed = 0
+        for channel, log in self.backend.items(self.namespace):
+            if log.get("updated", 0) < cutoff:
+                self.remove(channel)
+                removed += 1
+        return removed
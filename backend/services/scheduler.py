@@ -0,0 +1,267 @@
+"""
+Central scheduler for the heavy endpoints (summarization and TTS).
+
+Work is submitted to a named lane ("summary", "tts"), each with its own
+worker threads. Within a lane, tasks are ordered by:
+
+1. Request class: interactive work always runs before speculative work.
+2. Start-time fair queuing per client: each task gets a virtual finish
+   tag of max(lane virtual time, client's last tag) + estimated cost, so
+   a client with ten queued detailed summaries is interleaved with, not
+   ahead of, someone asking for one short TL;DR, and cheap tasks win ties.
+
+Queue depth, in-flight counts and wait times are exposed via metrics().
+Tasks may carry an expected run time (see time_estimator), from which
+projected_wait() tells how long a newly submitted task would queue.
+"""
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from services.summary_batcher import MICROBATCH_ENABLED
+
+logger = logging.getLogger(__name__)
+
+LANE_WORKERS = {
+    # Transformer inference is CPU bound; extra threads only add contention.
+    # With micro-batching, one batcher thread runs the model and summary
+    # workers mostly wait on it, so several of them feed shared batches
+    'summary': int(os.environ.get('SUMMARY_WORKERS', 4 if MICROBATCH_ENABLED else 1)),
+    # TTS is network bound; the TTS engine caps real concurrency itself
+    'tts': int(os.environ.get('TTS_WORKERS', 4)),
+}
+
+CLASS_RANK = {'interactive': 0, 'speculative': 1}
+
+# Expected run time assumed for tasks submitted without one, until the
+# lane has measured its own average
+DEFAULT_TASK_SECONDS = 10.0
+# Weight of the newest run in a lane's running average
+RUNTIME_SMOOTHING = 0.1
+
+SUMMARY_TYPE_WEIGHT = {'tldr': 0.15, 'brief': 0.45, 'detailed': 0.70}
+
+def estimate_summary_cost(text, summary_type):
+    """Relative cost of a summary: input words plus generated length"""
+    words = min(len(text.split()), 1500)  # generate_summary_by_type truncates long input
+    return words * (0.3 + SUMMARY_TYPE_WEIGHT.get(summary_type, 0.70))
+
+def estimate_tts_cost(text):
+    """Relative cost of a synthesis: roughly seconds of audio"""
+    return max(1.0, len(text) / 15.0)
+
+class _Task:
+    def __init__(self, func, args, kwargs, client_id, request_class, cost, expected_seconds, on_timed):
+        self.future = Future()
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.client_id = client_id
+        self.request_class = request_class
+        self.cost = cost
+        self.expected_seconds = expected_seconds
+        self.on_timed = on_timed
+        # Runs in the submitter's context (e.g. its request ID for logging)
+        self.context = contextvars.copy_context()
+        self.enqueued_at = time.time()
+        self.started_at = None
+        self.virtual_start = 0.0
+
+class _Lane:
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = max(1, workers)
+        self.heap = []
+        self.cond = threading.Condition()
+        self.virtual_time = 0.0
+        self.client_tags = {}
+        self.in_flight = 0
+        self.running = set()
+        self.completed = 0
+        self.mean_runtime = None
+        self.wait_times = {cls: deque(maxlen=500) for cls in CLASS_RANK}
+        self.threads = []
+
+class WorkScheduler:
+    """Priority + per-client fair scheduler over a set of worker lanes"""
+
+    def __init__(self, lane_workers=None):
+        self._lanes = {name: _Lane(name, n) for name, n in (lane_workers or LANE_WORKERS).items()}
+        self._seq = itertools.count()
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_workers(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            for lane in self._lanes.values():
+                lane.threads = []
+                for i in range(lane.workers):
+                    thread = threading.Thread(target=self._worker, args=(lane,),
+                                              name=f"scheduler-{lane.name}-{i}", daemon=True)
+                    thread.start()
+                    lane.threads.append(thread)
+
+    def submit(self, lane_name, func, *args, client_id='anonymous', request_class='interactive', cost=1.0,
+               expected_seconds=None, on_timed=None, **kwargs):
+        """
+        Queue func(*args, **kwargs) on a lane.
+
+        Args:
+            lane_name (str): "summary" or "tts"
+            client_id (str): Identity used for fair sharing
+            request_class (str): "interactive" or "speculative"
+            cost (float): Estimated relative cost (see estimate_* helpers)
+            expected_seconds (float): Predicted run time, for projected_wait()
+            on_timed (callable): Called with the measured run time if func returns a truthy result
+
+        Returns:
+            concurrent.futures.Future: Resolves to func's return value
+        """
+        self._ensure_workers()
+        lane = self._lanes[lane_name]
+        task = _Task(func, args, kwargs, client_id, request_class, max(cost, 0.001), expected_seconds, on_timed)
+        with lane.cond:
+            task.virtual_start = max(lane.virtual_time, lane.client_tags.get(client_id, 0.0))
+            finish_tag = task.virtual_start + task.cost
+            lane.client_tags[client_id] = finish_tag
+            key = (CLASS_RANK.get(request_class, len(CLASS_RANK)), finish_tag, next(self._seq))
+            heapq.heappush(lane.heap, (key, task))
+            lane.cond.notify()
+        return task.future
+
+    def run(self, lane_name, func, *args, **kwargs):
+        """Blocking helper: submit() and wait for the result"""
+        return self.submit(lane_name, func, *args, **kwargs).result()
+
+    def _worker(self, lane):
+        while True:
+            with lane.cond:
+                while not lane.heap:
+                    lane.cond.wait()
+                _, task = heapq.heappop(lane.heap)
+                lane.virtual_time = max(lane.virtual_time, task.virtual_start)
+                # Tags at or below the virtual time no longer affect ordering
+                if len(lane.client_tags) > 1000:
+                    lane.client_tags = {c: t for c, t in lane.client_tags.items() if t > lane.virtual_time}
+                lane.in_flight += 1
+                task.started_at = time.time()
+                lane.running.add(task)
+                lane.wait_times.setdefault(task.request_class, deque(maxlen=500)).append(
+                    task.started_at - task.enqueued_at)
+
+            elapsed = None
+            if task.future.set_running_or_notify_cancel():
+                try:
+                    result = task.context.run(task.func, *task.args, **task.kwargs)
+                    # Failures reported as a falsy result are not timed either
+                    if result:
+                        elapsed = time.time() - task.started_at
+                    task.future.set_result(result)
+                except Exception as e:
+                    task.future.set_exception(e)
+
+            with lane.cond:
+                lane.in_flight -= 1
+                lane.running.discard(task)
+                lane.completed += 1
+                if elapsed is not None:
+                    lane.mean_runtime = elapsed if lane.mean_runtime is None else (
+                        (1 - RUNTIME_SMOOTHING) * lane.mean_runtime + RUNTIME_SMOOTHING * elapsed)
+            if elapsed is not None and task.on_timed:
+                try:
+                    task.on_timed(elapsed)
+                except Exception as e:
+                    logger.error("Error recording task timing: %s", e)
+
+    def _expected(self, lane, task):
+        if task.expected_seconds is not None:
+            return task.expected_seconds
+        return lane.mean_runtime if lane.mean_runtime is not None else DEFAULT_TASK_SECONDS
+
+    def _projected_wait(self, lane, request_class):
+        """
+        Seconds a new task would queue (lane.cond held): zero while a worker
+        is free, otherwise when a worker frees up once the running tasks
+        finish and the queued tasks ahead of it have started, in order.
+        """
+        rank = CLASS_RANK.get(request_class, len(CLASS_RANK))
+        ahead = sorted((entry for entry in lane.heap if entry[0][0] <= rank), key=lambda entry: entry[0])
+        if len(lane.running) + len(ahead) < lane.workers:
+            return 0.0
+        now = time.time()
+        # Min-heap of the times each worker is next free
+        free_at = [max(0.0, self._expected(lane, task) - (now - task.started_at)) for task in lane.running]
+        free_at += [0.0] * (lane.workers - len(free_at))
+        heapq.heapify(free_at)
+        for _, task in ahead:
+            heapq.heapreplace(free_at, free_at[0] + self._expected(lane, task))
+        return free_at[0]
+
+    def projected_wait(self, lane_name, request_class='interactive'):
+        """
+        Seconds before a task submitted now would start, from the expected
+        run times of queued and running tasks. Speculative work is only
+        counted for speculative requests, since interactive work runs first.
+        """
+        lane = self._lanes[lane_name]
+        with lane.cond:
+            return self._projected_wait(lane, request_class)
+
+    @staticmethod
+    def _percentile(values, pct):
+        if not values:
+            return None
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def metrics(self):
+        """Queue depth, in-flight work and recent wait times per lane"""
+        result = {}
+        for name, lane in self._lanes.items():
+            with lane.cond:
+                queued_by_class = {}
+                queued_by_client = {}
+                for _, task in lane.heap:
+                    queued_by_class[task.request_class] = queued_by_class.get(task.request_class, 0) + 1
+                    queued_by_client[task.client_id] = queued_by_client.get(task.client_id, 0) + 1
+                waits = {cls: list(times) for cls, times in lane.wait_times.items()}
+                result[name] = {
+                    "workers": lane.workers,
+                    "queue_depth": len(lane.heap),
+                    "queued_by_class": queued_by_class,
+                    "queued_by_client": queued_by_client,
+                    "in_flight": lane.in_flight,
+                    "completed": lane.completed,
+                    "mean_runtime_s": lane.mean_runtime,
+                    "projected_wait_s": self._projected_wait(lane, 'interactive'),
+                    "oldest_wait_s": max((time.time() - t.enqueued_at for _, t in lane.heap), default=0.0),
+                }
+            result[name]["wait_s"] = {
+                cls: {
+                    "p50": self._percentile(times, 50),
+                    "p95": self._percentile(times, 95),
+                    "samples": len(times),
+                }
+                for cls, times in waits.items()
+            }
+        return result
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    """Return the process-wide work scheduler"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = WorkScheduler()
+        return _scheduler
@@ -0,0 +1,293 @@
+"""
+Shared-state backends for state that must be visible to every worker.
+
+With several gunicorn workers, module-level dicts diverge per process, so
+file tracking and check-file deduplication go through a backend instead:
+
+- "memory": a plain dict, only valid with a single worker process
+- "file": one JSON file per key under STATE_DIR, with flock-protected
+  read-modify-write; works for any number of workers on one host
+- "redis": namespaced keys on REDIS_URL (optional dependency), for
+  workers spread over several hosts
+
+Select with STATE_BACKEND (default "file").
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from urllib.parse import quote, unquote
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+class MemoryBackend:
+    """Process-local dict; only correct with a single worker"""
+
+    process_local = True
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.RLock()
+
+    def get(self, namespace, key):
+        with self._lock:
+            entry = self._data.get(namespace, {}).get(key)
+        if entry is None or (entry[1] and entry[1] < time.time()):
+            return None
+        return entry[0]
+
+    def set(self, namespace, key, value, ttl=None):
+        with self._lock:
+            self._data.setdefault(namespace, {})[key] = (value, time.time() + ttl if ttl else None)
+
+    def delete(self, namespace, key):
+        with self._lock:
+            self._data.get(namespace, {}).pop(key, None)
+
+    def items(self, namespace):
+        now = time.time()
+        with self._lock:
+            entries = list(self._data.get(namespace, {}).items())
+        return [(key, value) for key, (value, expires) in entries if not expires or expires >= now]
+
+    def purge_expired(self, namespace):
+        now = time.time()
+        with self._lock:
+            entries = self._data.get(namespace, {})
+            expired = [key for key, (_, expires) in entries.items() if expires and expires < now]
+            for key in expired:
+                del entries[key]
+        return len(expired)
+
+    def update(self, namespace, key, func):
+        """Atomically replace the value with func(value); returns the new value"""
+        with self._lock:
+            value = func(self.get(namespace, key))
+            if value is not None:
+                self.set(namespace, key, value)
+            return value
+
+class FileBackend:
+    """JSON file per key, shared by all worker processes on one host"""
+
+    process_local = False
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._thread_lock = threading.Lock()
+
+    def _path(self, namespace, key):
+        directory = os.path.join(self.root, namespace)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, quote(key, safe='') + '.json')
+
+    def _read(self, path):
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("expires") and entry["expires"] < time.time():
+            return None
+        return entry["value"]
+
+    def get(self, namespace, key):
+        return self._read(self._path(namespace, key))
+
+    def set(self, namespace, key, value, ttl=None):
+        path = self._path(namespace, key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"value": value, "expires": time.time() + ttl if ttl else None}, f)
+        os.replace(tmp_path, path)
+
+    def delete(self, namespace, key):
+        try:
+            os.remove(self._path(namespace, key))
+        except FileNotFoundError:
+            pass
+
+    def items(self, namespace):
+        directory = os.path.join(self.root, namespace)
+        if not os.path.isdir(directory):
+            return []
+        result = []
+        for filename in os.listdir(directory):
+            if not filename.endswith('.json'):
+                continue
+            value = self._read(os.path.join(directory, filename))
+            if value is not None:
+                result.append((unquote(filename[:-len('.json')]), value))
+        return result
+
+    def purge_expired(self, namespace):
+        """Delete expired entries, which otherwise stay on disk"""
+        directory = os.path.join(self.root, namespace)
+        removed = 0
+        if not os.path.isdir(directory):
+            return removed
+        for filename in os.listdir(directory):
+            path = os.path.join(directory, filename)
+            if filename.endswith('.json') and self._read(path) is None:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    def update(self, namespace, key, func):
+        """Atomically replace the value with func(value) across processes"""
+        lock_path = os.path.join(self.root, namespace + '.lock')
+        with self._thread_lock, open(lock_path, 'a') as lock_file:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                value = func(self.get(namespace, key))
+                if value is not None:
+                    self.set(namespace, key, value)
+                return value
+            finally:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+class RedisBackend:
+    """Namespaced redis keys, for workers on several hosts"""
+
+    process_local = False
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, namespace, key):
+        raw = self.client.get(f"{namespace}:{key}")
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, namespace, key, value, ttl=None):
+        self.client.set(f"{namespace}:{key}", json.dumps(value), ex=int(ttl) if ttl else None)
+        self.client.sadd(f"{namespace}:keys", key)
+
+    def delete(self, namespace, key):
+        self.client.delete(f"{namespace}:{key}")
+        self.client.srem(f"{namespace}:keys", key)
+
+    def items(self, namespace):
+        result = []
+        for raw_key in self.client.smembers(f"{namespace}:keys"):
+            key = raw_key.decode('utf-8')
+            value = self.get(namespace, key)
+            if value is None:
+                self.client.srem(f"{namespace}:keys", key)  # expired
+            else:
+                result.append((key, value))
+        return result
+
+    def purge_expired(self, namespace):
+        """Values expire in redis itself; only drop their key-set members"""
+        before = self.client.scard(f"{namespace}:keys")
+        self.items(namespace)
+        return before - self.client.scard(f"{namespace}:keys")
+
+    def update(self, namespace, key, func):
+        """Atomically replace the value with func(value) using WATCH/MULTI"""
+        name = f"{namespace}:{key}"
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(name)
+                    raw = pipe.get(name)
+                    value = func(json.loads(raw) if raw is not None else None)
+                    pipe.multi()
+                    if value is not None:
+                        pipe.set(name, json.dumps(value))
+                        pipe.sadd(f"{namespace}:keys", key)
+                    pipe.execute()
+                    return value
+                except redis.WatchError:
+                    continue
+
+def create_state_backend(kind='file', state_dir=None, redis_url=None):
+    """Build the configured backend ("memory", "file" or "redis")"""
+    if kind == 'redis':
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("STATE_BACKEND=redis requires the redis package")
+        if not redis_url:
+            raise RuntimeError("STATE_BACKEND=redis requires REDIS_URL")
+        return RedisBackend(redis_url)
+    if kind == 'memory':
+        return MemoryBackend()
+    return FileBackend(state_dir)
+
+class FileTracking:
+    """Uploaded files and the audio generated for them"""
+
+    namespace = 'files'
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def track(self, file_id, file_path):
+        self.backend.set(self.namespace, file_id, {
+            "upload_time": datetime.now().isoformat(),
+            "file_path": file_path,
+            "audio_paths": [],
+        })
+
+    @staticmethod
+    def _decode(data):
+        data = dict(data)
+        data["upload_time"] = datetime.fromisoformat(data["upload_time"])
+        return data
+
+    def get(self, file_id):
+        """{"upload_time": datetime, "file_path", "audio_paths"} or None"""
+        data = self.backend.get(self.namespace, file_id)
+        return self._decode(data) if data else None
+
+    def __contains__(self, file_id):
+        return self.backend.get(self.namespace, file_id) is not None
+
+    def items(self):
+        return [(file_id, self._decode(data)) for file_id, data in self.backend.items(self.namespace)]
+
+    def remove(self, file_id):
+        self.backend.delete(self.namespace, file_id)
+
+    def add_audio_path(self, file_id, audio_path):
+        """Record generated audio for a tracked file (no-op if untracked)"""
+        def add(data):
+            if data is None:
+                return None
+            data["audio_paths"] = data.get("audio_paths", []) + [audio_path]
+            return data
+        self.backend.update(self.namespace, file_id, add)
+
+class RecentResults:
+    """Short-lived results keyed by request, for deduplicating repeats"""
+
+    def __init__(self, backend, namespace, ttl):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def get(self, key):
+        return self.backend.get(self.namespace, key)
+
+    def put(self, key, result):
+        self.backend.set(self.namespace, key, result, ttl=self.ttl)
+
+    def prune(self):
+        """Drop expired entries"""
+        return self.backend.purge_expired(self.namespace)
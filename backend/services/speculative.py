@@ -0,0 +1,204 @@
+"""
+Speculative background pre-processing for freshly uploaded documents.
+
+After an upload, low-priority jobs (stats, TL;DR summary, default-voice
+audio) are queued so that the user's first click usually finds a ready
+artifact. Jobs only start while no interactive request is in progress,
+and all jobs for a document are cancelled when it is cleaned up. Each job
+function is called with a cancel_token keyword, which trips when the job
+is cancelled, so running work stops early too.
+
+Enabled with SPECULATIVE_PREPROCESSING=1, or per upload with a
+``speculative=true`` form field.
+"""
+import hashlib
+import itertools
+import logging
+import os
+import queue
+import threading
+from services.cancellation import CancelToken, OperationCancelled
+
+logger = logging.getLogger(__name__)
+
+SPECULATIVE_ENABLED = os.environ.get('SPECULATIVE_PREPROCESSING', '0') == '1'
+SPECULATIVE_WORKERS = int(os.environ.get('SPECULATIVE_WORKERS', 1))
+
+# Lower number runs first: cheap artifacts before expensive ones
+JOB_PRIORITY = {'stats': 0, 'summary': 1, 'audio': 2}
+
+def text_fingerprint(text):
+    """Stable hash used to check an artifact still matches the document"""
+    return hashlib.sha1(text.encode('utf-8', errors='replace')).hexdigest()
+
+class SpeculativeJob:
+    """One queued artifact computation"""
+
+    def __init__(self, file_id, kind, variant, func, args, text_hash=None, on_discard=None):
+        self.file_id = file_id
+        self.kind = kind
+        self.variant = variant
+        self.func = func
+        self.args = args
+        self.text_hash = text_hash
+        self.on_discard = on_discard
+        self.state = 'queued'  # queued -> running -> done/failed, or cancelled
+        self.cancel_token = CancelToken()
+        self.result = None
+        self.finished = threading.Event()
+
+    @property
+    def key(self):
+        return (self.file_id, self.kind, self.variant)
+
+class SpeculativePipeline:
+    """Priority queue of speculative jobs that yields to interactive requests"""
+
+    def __init__(self, workers=SPECULATIVE_WORKERS):
+        self.workers = max(1, workers)
+        self._queue = queue.PriorityQueue()
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._interactive = 0
+        self._seq = itertools.count()
+        self._threads = []
+        self._pid = None
+        self.counters = {"scheduled": 0, "completed": 0, "failed": 0, "cancelled": 0, "hits": 0}
+
+    def _ensure_workers(self):
+        if self._threads and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._threads = []
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"speculative-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def schedule(self, file_id, kind, variant, func, *args, text_hash=None, on_discard=None):
+        """Queue func(*args, cancel_token=...) as the speculative artifact (file_id, kind, variant)"""
+        job = SpeculativeJob(file_id, kind, variant, func, args, text_hash, on_discard)
+        with self._lock:
+            self._ensure_workers()
+            previous = self._jobs.get(job.key)
+            if previous:
+                self._cancel_job(previous)
+            self._jobs[job.key] = job
+            self.counters["scheduled"] += 1
+        self._queue.put((JOB_PRIORITY.get(kind, 9), next(self._seq), job))
+        return job
+
+    def _cancel_job(self, job):
+        """Mark a job cancelled; caller holds the lock"""
+        if job.state in ('queued', 'running'):
+            self.counters["cancelled"] += 1
+        if job.state == 'done' and job.on_discard:
+            self._discard(job)
+        job.state = 'cancelled'
+        job.cancel_token.cancel()
+        job.finished.set()
+
+    @staticmethod
+    def _discard(job):
+        try:
+            job.on_discard(job.result)
+        except Exception as e:
+            logger.error("Error discarding speculative %s for %s: %s", job.kind, job.file_id, e)
+
+    def cancel(self, file_id):
+        """Cancel queued/running jobs and drop finished artifacts for a document"""
+        with self._lock:
+            for key in [k for k in self._jobs if k[0] == file_id]:
+                self._cancel_job(self._jobs.pop(key))
+
+    def lookup(self, file_id, kind, variant, text_hash=None, wait_timeout=120):
+        """
+        Return a ready artifact, or None if the caller should compute it.
+
+        A job that is still queued is cancelled (the interactive request
+        will do the work itself); a job already running is waited for.
+        """
+        with self._lock:
+            job = self._jobs.get((file_id, kind, variant))
+            if not job or (text_hash and job.text_hash and job.text_hash != text_hash):
+                return None
+            if job.state == 'queued':
+                del self._jobs[job.key]
+                self._cancel_job(job)
+                return None
+        if job.state == 'running':
+            job.finished.wait(wait_timeout)
+        if job.state == 'done':
+            with self._lock:
+                self.counters["hits"] += 1
+            return job.result
+        return None
+
+    def enter_interactive(self):
+        """Mark an interactive request in progress; speculative jobs wait for it"""
+        with self._lock:
+            self._interactive += 1
+
+    def exit_interactive(self):
+        with self._lock:
+            self._interactive = max(0, self._interactive - 1)
+            if self._interactive == 0:
+                self._idle.notify_all()
+
+    def _worker(self):
+        while True:
+            _, _, job = self._queue.get()
+            with self._lock:
+                # Yield to interactive requests before starting anything new
+                while self._interactive > 0 and job.state == 'queued':
+                    self._idle.wait(timeout=1)
+                if job.state != 'queued':
+                    continue
+                job.state = 'running'
+
+            try:
+                result = job.func(*job.args, cancel_token=job.cancel_token)
+                failed = result is None
+            except OperationCancelled:
+                result, failed = None, True
+            except Exception as e:
+                logger.warning("Speculative %s for %s failed: %s", job.kind, job.file_id, e)
+                result, failed = None, True
+
+            with self._lock:
+                job.result = result
+                if job.state == 'cancelled':
+                    # Cancelled mid-run: throw the artifact away
+                    if result is not None and job.on_discard:
+                        self._discard(job)
+                elif failed:
+                    job.state = 'failed'
+                    self.counters["failed"] += 1
+                else:
+                    job.state = 'done'
+                    self.counters["completed"] += 1
+                job.finished.set()
+
+    def stats(self):
+        with self._lock:
+            states = {}
+            for job in self._jobs.values():
+                states[job.state] = states.get(job.state, 0) + 1
+            return {
+                "enabled": SPECULATIVE_ENABLED,
+                "interactive_requests": self._interactive,
+                "jobs": states,
+                "counters": dict(self.counters),
+            }
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+def get_speculative_pipeline():
+    """Return the process-wide speculative pipeline"""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = SpeculativePipeline()
+        return _pipeline
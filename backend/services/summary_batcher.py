@@ -0,0 +1,159 @@
+"""
+Cross-request micro-batching for summarization.
+
+Concurrent summary requests each produce chunks for the same pipelines.
+Instead of one forward pass per request, chunks are submitted here and a
+single batcher thread runs them as padded batches:
+
+- Items are grouped by (runner, group key), where the key holds the model
+  and generation parameters, since one pipeline call takes one set of them.
+- A group is flushed when its oldest item has waited SUMMARY_BATCH_WINDOW_MS
+  or when its padded token count reaches SUMMARY_BATCH_MAX_TOKENS.
+- While a batch runs, new items queue up and go out together next, so an
+  idle batcher adds at most the window to a lone request.
+
+Results are scattered back to each caller's Future.
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+MICROBATCH_ENABLED = os.environ.get('SUMMARY_MICROBATCH', '1') == '1'
+BATCH_WINDOW_SECONDS = int(os.environ.get('SUMMARY_BATCH_WINDOW_MS', 10)) / 1000.0
+# Padded size cap: items in the batch times its longest input
+BATCH_MAX_TOKENS = int(os.environ.get('SUMMARY_BATCH_MAX_TOKENS', 8192))
+
+class _Group:
+    def __init__(self, runner, key):
+        self.runner = runner
+        self.key = key
+        self.items = []  # (item, tokens, future)
+        self.first_at = None
+
+    def padded_tokens(self):
+        return len(self.items) * max(tokens for _, tokens, _ in self.items)
+
+class MicroBatcher:
+    """Collects items across callers and runs them in grouped batches"""
+
+    def __init__(self, window=BATCH_WINDOW_SECONDS, max_tokens=BATCH_MAX_TOKENS):
+        self.window = window
+        self.max_tokens = max_tokens
+        self._groups = {}  # (runner, key) -> _Group, in arrival order
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    def _ensure_thread(self):
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._groups = {}
+        self._thread = threading.Thread(target=self._run, name="summary-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, runner, key, item, tokens):
+        """
+        Queue one item.
+
+        Args:
+            runner (callable): runner(key, items) -> list of results, one per item
+            key (tuple): Items with equal runner and key may share a batch
+            item: The input (e.g. a chunk of text)
+            tokens (int): Estimated input length in tokens
+
+        Returns:
+            concurrent.futures.Future: Resolves to this item's result
+        """
+        future = Future()
+        with self._cond:
+            self._ensure_thread()
+            group = self._groups.get((runner, key))
+            if group is None:
+                group = self._groups[(runner, key)] = _Group(runner, key)
+            if not group.items:
+                group.first_at = time.monotonic()
+            group.items.append((item, tokens, future))
+            self._cond.notify()
+        return future
+
+    def _next_batch(self):
+        """Wait for a group that is due; take as many of its items as fit"""
+        with self._cond:
+            while True:
+                due, wait = None, None
+                now = time.monotonic()
+                for group in self._groups.values():
+                    if not group.items:
+                        continue
+                    remaining = group.first_at + self.window - now
+                    if remaining <= 0 or group.padded_tokens() >= self.max_tokens:
+                        due = group
+                        break
+                    wait = remaining if wait is None else min(wait, remaining)
+                if due is not None:
+                    break
+                self._cond.wait(wait)
+
+            batch = []
+            longest = 0
+            taken = 0
+            for entry in due.items:
+                longest = max(longest, entry[1])
+                if batch and (len(batch) + 1) * longest > self.max_tokens:
+                    break
+                taken += 1
+                # Callers cancel futures they stopped waiting for
+                if entry[2].set_running_or_notify_cancel():
+                    batch.append(entry)
+            # Leftovers keep their arrival time, so they go out next
+            due.items = due.items[taken:]
+            if not due.items:
+                del self._groups[(due.runner, due.key)]
+            return due, batch
+
+    def _run(self):
+        while True:
+            group, batch = self._next_batch()
+            if not batch:
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            try:
+                results = group.runner(group.key, [item for item, _, _ in batch])
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, _, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def stats(self):
+        with self._cond:
+            queued = sum(len(group.items) for group in self._groups.values())
+        return {
+            "enabled": MICROBATCH_ENABLED,
+            "window_ms": self.window * 1000,
+            "max_tokens": self.max_tokens,
+            "queued": queued,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else None,
+            "largest_batch": self.largest_batch,
+        }
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+def get_summary_batcher():
+    """Return the process-wide summarization micro-batcher"""
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = MicroBatcher()
+        return _batcher
@@ -1,9 +1,19 @@
+import logging
 import os
+import hashlib
+import threading
+from collections import OrderedDict
 from transformers import pipeline
 from dotenv import load_dotenv
-import re
 import torch
-from langdetect import detect
+from services.language_detection import detect_document_languages, language_runs
+from services.text_chunking import _clean_text
+from services.document_model import ParsedDocument, get_parsed_document
+from services.summary_batcher import MICROBATCH_ENABLED, get_summary_batcher
+from services.cancellation import OperationCancelled, check, report, wait_future
+from services.extractive_summary import select_sentences
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables (if needed for future)
 load_dotenv()
@@ -20,74 +30,404 @@ summarizer_hi = pipeline(
     device=device
 )
 
-def generate_summary_by_type(text, summary_type):
+# Define thresholds
+MAX_CHAR_LIMIT = 7500  # To avoid long processing times
+TRUNCATION_NOTE = "\n\n(Note: Original text was truncated for performance.)"
+PREFILTER_NOTE = "\n\n(Note: Summarized from the most salient sentences of a long document.)"
+
+# Pre-filter: for documents over MAX_CHAR_LIMIT, feed the models the most
+# salient sentences of the whole document (extractive ranking) instead of
+# just its head
+PREFILTER_DEFAULT = os.environ.get('SUMMARY_PREFILTER', '0') == '1'
+
+# Target summary length as a fraction of the input, per summary type
+SUMMARY_RATIOS = {'tldr': 0.15, 'brief': 0.45, 'detailed': 0.70}
+
+# Shared-pass mode: derive tldr/brief from one detailed pass (see generate_all_summaries)
+SHARED_PASS_DEFAULT = os.environ.get('SUMMARY_SHARED_PASS', '0') == '1'
+SUMMARY_CACHE_SIZE = int(os.environ.get('SUMMARY_CACHE_SIZE', 64))
+
+# Chunks per forward pass when a model gets several chunks at once
+SUMMARY_BATCH_SIZE = int(os.environ.get('SUMMARY_BATCH_SIZE', 4))
+
+# text hash -> {summary_type: summary} for shared passes, and
+# "<text hash>:<summary_type>" -> {summary_type: summary} for single types
+_summary_cache = OrderedDict()
+_summary_inflight = {}
+_summary_cache_lock = threading.Lock()
+
+def generate_summary_by_type(text, summary_type, shared_pass=None, cancel_token=None, prefilter=None):
     """
     Generate a summary of the given text using local transformer.
     Supports summary_type: 'tldr', 'brief', 'detailed'
     Supports Hindi and English.
+    With shared_pass (default: SUMMARY_SHARED_PASS env), all three types are
+    computed together by generate_all_summaries and cached.
+    With cancel_token, raises OperationCancelled when it trips; its partial
+    is the summary of the chunks finished so far (or None).
+    With prefilter (default: SUMMARY_PREFILTER env), a long document is
+    reduced to its most salient sentences rather than truncated.
     """
-    # Define thresholds
-    max_char_limit = 7500  # To avoid long processing times
-    truncated = False
+    if shared_pass is None:
+        shared_pass = SHARED_PASS_DEFAULT
+    if shared_pass:
+        try:
+            summaries = generate_all_summaries(text, cancel_token=cancel_token, prefilter=prefilter)
+        except OperationCancelled as e:
+            raise OperationCancelled(e.reason, (e.partial or {}).get(summary_type))
+        return summaries.get(summary_type, summaries['detailed'])
 
-    if len(text) > max_char_limit:
-        text = text[:max_char_limit]
-        truncated = True
+    cached = cached_summary(text, summary_type, prefilter)
+    if cached is not None:
+        return cached
 
-    # Clean text
-    text = _clean_text(text)
+    parsed, note, profile, indexes = _prepare_document(text, prefilter)
 
     # Get min/max length per chunk based on type
-    min_len, max_len = _get_dynamic_params(text, summary_type)
+    min_len, max_len = _get_dynamic_params(parsed.text[:MAX_CHAR_LIMIT], summary_type)
+
+    # Route each chunk to its language's model, chunking by tokens only
+    routed = _route_chunks(parsed, profile, indexes)
+    try:
+        summaries = _summarize_routed(routed, min_len, max_len, cancel_token)
+    except OperationCancelled as e:
+        raise OperationCancelled(e.reason, _join_summaries(e.partial))
+
+    # Append truncation/pre-filter note if needed
+    summary = "\n\n".join(summary for _, summary in summaries) + note
+    if summaries:
+        _store_summary(text, summary_type, prefilter, summary)
+    return summary
+
+def stream_summary_by_type(text, summary_type, cancel_token=None, prefilter=None):
+    """
+    Generate a summary chunk by chunk, yielding each chunk's summary in
+    document order as soon as it and the chunks before it are done.
+
+    Yields (piece, done, total) tuples. The pieces concatenate to what
+    generate_summary_by_type returns, separators and note included, and
+    the finished summary is cached for both. Without micro-batching,
+    chunks run one at a time instead of in per-language batches, so the
+    first piece takes one chunk's inference. Shared-pass summaries are
+    served from the cache but not computed here (their TL;DR needs every
+    chunk first).
+
+    With cancel_token, raises OperationCancelled when it trips; its
+    partial is the summary of the chunks yielded so far (or None).
+    """
+    cached = cached_summary(text, summary_type, prefilter)
+    if cached is not None:
+        yield cached, 1, 1
+        return
+
+    parsed, note, profile, indexes = _prepare_document(text, prefilter)
+    min_len, max_len = _get_dynamic_params(parsed.text[:MAX_CHAR_LIMIT], summary_type)
+    routed = _route_chunks(parsed, profile, indexes)
+
+    parts = []
+    try:
+        for index, summary in enumerate(_iter_routed(routed, min_len, max_len, cancel_token)):
+            report(cancel_token, 'summary', status='progress', done=index + 1, total=len(routed))
+            if summary:
+                yield ("\n\n" if parts else "") + summary, index + 1, len(routed)
+                parts.append(summary)
+    except OperationCancelled as e:
+        raise OperationCancelled(e.reason, "\n\n".join(parts) if parts else None)
+
+    if note:
+        yield note, len(routed), len(routed)
+    if parts:
+        _store_summary(text, summary_type, prefilter, "\n\n".join(parts) + note)
+
+def _join_summaries(parts):
+    """Join (language, summary) pairs, or None if there are none"""
+    return "\n\n".join(summary for _, summary in parts) if parts else None
+
+def _cache_key(text, prefilter=None):
+    if prefilter is None:
+        prefilter = PREFILTER_DEFAULT
+    key = hashlib.sha1(text.encode('utf-8', errors='replace')).hexdigest()
+    return key + ':prefilter' if prefilter else key
+
+def cached_summary(text, summary_type, prefilter=None):
+    """A cached summary of this type for text (from any of the generate functions), or None"""
+    key = _cache_key(text, prefilter)
+    with _summary_cache_lock:
+        for name in (f"{key}:{summary_type}", key):
+            if name in _summary_cache and summary_type in _summary_cache[name]:
+                _summary_cache.move_to_end(name)
+                return _summary_cache[name][summary_type]
+    return None
+
+def _store_summary(text, summary_type, prefilter, summary):
+    """Cache a single-type summary next to the shared-pass results"""
+    with _summary_cache_lock:
+        _summary_cache[f"{_cache_key(text, prefilter)}:{summary_type}"] = {summary_type: summary}
+        while len(_summary_cache) > SUMMARY_CACHE_SIZE:
+            _summary_cache.popitem(last=False)
+
+def generate_all_summaries(text, cancel_token=None, prefilter=None):
+    """
+    Produce 'tldr', 'brief' and 'detailed' summaries from one pass over the document.
+
+    Chunks are summarized once at the detailed length; 'brief' condenses those
+    chunk summaries and 'tldr' condenses the brief ones, so the source text is
+    only read by the model once. Results are cached per document text, and
+    concurrent callers for the same text wait for a single computation.
+    A cancelled computation is not cached; its partial is a dict of the
+    summary types finished so far.
+    """
+    if prefilter is None:
+        prefilter = PREFILTER_DEFAULT
+    key = _cache_key(text, prefilter)
+
+    with _summary_cache_lock:
+        if key in _summary_cache:
+            _summary_cache.move_to_end(key)
+            return dict(_summary_cache[key])
+        pending = _summary_inflight.get(key)
+        if pending is None:
+            _summary_inflight[key] = threading.Event()
+
+    if pending is not None:
+        while not pending.wait(0.25):
+            check(cancel_token)
+        with _summary_cache_lock:
+            if key in _summary_cache:
+                return dict(_summary_cache[key])
+        return generate_all_summaries(text, cancel_token, prefilter)
 
-    # Detect language
     try:
-        language = detect(text)
-    except Exception:
-        language = "en"
+        summaries = _compute_all_summaries(text, cancel_token, prefilter)
+        with _summary_cache_lock:
+            _summary_cache[key] = summaries
+            while len(_summary_cache) > SUMMARY_CACHE_SIZE:
+                _summary_cache.popitem(last=False)
+        return dict(summaries)
+    finally:
+        with _summary_cache_lock:
+            _summary_inflight.pop(key).set()
+
+def _compute_all_summaries(text, cancel_token=None, prefilter=False):
+    parsed, note, profile, indexes = _prepare_document(text, prefilter)
+
+    min_len, max_len = _get_dynamic_params(parsed.text[:MAX_CHAR_LIMIT], 'detailed')
+    try:
+        detailed = _summarize_routed(_route_chunks(parsed, profile, indexes), min_len, max_len, cancel_token)
+    except OperationCancelled as e:
+        partial = _join_summaries(e.partial)
+        raise OperationCancelled(e.reason, {'detailed': partial} if partial else None)
+
+    finished = {'detailed': "\n\n".join(summary for _, summary in detailed) + note}
+    try:
+        brief = _condense(detailed, SUMMARY_RATIOS['brief'] / SUMMARY_RATIOS['detailed'], cancel_token)
+        finished['brief'] = "\n\n".join(summary for _, summary in brief) + note
+        tldr = _condense(brief, SUMMARY_RATIOS['tldr'] / SUMMARY_RATIOS['brief'], cancel_token)
+    except OperationCancelled as e:
+        raise OperationCancelled(e.reason, finished)
+
+    return {
+        'detailed': "\n\n".join(summary for _, summary in detailed) + note,
+        'brief': "\n\n".join(summary for _, summary in brief) + note,
+        'tldr': "\n\n".join(summary for _, summary in tldr) + note,
+    }
+
+def _condense(parts, ratio, cancel_token=None):
+    """
+    Summarize intermediate (language, summary) parts further instead of
+    re-reading the source. Each language is condensed by its own model.
+    """
+    condensed = []
+    for language in dict.fromkeys(language for language, _ in parts):
+        intermediate = _clean_text(" ".join(summary for lang, summary in parts if lang == language))
+        word_count = len(intermediate.split())
+        if word_count < 40:
+            # Already about as short as the model would make it
+            condensed.extend(part for part in parts if part[0] == language)
+            continue
+        min_len, max_len = _length_params(word_count, ratio)
+        summarizer, prefix = _select_summarizer(language)
+        routed = [(language, chunk) for chunk in _chunk_for_model(intermediate, summarizer, prefix)]
+        result = _summarize_routed(routed, min_len, max_len, cancel_token)
+        condensed.extend(result or [part for part in parts if part[0] == language])
+    return condensed
+
+def _prepare_document(text, prefilter=None):
+    """
+    Returns (parsed document, note, language profile, sentence indexes) for
+    the input text. The indexes are the sentences the models will read:
+    all of them for short text, else the head up to MAX_CHAR_LIMIT or, with
+    prefilter, the most salient sentences that fit in MAX_CHAR_LIMIT.
+    """
+    if prefilter is None:
+        prefilter = PREFILTER_DEFAULT
 
-    # Choose summarizer and chunk by tokens only
+    # Profile the full document; cached by hash and shared with the TTS side
+    profile = detect_document_languages(text)
+
+    # Same cached parse the stats use
+    parsed = get_parsed_document(text)
+    if len(text) <= MAX_CHAR_LIMIT:
+        return parsed, "", profile, range(parsed.sentence_count)
+    if prefilter:
+        indexes = select_sentences(list(parsed.sentences()), char_budget=MAX_CHAR_LIMIT)
+        if indexes:
+            return parsed, PREFILTER_NOTE, profile, indexes
+    return parsed, TRUNCATION_NOTE, profile, range(parsed.sentences_before(MAX_CHAR_LIMIT))
+
+def _select_summarizer(language):
+    """Return (summarizer pipeline, input prefix) for a detected language"""
     if language == "hi":
-        summarizer = summarizer_hi
-        tokenizer = summarizer_hi.tokenizer
-        chunks = _chunk_text_tokenizer(text, tokenizer, max_tokens=900)
-        chunks = ["summarize: " + chunk for chunk in chunks]
+        return summarizer_hi, "summarize: "
+    return summarizer_en, ""
+
+def _chunk_for_model(text, summarizer, prefix):
+    """Chunk intermediate text (not a cached document) for a model"""
+    chunks = ParsedDocument(text).chunk_by_tokens(summarizer.tokenizer, max_tokens=900)
+    return [prefix + chunk for chunk in chunks]
+
+def _route_chunks(parsed, profile, indexes):
+    """
+    Chunk the selected sentences of the document with the right model's
+    tokenizer. Bilingual documents are split into per-language sentence
+    runs; single-language ones go to one model whole.
+    """
+    if profile["mixed"]:
+        runs = language_runs([parsed.sentence(index) for index in indexes])
     else:
-        summarizer = summarizer_en
-        tokenizer = summarizer_en.tokenizer
-        chunks = _chunk_text_tokenizer(text, tokenizer, max_tokens=900)
+        runs = [("hi" if profile["primary"] == "hi" else "en", 0, len(indexes))]
+    # A contiguous head is clipped at MAX_CHAR_LIMIT; a pre-filtered
+    # selection already fits
+    char_limit = MAX_CHAR_LIMIT if isinstance(indexes, range) else None
+    routed = []
+    for language, start, stop in runs:
+        summarizer, prefix = _select_summarizer(language)
+        chunks = parsed.chunk_by_tokens(summarizer.tokenizer, 900, indexes[start:stop], char_limit=char_limit)
+        routed.extend((language, prefix + chunk) for chunk in chunks)
+    return routed
+
+def _summarize_routed(routed, min_len, max_len, cancel_token=None):
+    """
+    Summarize (language, chunk) pairs, batching all chunks for the same model
+    together. Returns (language, summary) pairs in document order.
+
+    With micro-batching (SUMMARY_MICROBATCH), chunks go to the shared
+    batcher instead, so they also share forward passes with other requests
+    for the same model and lengths.
+
+    When cancel_token trips, raises OperationCancelled whose partial is the
+    pairs finished so far; unstarted work is dropped.
+    """
+    results = [None] * len(routed)
+
+    def finished():
+        return [(routed[i][0], summary) for i, summary in enumerate(results) if summary]
+
+    if MICROBATCH_ENABLED:
+        futures = [_submit_micro_batch(language, chunk, min_len, max_len) for language, chunk in routed]
+        try:
+            for index, future in enumerate(futures):
+                results[index] = wait_future(future, cancel_token)
+                report(cancel_token, 'summary', status='progress', done=index + 1, total=len(futures))
+        except OperationCancelled as e:
+            for index, future in enumerate(futures):
+                if not future.cancel() and future.done() and future.exception() is None:
+                    results[index] = future.result()
+            raise OperationCancelled(e.reason, finished())
+        return finished()
 
-    # Run summarizer on each chunk
+    by_language = {}
+    for index, (language, _) in enumerate(routed):
+        by_language.setdefault(language, []).append(index)
+
+    for language, indexes in by_language.items():
+        check(cancel_token, finished())
+        summarizer, _ = _select_summarizer(language)
+        logger.debug("Summarizing %d %s chunk(s) in one batch", len(indexes), language)
+        try:
+            summaries = _summarize_batch(summarizer, [routed[i][1] for i in indexes], min_len, max_len,
+                                         cancel_token=cancel_token)
+        except OperationCancelled as e:
+            for index, summary in zip(indexes, e.partial or []):
+                results[index] = summary
+            raise OperationCancelled(e.reason, finished())
+        for index, summary in zip(indexes, summaries):
+            results[index] = summary
+        report(cancel_token, 'summary', status='progress',
+               done=sum(1 for summary in results if summary is not None), total=len(routed))
+
+    return finished()
+
+def _iter_routed(routed, min_len, max_len, cancel_token=None):
+    """
+    Summarize (language, chunk) pairs one by one, yielding each summary
+    (None for a failed chunk) in document order. With micro-batching, all
+    chunks are queued at once; closing the generator drops unstarted ones.
+    """
+    if MICROBATCH_ENABLED:
+        futures = [_submit_micro_batch(language, chunk, min_len, max_len) for language, chunk in routed]
+        try:
+            for future in futures:
+                yield wait_future(future, cancel_token)
+        finally:
+            for future in futures:
+                future.cancel()
+        return
+
+    for language, chunk in routed:
+        check(cancel_token)
+        summarizer, _ = _select_summarizer(language)
+        yield _summarize_chunks(summarizer, [chunk], min_len, max_len)[0]
+
+def _submit_micro_batch(language, chunk, min_len, max_len):
+    """Queue one chunk on the shared batcher; returns its Future"""
+    summarizer, _ = _select_summarizer(language)
+    tokens = len(summarizer.tokenizer.encode(chunk))
+    return get_summary_batcher().submit(_run_micro_batch, (language, min_len, max_len), chunk, tokens)
+
+def _run_micro_batch(key, chunks):
+    """Batcher runner: one padded forward pass over chunks from any requests"""
+    language, min_len, max_len = key
+    summarizer, _ = _select_summarizer(language)
+    logger.debug("Summarizing %d %s chunk(s) in one micro-batch", len(chunks), language)
+    return _summarize_batch(summarizer, chunks, min_len, max_len, batch_size=len(chunks))
+
+def _summarize_batch(summarizer, chunks, min_len, max_len, batch_size=SUMMARY_BATCH_SIZE, cancel_token=None):
+    """Run one batched call; fall back to per-chunk calls if the batch fails"""
+    if len(chunks) > 1:
+        try:
+            outputs = summarizer(chunks, min_length=min_len, max_length=max_len, do_sample=False,
+                                 batch_size=batch_size)
+            return [output['summary_text'].strip() for output in outputs]
+        except Exception as e:
+            logger.warning("Batched summarization failed, retrying per chunk: %s", e)
+    return _summarize_chunks(summarizer, chunks, min_len, max_len, cancel_token)
+
+def _summarize_chunks(summarizer, chunks, min_len, max_len, cancel_token=None):
+    """Run summarizer on each chunk; failed chunks come back as None"""
     all_summaries = []
     for i, chunk in enumerate(chunks):
-        print(f"Summarizing chunk {i+1}/{len(chunks)}...")
+        # Unfinished chunks are dropped; the finished ones go up as partial
+        check(cancel_token, all_summaries)
+        logger.debug("Summarizing chunk %d/%d", i + 1, len(chunks))
         try:
             summary = summarizer(chunk, min_length=min_len, max_length=max_len, do_sample=False)[0]['summary_text']
             all_summaries.append(summary.strip())
         except Exception as e:
-            print(f"Summarization error on chunk: {e}")
-            continue
-
-    final_summary = "\n\n".join(all_summaries)
-
-    # Append truncation note if needed
-    if truncated:
-        final_summary += "\n\n(Note: Original text was truncated for performance.)"
-
-    return final_summary
+            logger.error("Summarization error on chunk: %s", e)
+            all_summaries.append(None)
+    return all_summaries
 
 def _get_dynamic_params(text, summary_type):
     """Return dynamic min/max lengths based on type and input length"""
     word_count = len(text.split())
 
-    # Estimate summary length based on type
-    if summary_type == 'tldr':
-        ratio = 0.15  # 15%
-    elif summary_type == 'brief':
-        ratio = 0.45  # 45%
-    else:  # 'detailed'
-        ratio = 0.70  # 70%
+    # Estimate summary length based on type ('detailed' for anything unknown)
+    ratio = SUMMARY_RATIOS.get(summary_type, SUMMARY_RATIOS['detailed'])
+    return _length_params(word_count, ratio)
 
+def _length_params(word_count, ratio):
+    """Min/max generation lengths for a target ratio of word_count"""
     # Huggingface models use tokens, but for rough estimate, use words
     # Clamp max_len to not exceed input length or 512
     max_len = int(word_count * ratio)
@@ -119,26 +459,3 @@ def _get_dynamic_params(text, summary_type):
 #         chunks.append(current_chunk.strip())
 
 #     return chunks
-
-def _clean_text(text):
-    """Basic cleaning of the text"""
-    text = re.sub(r'\s+', ' ', text)  # Normalize whitespace
-    return text.strip()
-
-def _chunk_text_tokenizer(text, tokenizer, max_tokens=900):
-    """Chunk text so that each chunk is <= max_tokens tokens for the model."""
-    sentences = re.split(r'(?<=[.!?]) +', text)
-    chunks = []
-    current_chunk = ""
-    for sentence in sentences:
-        test_chunk = (current_chunk + " " + sentence).strip()
-        num_tokens = len(tokenizer.encode(test_chunk))
-        if num_tokens <= max_tokens:
-            current_chunk = test_chunk
-        else:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            current_chunk = sentence
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-    return chunks
\ No newline at end of file
@@ -0,0 +1,17 @@
+"""
+Text cleaning and chunking helpers used by the summary service.
+
+Kept free of model imports so they can be used (and benchmarked) without
+loading the summarization pipelines.
+"""
+import re
+from services.document_model import ParsedDocument
+
+def _clean_text(text):
+    """Basic cleaning of the text"""
+    text = re.sub(r'\s+', ' ', text)  # Normalize whitespace
+    return text.strip()
+
+def _chunk_text_tokenizer(text, tokenizer, max_tokens=900):
+    """Chunk text so that each chunk is <= max_tokens tokens for the model."""
+    return ParsedDocument(text).chunk_by_tokens(tokenizer, max_tokens=max_tokens)
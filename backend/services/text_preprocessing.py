@@ -0,0 +1,150 @@
+"""
+Per-language text preprocessing for TTS input.
+
+Each language has a Preprocessor built once at import time. Every step
+runs in C: Unicode normalization (skipped when the text is already
+normalized), one precompiled regex for character fixes (zero-width
+characters, soft hyphens, ligatures, curly quotes), precompiled line rules
+for PDF artifacts (line-break hyphenation, explicit page-label lines),
+str.replace for punctuation spacing and a split/join whitespace collapse.
+
+The steps are deliberately separate passes: each pattern starts with a
+literal character class so re can skip ahead, which a single alternation of
+all rules loses (fused, the same rules ran several times slower).
+
+Preprocessors work on whole texts or on streamed chunks (process_stream),
+with the same output either way.
+"""
+import re
+import unicodedata
+
+# Characters that never help TTS: zero-width (non-)joiners/spaces, BOM, soft hyphen
+_DROP_CHARS = '\u200b\u200c\u200d\u2060\ufeff\u00ad'
+
+# PDF ligatures and typographic characters with plain equivalents
+_PLAIN_CHARS = {
+    '\ufb00': 'ff', '\ufb01': 'fi', '\ufb02': 'fl', '\ufb03': 'ffi', '\ufb04': 'ffl',
+    '\ufb05': 'st', '\ufb06': 'st',
+    '\u2018': "'", '\u2019': "'", '\u201c': '"', '\u201d': '"',
+}
+
+CHAR_MAP = dict(_PLAIN_CHARS, **{ch: '' for ch in _DROP_CHARS})
+_CHAR_RE = re.compile('[' + ''.join(CHAR_MAP) + ']')
+
+# Words split across lines by hyphenation: "exam-\nple" -> "example"
+HYPHENATION_RE = re.compile(r'-(?<=[A-Za-z]-)[ \t]*\r?\n[ \t]*(?=[a-z])')
+
+# A line holding only an explicit page label: "Page 12", "Page 3 of 10",
+# "3 of 10", "- 4 -". Bare numbers are kept (table cells, answers); page
+# numbers in PDFs are left to services.boilerplate, which sees the pages
+PAGE_NUMBER_RE = re.compile(r'\n[ \t]*(?:(?i:page)[ \t]+\d{1,3}(?:[ \t]+(?i:of)[ \t]+\d{1,3})?'
+                            r'|\d{1,3}[ \t]+(?i:of)[ \t]+\d{1,3}|-[ \t]*\d{1,3}[ \t]*-)[ \t]*(?=\r?\n|\Z)')
+
+# Buffer size after which a stream is cut at whitespace even without a newline
+STREAM_FLUSH_CHARS = 64 * 1024
+
+# Trailing characters ignored when checking whether a line ends with a hyphen
+_CUT_SKIP_CHARS = ' \t\r' + _DROP_CHARS
+
+def _fix_char(match):
+    return CHAR_MAP[match.group()]
+
+def _stream_cut(buffer):
+    """Where to cut a stream buffer, or 0 to keep buffering"""
+    end = buffer.rfind('\n')
+    while end > 0:
+        cut = buffer.rfind('\n', 0, end)
+        if cut <= 0:
+            break
+        before = cut
+        while before > 0 and buffer[before - 1] in _CUT_SKIP_CHARS:
+            before -= 1
+        if buffer[before - 1] != '-':
+            # Before the whole line break, so "\r\n" is not split
+            return cut - 1 if buffer[cut - 1] == '\r' else cut
+        end = cut
+    if len(buffer) > STREAM_FLUSH_CHARS:
+        return buffer.rfind(' ') + 1
+    return 0
+
+class Preprocessor:
+    """Precompiled text preprocessor for one language"""
+
+    def __init__(self, name, line_rules=(), spaced_chars='', normalize=None):
+        """
+        Args:
+            name (str): Language key, e.g. "en"
+            line_rules (tuple): Compiled patterns whose matches are removed
+            spaced_chars (str): Characters to surround with spaces
+            normalize (str): Optional unicodedata normalization form
+        """
+        self.name = name
+        self.line_rules = tuple(line_rules)
+        self.spacing = tuple((ch, f' {ch} ') for ch in spaced_chars)
+        self.normalize = normalize
+
+    def _process(self, text):
+        """All steps except the final strip; edge whitespace is kept as one space"""
+        if self.normalize and not unicodedata.is_normalized(self.normalize, text):
+            text = unicodedata.normalize(self.normalize, text)
+        text = _CHAR_RE.sub(_fix_char, text)
+        for rule in self.line_rules:
+            text = rule.sub('', text)
+        for ch, spaced in self.spacing:
+            text = text.replace(ch, spaced)
+        collapsed = ' '.join(text.split())
+        if not collapsed:
+            return ' ' if text else ''
+        return (' ' if text[0].isspace() else '') + collapsed + (' ' if text[-1].isspace() else '')
+
+    def __call__(self, text):
+        # Leading newline so a page number on the first line is a "line" too
+        return self._process('\n' + text).strip()
+
+    def process_stream(self, chunks):
+        """
+        Preprocess an iterable of text chunks, yielding output pieces.
+
+        Input is cut just before a newline whose following line is complete
+        and which does not end a hyphenated word, so every rule sees whole
+        lines; joined, the pieces equal __call__ on the concatenated input.
+        """
+        buffer = '\n'
+        pending_space = False
+        started = False
+        for chunk in chunks:
+            buffer += chunk
+            cut = _stream_cut(buffer)
+            if not cut:
+                continue
+            piece, buffer = buffer[:cut], buffer[cut:]
+            out, pending_space, started = self._join(self._process(piece), pending_space, started)
+            if out:
+                yield out
+        out, _, _ = self._join(self._process(buffer), pending_space, started)
+        if out:
+            yield out
+
+    @staticmethod
+    def _join(out, pending_space, started):
+        """Carry one trailing space between pieces so joins stay single-spaced"""
+        stripped = out.strip(' ')
+        if not stripped:
+            return '', pending_space or bool(out), started
+        if started and (pending_space or out[0] == ' '):
+            stripped = ' ' + stripped
+        return stripped, out[-1] == ' ', True
+
+PREPROCESSORS = {
+    'en': Preprocessor('en', line_rules=(HYPHENATION_RE, PAGE_NUMBER_RE)),
+    'hi': Preprocessor('hi', line_rules=(PAGE_NUMBER_RE,), spaced_chars='।,?!', normalize='NFC'),
+}
+
+def get_preprocessor(language):
+    """
+    Return the preprocessor for a voice language code (e.g. "hi-in", "en-us").
+
+    Unknown languages use the English rules.
+    """
+    key = language.lower().split('-')[0] if language else 'en'
+    return PREPROCESSORS.get(key, PREPROCESSORS['en'])
@@ -1,68 +1,131 @@
 from PyPDF2 import PdfReader
-from docx import Document
+import logging
 import os
 import re
+import zipfile
+from xml.etree import ElementTree
+from services.document_model import get_parsed_document
+from services.boilerplate import PAGE_BREAK
+
+logger = logging.getLogger(__name__)
 
 # Try to import magic, but provide fallback if not available
 try:
     import magic
     MAGIC_AVAILABLE = True
 except ImportError:
-    print("Warning: python-magic not available, using file extension detection")
+    logger.warning("python-magic not available, using file extension detection")
     MAGIC_AVAILABLE = False
 
 def extract_text_from_pdf(file_path):
-    """Extract text from PDF files"""
+    """Extract text from PDF files; pages are separated by PAGE_BREAK lines"""
     try:
         reader = PdfReader(file_path)
-        text = ""
+        pages = []
         for page in reader.pages:
             try:
                 page_text = page.extract_text()
                 if page_text:
-                    text += page_text + "\n"
+                    pages.append(page_text)
             except:
                 continue
+        # Page breaks let the boilerplate stage find running headers/footers
+        text = f"\n{PAGE_BREAK}\n".join(pages) + "\n" if pages else ""
         
         if len(text.strip()) < 50:
             return "Error: This PDF appears to be image-based. Please convert to text-based PDF or use a different file format."
             
         return text
     except Exception as e:
-        print(f"PDF extraction error: {e}")
+        logger.error("PDF extraction error: %s", e)
         return f"Error extracting PDF: {str(e)}"
 
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+_DOCX_PART_RE = re.compile(r'word/(header|footer)(\d*)\.xml$')
+
+def _iter_docx_part(source):
+    """
+    Stream the non-empty paragraphs of one DOCX XML part in document order.
+
+    Paragraphs are emitted as soon as they close and then cleared, so memory
+    stays flat for large documents. Table cells continued by a vertical merge
+    and mc:Fallback copies of text boxes are skipped, so merged cells and
+    text boxes appear once.
+    """
+    stack = []
+    merged_cells = []  # per open w:tc: True if it continues a vertical merge
+    fallback_depth = 0
+    for event, elem in ElementTree.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            if elem.tag == _W + 'tc':
+                merged_cells.append(False)
+            elif elem.tag == _MC_FALLBACK:
+                fallback_depth += 1
+            continue
+
+        stack.pop()
+        tag = elem.tag
+        if tag == _W + 'vMerge' and merged_cells:
+            merged_cells[-1] = elem.get(_W + 'val', 'continue') != 'restart'
+        elif tag == _W + 'tc':
+            merged_cells.pop()
+        elif tag == _MC_FALLBACK:
+            fallback_depth -= 1
+        elif tag == _W + 'p':
+            if not fallback_depth and not (merged_cells and merged_cells[-1]):
+                parts = []
+                for node in elem.iter():
+                    if node.tag == _W + 't':
+                        parts.append(node.text or '')
+                    elif node.tag == _W + 'tab':
+                        parts.append('\t')
+                    elif node.tag in (_W + 'br', _W + 'cr'):
+                        parts.append('\n')
+                text = ''.join(parts)
+                if text.strip():
+                    yield text
+            elem.clear()
+        else:
+            continue
+        # Drop finished block-level elements from their parent as well
+        if tag in (_W + 'p', _W + 'tbl') and stack:
+            stack[-1].remove(elem)
+
+def iter_docx_text(file_path):
+    """
+    Yield the text of a DOCX file paragraph by paragraph.
+
+    The body comes first in document order (tables inline where they
+    appear), followed by headers and footers. Header/footer parts with
+    identical text, as is usual across sections, are emitted once.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        with archive.open('word/document.xml') as part:
+            yield from _iter_docx_part(part)
+
+        extra_parts = []
+        for name in archive.namelist():
+            match = _DOCX_PART_RE.match(name)
+            if match:
+                kind, number = match.groups()
+                extra_parts.append((kind != 'header', int(number or 0), name))
+
+        seen = set()
+        for _, _, name in sorted(extra_parts):
+            with archive.open(name) as part:
+                paragraphs = tuple(_iter_docx_part(part))
+            if paragraphs and paragraphs not in seen:
+                seen.add(paragraphs)
+                yield from paragraphs
+
 def extract_text_from_docx(file_path):
-    """Enhanced DOCX extraction with tables/headers"""
+    """Streaming DOCX extraction with tables/headers (see iter_docx_text)"""
     try:
-        doc = Document(file_path)
-        text = []
-        
-        # Paragraphs
-        for para in doc.paragraphs:
-            if para.text.strip():
-                text.append(para.text)
-        
-        # Tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        if paragraph.text.strip():
-                            text.append(paragraph.text)
-        
-        # Headers/Footers
-        for section in doc.sections:
-            for header in section.header.paragraphs:
-                if header.text.strip():
-                    text.append(header.text)
-            for footer in section.footer.paragraphs:
-                if footer.text.strip():
-                    text.append(footer.text)
-                    
-        return "\n".join(text)
+        return "\n".join(iter_docx_text(file_path))
     except Exception as e:
-        print(f"DOCX extraction error: {e}")
+        logger.error("DOCX extraction error: %s", e)
         return ""
 
 def extract_text(file_path):
@@ -78,7 +141,7 @@ def extract_text(file_path):
             try:
                 file_type = magic.from_file(file_path, mime=True)
             except Exception as e:
-                print(f"Magic detection failed: {e}, falling back to extension")
+                logger.warning("Magic detection failed: %s, falling back to extension", e)
                 file_type = ""
         
         # Handle based on file type or extension
@@ -99,49 +162,13 @@ def extract_text(file_path):
             return "Error: Unsupported file format. Please upload PDF, DOCX, or TXT files."
             
     except Exception as e:
-        print(f"Text extraction error: {e}")
+        logger.error("Text extraction error: %s", e)
         return f"Error extracting text: {str(e)}"
 
-def estimate_processing_time(text_content):
-    """Estimate processing time based on content length"""
-    if not text_content:
-        return 10
-    
-    word_count = len(text_content.split())
-    
-    # Base time estimates (in seconds)
-    base_time = 5
-    word_processing_time = word_count * 0.02  # 0.02 seconds per word
-    ai_processing_time = min(30, word_count * 0.05)  # AI processing, capped at 30s
-    
-    total_time = base_time + word_processing_time + ai_processing_time
-    return int(total_time)
-
 def get_text_statistics(text_content):
     """Get comprehensive text statistics"""
     if not text_content:
         return {"words": 0, "characters": 0, "sentences": 0, "paragraphs": 0}
     
-    # Count words
-    words = len(text_content.split())
-    
-    # Count characters
-    characters = len(text_content)
-    
-    # Count sentences (basic sentence detection)
-    sentences = len(re.findall(r'[.!?]+', text_content))
-    
-    # Count paragraphs
-    paragraphs = len([p for p in text_content.split('\n') if p.strip()])
-    
-    # Reading time estimate (average 200 words per minute)
-    reading_time_minutes = max(1, words // 200)
-    
-    return {
-        "words": words,
-        "characters": characters,
-        "sentences": sentences,
-        "paragraphs": paragraphs,
-        "reading_time_minutes": reading_time_minutes,
-        "complexity": "Simple" if words < 500 else "Medium" if words < 2000 else "Complex"
-    }
+    # Counts come from the cached parsed document (sentences include । and ॥)
+    return get_parsed_document(text_content).statistics()
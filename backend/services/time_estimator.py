@@ -0,0 +1,174 @@
+"""
+Processing-time estimates learned from measured stage timings.
+
+Each stage keeps one linear model per key, seconds = intercept + slope * size:
+
+- "extract": key = file type, size = pages
+- "summary": key = model and summary type (e.g. "en:brief"), size = input tokens
+- "tts": key = voice (e.g. "en-us:female"), size = characters
+
+Models are fitted by weighted least squares over exponentially decayed
+sums, so they follow the hardware they run on and recent load. A fixed
+prior (the old hand-tuned figures) stands in until real samples
+outweigh it. The sums live in the shared-state backend, so every worker
+learns from every other, and with the file or redis backend they
+survive restarts.
+"""
+import logging
+import math
+import threading
+import time
+
+from services.boilerplate import PAGE_BREAK
+
+logger = logging.getLogger(__name__)
+
+# (intercept seconds, seconds per unit, typical size) per stage
+PRIORS = {
+    'extract': (0.1, 0.15, 10),
+    'summary': (2.0, 0.02, 1000),
+    'tts': (1.0, 0.005, 2000),
+}
+# The prior counts as this many observations: enough to fit a line before
+# any samples exist, little enough that a few samples override it
+PRIOR_WEIGHT = 0.5
+# Each new sample scales the weight of older ones by this (about 50 samples of memory)
+DECAY = 0.98
+MIN_SECONDS = 0.05
+# How long a worker trusts its copy of a model before re-reading it
+REFRESH_SECONDS = 30
+
+# Characters summarization reads (summary_service.MAX_CHAR_LIMIT; not
+# imported here because that module loads the models)
+SUMMARY_INPUT_CHARS = 7500
+CHARS_PER_TOKEN = 4
+# Characters per page for formats without page breaks
+PAGE_CHARS = 3000
+
+def summary_tokens(characters):
+    """Approximate input tokens the summarizer reads for a text of this length"""
+    return min(characters, SUMMARY_INPUT_CHARS) / CHARS_PER_TOKEN
+
+def summary_model_key(profile, summary_type):
+    """Model key for a language profile (detect_document_languages) and summary type"""
+    if profile is None:
+        model = 'en'
+    elif profile.get("mixed"):
+        model = 'mixed'
+    else:
+        model = 'hi' if profile.get("primary") == 'hi' else 'en'
+    return f"{model}:{summary_type}"
+
+def page_count(text, file_type):
+    """Pages of extracted text: PDF page breaks, else PAGE_CHARS per page"""
+    if file_type == 'pdf':
+        return text.count(PAGE_BREAK) + 1
+    return max(1, math.ceil(len(text) / PAGE_CHARS))
+
+def _prior_sums(prior):
+    """Sums for PRIOR_WEIGHT points on the prior line, at 0.5x and 1.5x the typical size"""
+    intercept, slope, typical = prior
+    w = PRIOR_WEIGHT
+    return {
+        "w": w,
+        "sx": w * typical,
+        "sy": w * (intercept + slope * typical),
+        "sxx": w * 1.25 * typical * typical,
+        "sxy": w * (intercept * typical + slope * 1.25 * typical * typical),
+    }
+
+def fit(sums, prior):
+    """(intercept, slope) of the weighted least-squares line through the prior and samples"""
+    total = _prior_sums(prior)
+    for name in total:
+        total[name] += (sums or {}).get(name, 0.0)
+    w, sx, sy, sxx, sxy = total["w"], total["sx"], total["sy"], total["sxx"], total["sxy"]
+    denominator = w * sxx - sx * sx
+    slope = (w * sxy - sx * sy) / denominator if denominator > 0 else prior[1]
+    if slope < 0:
+        # Bigger inputs never get faster; fall back to the mean
+        return sy / w, 0.0
+    intercept = (sy - slope * sx) / w
+    if intercept < 0:
+        # Fit through the origin instead
+        return 0.0, sxy / sxx
+    return intercept, slope
+
+class ProcessingTimeEstimator:
+    """Online per-stage time models shared through a state backend"""
+
+    namespace = 'timings'
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._cache = {}  # "stage:key" -> (sums, fetched_at)
+        self._lock = threading.Lock()
+
+    def _sums(self, name):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(name)
+        if cached and now - cached[1] < REFRESH_SECONDS:
+            return cached[0]
+        sums = self.backend.get(self.namespace, name)
+        with self._lock:
+            self._cache[name] = (sums, now)
+        return sums
+
+    def predict(self, stage, key, size):
+        """Expected seconds for one unit of work"""
+        intercept, slope = fit(self._sums(f"{stage}:{key}"), PRIORS[stage])
+        return max(MIN_SECONDS, intercept + slope * size)
+
+    def observe(self, stage, key, size, seconds):
+        """Fold one measured timing into the stage's model"""
+        def fold(sums):
+            sums = dict(sums or {"w": 0.0, "sx": 0.0, "sy": 0.0, "sxx": 0.0, "sxy": 0.0, "samples": 0})
+            for name in ("w", "sx", "sy", "sxx", "sxy"):
+                sums[name] *= DECAY
+            sums["w"] += 1.0
+            sums["sx"] += size
+            sums["sy"] += seconds
+            sums["sxx"] += size * size
+            sums["sxy"] += size * seconds
+            sums["samples"] += 1
+            sums["last_seconds"] = seconds
+            return sums
+
+        name = f"{stage}:{key}"
+        try:
+            sums = self.backend.update(self.namespace, name, fold)
+        except Exception as e:
+            logger.error("Error recording %s timing: %s", name, e)
+            return
+        with self._lock:
+            self._cache[name] = (sums, time.monotonic())
+
+    def task_timing(self, stage, key, size):
+        """
+        WorkScheduler.submit() keyword arguments for a task: its expected
+        run time (for queue projections) and a callback recording the
+        measured one.
+        """
+        return {
+            "expected_seconds": self.predict(stage, key, size),
+            "on_timed": lambda seconds: self.observe(stage, key, size, seconds),
+        }
+
+    def models(self):
+        """Current coefficients and sample counts per stage and key"""
+        result = []
+        for name, sums in sorted(self.backend.items(self.namespace)):
+            stage, _, key = name.partition(':')
+            if stage not in PRIORS:
+                continue
+            intercept, slope = fit(sums, PRIORS[stage])
+            result.append({
+                "stage": stage,
+                "key": key,
+                "intercept_s": round(intercept, 4),
+                "per_unit_s": round(slope, 6),
+                "samples": sums.get("samples", 0),
+                "last_seconds": sums.get("last_seconds"),
+            })
+        return result
@@ -0,0 +1,298 @@
+"""
+Upload tracking log, rotated into segments, with precomputed rollups.
+
+Every upload appends one line to the active segment, _file_tracking.txt
+in the upload folder:
+
+    filename|path|timestamp|file type|bytes|extraction seconds
+
+The first three fields are the original format; extraction seconds are
+empty when extraction failed. Once the active segment reaches
+SEGMENT_BYTES it is renamed to _file_tracking.<time>.txt. Only the newest
+MAX_SEGMENTS rotated segments are kept.
+
+Each record is also folded into rollups in the shared-state backend. There
+is one key per UTC day, holding hourly buckets (uploads, bytes, types,
+extraction times), and an "all" key with the all-time totals and a
+version counter. Analytics queries read at most one key per day in their
+range, never the log. The version gives cheap ETags: a dashboard refresh
+with no new uploads is answered 304 after one small read.
+"""
+import hashlib
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+ACTIVE_SEGMENT = '_file_tracking.txt'
+SEGMENT_PREFIX = '_file_tracking'
+SEGMENT_BYTES = int(os.environ.get('TRACKING_SEGMENT_BYTES', 1024 * 1024))
+MAX_SEGMENTS = int(os.environ.get('TRACKING_MAX_SEGMENTS', 10))
+# Daily rollups older than this are dropped by maintenance (the all-time
+# totals keep counting)
+ROLLUP_RETENTION_DAYS = int(os.environ.get('TRACKING_ROLLUP_DAYS', 400))
+MAX_QUERY_DAYS = 366
+DEFAULT_QUERY_DAYS = 7
+
+def is_tracking_log(filename):
+    """True for the active segment, rotated segments and their lock file"""
+    return filename.startswith(SEGMENT_PREFIX)
+
+def parse_time(value):
+    """Epoch seconds or an ISO 8601 date/time (naive means UTC) to a UTC datetime; ValueError if neither"""
+    try:
+        return datetime.fromtimestamp(float(value), timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        pass
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+def _empty_bucket():
+    return {"uploads": 0, "bytes": 0, "max_bytes": 0, "types": {}, "extracted": 0, "extract_seconds": 0.0,
+            "failed": 0}
+
+def _add_record(bucket, file_type, size, seconds, failed):
+    bucket["uploads"] += 1
+    bucket["bytes"] += size
+    bucket["max_bytes"] = max(bucket["max_bytes"], size)
+    bucket["types"][file_type] = bucket["types"].get(file_type, 0) + 1
+    if failed:
+        bucket["failed"] += 1
+    elif seconds is not None:
+        bucket["extracted"] += 1
+        bucket["extract_seconds"] += seconds
+
+def _merge(bucket, other):
+    bucket["uploads"] += other["uploads"]
+    bucket["bytes"] += other["bytes"]
+    bucket["max_bytes"] = max(bucket["max_bytes"], other["max_bytes"])
+    for file_type, count in other["types"].items():
+        bucket["types"][file_type] = bucket["types"].get(file_type, 0) + count
+    bucket["extracted"] += other["extracted"]
+    bucket["extract_seconds"] += other["extract_seconds"]
+    bucket["failed"] += other["failed"]
+
+def summarize(bucket):
+    """Client-facing figures for a rollup bucket"""
+    return {
+        "uploads": bucket["uploads"],
+        "bytes": bucket["bytes"],
+        "avg_bytes": round(bucket["bytes"] / bucket["uploads"]) if bucket["uploads"] else 0,
+        "max_bytes": bucket["max_bytes"],
+        "types": bucket["types"],
+        "avg_extract_seconds": round(bucket["extract_seconds"] / bucket["extracted"], 3) if bucket["extracted"] else None,
+        "failed": bucket["failed"],
+    }
+
+class TrackingLog:
+    """Rotated upload log plus per-hour rollups in a state backend"""
+
+    namespace = 'rollups'
+
+    def __init__(self, directory, backend):
+        self.directory = directory
+        self.backend = backend
+        self._lock = threading.Lock()
+
+    @property
+    def active_path(self):
+        return os.path.join(self.directory, ACTIVE_SEGMENT)
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock on the log across threads and processes (appends and rotation)"""
+        with self._lock, open(os.path.join(self.directory, SEGMENT_PREFIX + '.lock'), 'a') as lock_file:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def record(self, filename, file_path, size, seconds=None):
+        """
+        Log one upload and fold it into the rollups.
+
+        Args:
+            filename (str): Stored upload name
+            file_path (str): Where the upload was saved
+            size (int): Upload size in bytes
+            seconds (float): Extraction time, or None if extraction failed
+        """
+        file_type = filename.rsplit('.', 1)[-1].lower() if '.' in filename else 'unknown'
+        now = datetime.now()
+        line = f"{filename}|{file_path}|{now}|{file_type}|{size}|{'' if seconds is None else round(seconds, 3)}\n"
+        try:
+            with self._locked():
+                with open(self.active_path, 'a') as f:
+                    f.write(line)
+                if os.path.getsize(self.active_path) >= SEGMENT_BYTES:
+                    self._rotate()
+        except OSError as e:
+            logger.error("Error writing tracking log: %s", e)
+        try:
+            self._fold({now.astimezone(timezone.utc): [(file_type, size, seconds, seconds is None)]})
+        except Exception as e:
+            logger.error("Error updating tracking rollups: %s", e)
+
+    def _rotate(self):
+        """Rename the active segment and drop the oldest rotated ones (lock held)"""
+        rotated = os.path.join(self.directory, f"{SEGMENT_PREFIX}.{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.txt")
+        os.replace(self.active_path, rotated)
+        logger.info("Rotated tracking log to %s", rotated)
+        for path in self.segments()[:-MAX_SEGMENTS]:
+            os.remove(path)
+            logger.info("Deleted old tracking segment: %s", path)
+
+    def segments(self):
+        """Segment paths, oldest first, ending with the active segment if it exists"""
+        rotated = sorted(os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                         if name.startswith(SEGMENT_PREFIX + '.') and name.endswith('.txt') and name != ACTIVE_SEGMENT)
+        if os.path.exists(self.active_path):
+            rotated.append(self.active_path)
+        return rotated
+
+    def read_all(self):
+        """Raw text of every kept segment, oldest first"""
+        parts = []
+        for path in self.segments():
+            try:
+                with open(path, 'r') as f:
+                    parts.append(f.read())
+            except FileNotFoundError:
+                pass  # rotated away meanwhile
+        return "".join(parts)
+
+    def _fold(self, records):
+        """Add {utc hour datetime: [(type, size, seconds, failed)]} to the daily rollups and the totals"""
+        by_day = {}
+        for moment, items in records.items():
+            hours = by_day.setdefault(moment.strftime('%Y-%m-%d'), {})
+            bucket = hours.setdefault(moment.strftime('%H'), _empty_bucket())
+            for record in items:
+                _add_record(bucket, *record)
+
+        total = _empty_bucket()
+        for day, hours in by_day.items():
+            def merge_day(value, hours=hours):
+                value = value or {"hours": {}}
+                for hour, bucket in hours.items():
+                    _merge(value["hours"].setdefault(hour, _empty_bucket()), bucket)
+                return value
+            self.backend.update(self.namespace, day, merge_day)
+            for bucket in hours.values():
+                _merge(total, bucket)
+
+        def merge_total(value):
+            value = value or dict(_empty_bucket(), version=0)
+            _merge(value, total)
+            value["version"] += 1
+            return value
+        self.backend.update(self.namespace, 'all', merge_total)
+
+    def version(self):
+        """Changes whenever a record is added (0 before the first)"""
+        totals = self.backend.get(self.namespace, 'all')
+        return totals["version"] if totals else 0
+
+    def etag(self, *parts):
+        """Weak ETag for a response built from the rollups and the given query parts"""
+        key = "|".join(str(part) for part in (self.version(),) + parts)
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+
+    def backfill(self):
+        """
+        Build rollups from existing segments (e.g. a log written before
+        rollups existed). Runs once: it only starts while no totals exist.
+        """
+        claimed = []
+
+        def claim(value):
+            claimed[:] = [value is None]
+            return value or dict(_empty_bucket(), version=0)
+
+        self.backend.update(self.namespace, 'all', claim)
+        if not claimed[0]:
+            return 0
+        records = {}
+        count = 0
+        for line in self.read_all().splitlines():
+            fields = line.split('|')
+            if len(fields) < 3:
+                continue
+            try:
+                # Timestamps are local time, as written by datetime.now()
+                moment = datetime.fromisoformat(fields[2].strip()).astimezone(timezone.utc)
+            except ValueError:
+                continue
+            filename = fields[0]
+            file_type = fields[3] if len(fields) > 3 and fields[3] else (
+                filename.rsplit('.', 1)[-1].lower() if '.' in filename else 'unknown')
+            size = int(fields[4]) if len(fields) > 4 and fields[4].isdigit() else 0
+            # Original-format lines carry no extraction outcome
+            seconds = float(fields[5]) if len(fields) > 5 and fields[5] else None
+            failed = len(fields) > 5 and not fields[5]
+            hour = moment.replace(minute=0, second=0, microsecond=0)
+            records.setdefault(hour, []).append((file_type, size, seconds, failed))
+            count += 1
+        if records:
+            self._fold(records)
+            logger.info("Backfilled tracking rollups from %d log lines", count)
+        return count
+
+    def query(self, start, end, bucket='day'):
+        """
+        Rollups for uploads in [start, end) at hour or day granularity.
+
+        Args:
+            start (datetime): Range start (UTC); rounded down to the hour
+            end (datetime): Range end (UTC, exclusive)
+            bucket (str): 'hour' or 'day'
+
+        Returns:
+            dict: {"totals", "series"}; series lists non-empty buckets oldest first
+        """
+        start = start.replace(minute=0, second=0, microsecond=0)
+        series = {}
+        total = _empty_bucket()
+        day = start.replace(hour=0)
+        while day < end:
+            rollup = self.backend.get(self.namespace, day.strftime('%Y-%m-%d'))
+            for hour, counts in sorted((rollup or {}).get("hours", {}).items()):
+                moment = day.replace(hour=int(hour))
+                if not start <= moment < end:
+                    continue
+                label = moment if bucket == 'hour' else day
+                _merge(series.setdefault(label, _empty_bucket()), counts)
+                _merge(total, counts)
+            day += timedelta(days=1)
+        return {
+            "totals": summarize(total),
+            "series": [dict(summarize(counts), start=moment.isoformat()) for moment, counts in sorted(series.items())],
+        }
+
+    def all_time(self):
+        totals = self.backend.get(self.namespace, 'all')
+        return summarize(totals or _empty_bucket())
+
+    def prune(self, max_days=ROLLUP_RETENTION_DAYS):
+        """Drop daily rollups older than max_days"""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=max_days)).strftime('%Y-%m-%d')
+        removed = 0
+        for key, _ in self.backend.items(self.namespace):
+            if key != 'all' and key < cutoff:
+                self.backend.delete(self.namespace, key)
+                removed += 1
+        return removed
@@ -0,0 +1,404 @@
+"""
+Latency-aware TTS dispatch with hedging and a local fallback engine.
+
+The primary engine is edge-tts (run on the shared TTS engine loop). If it
+has not finished within a latency budget (its 95th-percentile time per
+character for the text's length, once HEDGE_MIN_SAMPLES runs have been
+measured; no hedging before that), a hedged synthesis is started on
+a pool of worker processes that each keep one pre-initialized pyttsx3
+engine, and whichever finishes first wins. A circuit breaker stops sending
+work to edge-tts after repeated failures and routes straight to the local
+pool until a trial request succeeds again.
+
+pyttsx3 writes WAV (AIFF on macOS), not MP3. When ffmpeg is available the
+local engine's audio is transcoded to MP3 like edge-tts output; otherwise
+the file keeps its real format and audio_mimetype() reports it when served.
+
+Settings (environment variables):
+    TTS_HEDGING                 "0" disables hedging and fallback (default "1")
+    TTS_HEDGE_MIN_BUDGET        minimum seconds before hedging (default 4)
+    LOCAL_TTS_WORKERS           local engine worker processes (default 2)
+    TTS_BREAKER_THRESHOLD       consecutive failures that open the breaker (default 3)
+    TTS_BREAKER_RESET           seconds before a half-open trial (default 60)
+    FFMPEG_PATH                 ffmpeg binary for transcoding (default: found on PATH)
+"""
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from services.cancellation import OperationCancelled, check, wait_future
+
+logger = logging.getLogger(__name__)
+
+HEDGING_ENABLED = os.environ.get('TTS_HEDGING', '1') != '0'
+MIN_BUDGET = float(os.environ.get('TTS_HEDGE_MIN_BUDGET', 4))
+# Primary runs measured before a latency budget is trusted enough to hedge
+HEDGE_MIN_SAMPLES = 10
+LOCAL_WORKERS = int(os.environ.get('LOCAL_TTS_WORKERS', 2))
+BREAKER_THRESHOLD = int(os.environ.get('TTS_BREAKER_THRESHOLD', 3))
+BREAKER_RESET = float(os.environ.get('TTS_BREAKER_RESET', 60))
+FFMPEG = os.environ.get('FFMPEG_PATH') or shutil.which('ffmpeg')
+
+LOCAL_SPEECH_RATE = 150
+
+_local_engine = None
+_local_voice_cache = {}
+
+def _init_local_engine():
+    """Worker initializer: create the pyttsx3 engine once per process"""
+    global _local_engine
+    try:
+        import pyttsx3
+        _local_engine = pyttsx3.init()
+        _local_engine.setProperty('rate', LOCAL_SPEECH_RATE)
+    except Exception as e:
+        logger.warning("Local TTS engine unavailable in worker %d: %s", os.getpid(), e)
+        _local_engine = None
+
+def _select_local_voice(language):
+    """Best-effort pick of an installed voice matching the language code"""
+    if language in _local_voice_cache:
+        return _local_voice_cache[language]
+    voice_id = None
+    prefix = language.split('-')[0].lower()
+    try:
+        for voice in _local_engine.getProperty('voices'):
+            tags = [str(l).lower() for l in (getattr(voice, 'languages', None) or [])]
+            tags.append(str(voice.id).lower())
+            if any(language.lower() in t or t.startswith(prefix) for t in tags):
+                voice_id = voice.id
+                break
+    except Exception:
+        pass
+    _local_voice_cache[language] = voice_id
+    return voice_id
+
+def _local_synthesize(text, output_path, language):
+    """Runs inside a worker process; returns output_path on success"""
+    if _local_engine is None:
+        raise RuntimeError("Local TTS engine is not available")
+    voice_id = _select_local_voice(language)
+    if voice_id:
+        _local_engine.setProperty('voice', voice_id)
+    _local_engine.save_to_file(text, output_path)
+    _local_engine.runAndWait()
+    if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+        raise RuntimeError("Local TTS engine produced no audio")
+    return output_path
+
+def _ping():
+    return os.getpid()
+
+# (chunk id, form type, mimetype) of the containers pyttsx3 writes
+_AUDIO_HEADERS = (
+    (b'RIFF', b'WAVE', 'audio/wav'),
+    (b'FORM', b'AIFF', 'audio/aiff'),
+    (b'FORM', b'AIFC', 'audio/aiff'),
+)
+
+def audio_mimetype(path):
+    """Mimetype of a WAV or AIFF file from its header, else None"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(12)
+    except OSError:
+        return None
+    for chunk_id, form_type, mimetype in _AUDIO_HEADERS:
+        if header[:4] == chunk_id and header[8:12] == form_type:
+            return mimetype
+    return None
+
+def finish_local_audio(local_path, output_path):
+    """
+    Move a local engine file into place, transcoding it to MP3 when
+    output_path is an .mp3 and ffmpeg is available. Without ffmpeg the
+    file keeps its real format (see audio_mimetype).
+    """
+    if FFMPEG and output_path.endswith('.mp3'):
+        mp3_path = f"{output_path}.local.mp3"
+        try:
+            subprocess.run([FFMPEG, '-y', '-loglevel', 'error', '-i', local_path, '-f', 'mp3', mp3_path],
+                           check=True, stdin=subprocess.DEVNULL, capture_output=True)
+            os.replace(mp3_path, output_path)
+            os.remove(local_path)
+            return
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.warning("Transcoding local TTS audio failed, keeping %s: %s", audio_mimetype(local_path), e)
+            try:
+                os.remove(mp3_path)
+            except OSError:
+                pass
+    os.replace(local_path, output_path)
+
+class LocalTTSPool:
+    """Process pool whose workers each hold an initialized pyttsx3 engine"""
+
+    def __init__(self, workers=LOCAL_WORKERS):
+        self.workers = max(1, workers)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                context = multiprocessing.get_context('spawn')
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    initializer=_init_local_engine,
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def warm_up(self):
+        """Start every worker now so the first hedge doesn't pay engine init"""
+        executor = self._get_executor()
+        for future in [executor.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+
+    def submit(self, text, output_path, language):
+        """Returns a Future resolving to output_path"""
+        return self._get_executor().submit(_local_synthesize, text, output_path, language)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half-open)"""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, reset_timeout=BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.time() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._trial_in_progress = False
+            if self.state == 'half_open' and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_progress = False
+            if self.state == 'half_open' or self.failures >= self.threshold:
+                if self.state != 'open':
+                    logger.warning("TTS circuit breaker opened after %d failures", self.failures)
+                self.state = 'open'
+                self.opened_at = time.time()
+
+class HedgedTTSDispatcher:
+    """
+    Run a primary TTS engine with a latency budget, hedging to the local pool.
+
+    Args:
+        primary: Callable (text, voice_name, output_path, cancel_token) ->
+            Future that resolves to the output path, or None on failure
+        local_pool (LocalTTSPool): Pool used for hedges and fallbacks
+    """
+
+    def __init__(self, primary, local_pool=None, breaker=None):
+        self.primary = primary
+        self.local_pool = local_pool or LocalTTSPool()
+        self.breaker = breaker or CircuitBreaker()
+        self._latencies = deque(maxlen=200)  # primary seconds per character
+        self._lock = threading.Lock()
+        self.counters = {"primary": 0, "hedge_started": 0, "hedge_won": 0, "fallback": 0, "failed": 0}
+
+    def latency_budget(self, text_length):
+        """
+        Seconds to wait for the primary before firing a hedge, scaled with
+        the text length; None (never hedge) until HEDGE_MIN_SAMPLES primary
+        runs have been measured
+        """
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        p95_per_char = samples[int(len(samples) * 0.95) - 1]
+        return max(MIN_BUDGET, p95_per_char * text_length * 1.2)
+
+    def _count(self, key):
+        with self._lock:
+            self.counters[key] += 1
+
+    def _watch_primary(self, future, started, text_length):
+        """Feed the breaker and latency window once the primary finishes"""
+        def done(f):
+            if f.cancelled() or isinstance(f.exception(), OperationCancelled):
+                return  # stopped on request, says nothing about the engine
+            if f.exception() is None and f.result() is not None:
+                self.breaker.record_success()
+                with self._lock:
+                    self._latencies.append((time.time() - started) / max(1, text_length))
+            else:
+                self.breaker.record_failure()
+        future.add_done_callback(done)
+
+    @staticmethod
+    def _remove_quietly(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _discard_loser(self, future, path, decision, name):
+        """Delete path once future finishes, unless it produced the winning file"""
+        def done(_):
+            if decision.get('winner') not in (None, name):
+                self._remove_quietly(path)
+        future.add_done_callback(done)
+
+    @staticmethod
+    def _succeeded(future):
+        return future.exception() is None and future.result() is not None
+
+    def synthesize_local(self, text, output_path, language, cancel_token=None):
+        """
+        Synthesize with the local engine only (see finish_local_audio).
+
+        Returns:
+            str or None: 'local', or None if the engine failed
+        """
+        temp_path = f"{output_path}.local.wav"
+        future = self.local_pool.submit(text, temp_path, language)
+        try:
+            wait_future(future, cancel_token)
+            finish_local_audio(temp_path, output_path)
+            return 'local'
+        except OperationCancelled:
+            # A started local synthesis can't be interrupted; drop its file
+            future.add_done_callback(lambda _: self._remove_quietly(temp_path))
+            raise
+        except Exception as e:
+            logger.error("Local TTS fallback failed: %s", e)
+            self._remove_quietly(temp_path)
+            self._count("failed")
+            return None
+
+    def synthesize(self, text, voice_name, output_path, language, cancel_token=None):
+        """
+        Synthesize text to output_path.
+
+        Raises OperationCancelled if cancel_token trips; partial files are
+        removed and no fallback is started.
+
+        Returns:
+            str or None: 'primary' or 'local' for the engine that produced
+            the file, None if both failed
+        """
+        if not HEDGING_ENABLED:
+            result = wait_future(self.primary(text, voice_name, output_path, cancel_token), cancel_token)
+            return 'primary' if result is not None else None
+
+        if not self.breaker.allow_request():
+            logger.info("TTS circuit breaker open, using local engine")
+            self._count("fallback")
+            return self.synthesize_local(text, output_path, language, cancel_token)
+
+        # Each engine writes to its own temp file; the winner is renamed into place
+        decision = {'winner': None}
+        primary_path = f"{output_path}.edge.part"
+        started = time.time()
+        primary_future = self.primary(text, voice_name, primary_path, cancel_token)
+        self._watch_primary(primary_future, started, len(text))
+        self._discard_loser(primary_future, primary_path, decision, 'primary')
+
+        def stop_if_cancelled(futures):
+            try:
+                check(cancel_token)
+            except OperationCancelled:
+                decision['winner'] = 'none'
+                for future in futures:
+                    future.cancel()
+                    if future.done():
+                        self._remove_quietly(paths_by_future[future])
+                raise
+
+        paths_by_future = {primary_future: primary_path}
+        budget = self.latency_budget(len(text))
+        hedge_at = float('inf') if budget is None else time.time() + budget
+        while not primary_future.done() and time.time() < hedge_at:
+            wait([primary_future], timeout=min(0.25, max(0.0, hedge_at - time.time())))
+            stop_if_cancelled([primary_future])
+        if primary_future.done():
+            if isinstance(primary_future.exception(), OperationCancelled):
+                stop_if_cancelled([primary_future])
+            if self._succeeded(primary_future):
+                decision['winner'] = 'primary'
+                os.replace(primary_path, output_path)
+                self._count("primary")
+                return 'primary'
+            decision['winner'] = 'local'
+            self._remove_quietly(primary_path)
+            logger.warning("Primary TTS failed, falling back to local engine")
+            self._count("fallback")
+            return self.synthesize_local(text, output_path, language, cancel_token)
+
+        logger.info("Primary TTS exceeded %.1fs budget, starting hedged local synthesis", budget)
+        self._count("hedge_started")
+        local_path = f"{output_path}.local.wav"
+        local_future = self.local_pool.submit(text, local_path, language)
+        self._discard_loser(local_future, local_path, decision, 'local')
+        paths_by_future[local_future] = local_path
+
+        paths = {primary_future: ('primary', primary_path), local_future: ('local', local_path)}
+        pending = set(paths)
+        while pending:
+            finished, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+            stop_if_cancelled(list(paths))
+            for future in finished:
+                if not self._succeeded(future):
+                    continue
+                name, path = paths[future]
+                decision['winner'] = name
+                if name == 'local':
+                    finish_local_audio(path, output_path)
+                else:
+                    os.replace(path, output_path)
+                # A loser that already finished missed the discard callback
+                for other, (_, other_path) in paths.items():
+                    if other is not future and other.done():
+                        self._remove_quietly(other_path)
+                self._count("primary" if name == 'primary' else "hedge_won")
+                return name
+        decision['winner'] = 'none'
+        for _, path in paths.values():
+            self._remove_quietly(path)
+        self._count("failed")
+        return None
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            "hedging_enabled": HEDGING_ENABLED,
+            "breaker_state": self.breaker.state,
+            "latency_budget_s": self.latency_budget(1000),
+            "counters": counters,
+        }
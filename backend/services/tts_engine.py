@@ -0,0 +1,139 @@
+"""
+Long-lived asyncio engine for edge-tts work.
+
+A single background thread owns one event loop for the lifetime of the
+process. Flask threads hand coroutines to it through submit(), which
+returns a concurrent.futures.Future, so overlapping requests run
+concurrently on the same loop instead of each paying for asyncio.run().
+
+In-flight work is capped by a semaphore, and pending jobs are queued per
+key (the voice name) and dispatched round-robin so one voice with a deep
+backlog cannot starve the others.
+"""
+import asyncio
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get('TTS_MAX_CONCURRENCY', 4))
+
+class TTSEngine:
+    """Background event loop with bounded, per-key fair concurrency"""
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        self.max_concurrency = max(1, max_concurrency)
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._pid = None
+        self._queues = OrderedDict()  # key -> deque of pending jobs
+        self._tasks = set()
+        self._in_flight = 0
+
+    def _ensure_started(self):
+        """Start the loop thread on first use (and again after a fork)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            ready = threading.Event()
+            self._loop = asyncio.new_event_loop()
+            self._queues = OrderedDict()
+            self._tasks = set()
+            self._in_flight = 0
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run_loop, args=(ready,), name="tts-engine", daemon=True)
+            self._thread.start()
+            ready.wait()
+
+    def _run_loop(self, ready):
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._work_available = asyncio.Event()
+        self._loop.create_task(self._dispatch())
+        self._loop.call_soon(ready.set)
+        self._loop.run_forever()
+
+    def submit(self, key, coro_func, *args):
+        """
+        Schedule coro_func(*args) on the engine loop.
+
+        Args:
+            key (str): Fairness key, normally the voice name
+            coro_func: Coroutine function to run
+            *args: Arguments for coro_func
+
+        Returns:
+            concurrent.futures.Future: Resolves to the coroutine's result
+        """
+        self._ensure_started()
+        future = Future()
+        self._loop.call_soon_threadsafe(self._enqueue, key, (future, coro_func, args))
+        return future
+
+    def run(self, key, coro_func, *args, timeout=None):
+        """Blocking helper: submit() and wait for the result"""
+        return self.submit(key, coro_func, *args).result(timeout=timeout)
+
+    def _enqueue(self, key, job):
+        self._queues.setdefault(key, deque()).append(job)
+        self._work_available.set()
+
+    def _next_job(self):
+        """Pop the next job, rotating through keys round-robin"""
+        if not self._queues:
+            return None
+        key, queue = next(iter(self._queues.items()))
+        job = queue.popleft()
+        # Move this key to the back so other keys go next
+        del self._queues[key]
+        if queue:
+            self._queues[key] = queue
+        return job
+
+    async def _dispatch(self):
+        while True:
+            await self._work_available.wait()
+            await self._semaphore.acquire()
+            job = self._next_job()
+            if job is None:
+                self._semaphore.release()
+                self._work_available.clear()
+                continue
+            task = asyncio.ensure_future(self._execute(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, job):
+        future, coro_func, args = job
+        try:
+            if not future.set_running_or_notify_cancel():
+                return
+            self._in_flight += 1
+            try:
+                future.set_result(await coro_func(*args))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self._in_flight -= 1
+        finally:
+            self._semaphore.release()
+
+    def stats(self):
+        """Current load: in-flight count and queued jobs per key"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "queued": {key: len(queue) for key, queue in list(self._queues.items())},
+        }
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_tts_engine():
+    """Return the process-wide TTS engine"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = TTSEngine()
+        return _engine
@@ -1,11 +1,17 @@
+import logging
 import os
-import asyncio
 import edge_tts
-import pyttsx3
 import time
 import pdfplumber  # Add this import
-import unicodedata
-import re
+import threading
+from services.tts_engine import get_tts_engine
+from services.tts_dispatcher import HedgedTTSDispatcher
+from services.language_detection import detect_document_languages
+from services.document_model import get_parsed_document
+from services.text_preprocessing import PREPROCESSORS, get_preprocessor
+from services.cancellation import OperationCancelled, check, report
+
+logger = logging.getLogger(__name__)
 
 # Voice options mapping - Added child voice
 VOICE_MAP = {
@@ -22,6 +28,9 @@ VOICE_MAP = {
 DEFAULT_LANGUAGE = "en-us"
 DEFAULT_GENDER = "female"
 
+# Max characters per edge-tts request; longer texts are split at sentences
+TTS_SEGMENT_CHARS = int(os.environ.get("TTS_SEGMENT_CHARS", 4000))
+
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..'))
 
 AUDIO_OUTPUT_DIR = os.path.join(BASE_DIR, 'audio_outputs')
@@ -39,21 +48,61 @@ def extract_text_from_pdf(pdf_path):
                     text += page_text + "\n"
         return text.strip()
     except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
+        logger.error("Error extracting text from PDF: %s", e)
         return None
 
-async def _edge_tts_convert(text, voice_name, output_path):
+async def _edge_tts_convert(text, voice_name, output_path, cancel_token=None):
     """Internal async function to handle Edge TTS conversion"""
     try:
-        print(f"Converting text with voice {voice_name}, saving to {output_path}")
-        communicate = edge_tts.Communicate(text, voice_name)
-        await communicate.save(output_path)
-        print(f"Audio saved successfully to {output_path}")
+        logger.debug("Converting text with voice %s, saving to %s", voice_name, output_path)
+        # Long texts are sent as sentence-aligned segments from the parsed
+        # document and the audio is appended to one file
+        segments = get_parsed_document(text).tts_segments(TTS_SEGMENT_CHARS)
+        with open(output_path, 'wb') as audio_file:
+            for index, segment in enumerate(segments):
+                check(cancel_token)
+                communicate = edge_tts.Communicate(segment, voice_name)
+                async for chunk in communicate.stream():
+                    # Leaving the loop closes the edge-tts session
+                    check(cancel_token)
+                    if chunk["type"] == "audio":
+                        audio_file.write(chunk["data"])
+                report(cancel_token, 'audio', status='progress', done=index + 1, total=len(segments),
+                       voice=voice_name)
+        logger.info("Audio saved to %s", output_path)
         return output_path
+    except OperationCancelled as e:
+        logger.info("Edge TTS conversion for %s stopped: %s", output_path, e.reason)
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
     except Exception as e:
-        print(f"Error in edge TTS conversion: {e}")
+        logger.error("Error in edge TTS conversion: %s", e)
         return None
 
+def _submit_edge_tts(text, voice_name, output_path, cancel_token=None):
+    """Primary engine for the dispatcher: edge-tts on the shared engine loop"""
+    return get_tts_engine().submit(voice_name, _edge_tts_convert, text, voice_name, output_path, cancel_token)
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def get_tts_dispatcher():
+    """Return the process-wide hedged TTS dispatcher, warming the local pool"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = HedgedTTSDispatcher(_submit_edge_tts)
+            threading.Thread(target=_warm_up_local_pool, args=(_dispatcher.local_pool,), daemon=True).start()
+        return _dispatcher
+
+def _warm_up_local_pool(pool):
+    try:
+        pool.warm_up()
+        logger.info("Local TTS pool ready (%d workers)", pool.workers)
+    except Exception as e:
+        logger.warning("Local TTS pool warm-up failed: %s", e)
+
 # Add this function to normalize and pre-process Hindi text
 def prepare_hindi_text(text):
     """
@@ -65,20 +114,26 @@ def prepare_hindi_text(text):
     Returns:
         str: Normalized text ready for TTS processing
     """
-    # Normalize Unicode to NFC form (canonical composition)
-    normalized = unicodedata.normalize('NFC', text)
-    
-    # Remove zero-width joiners and non-joiners that might cause issues
-    normalized = re.sub(r'[\u200c\u200d]', '', normalized)
-    
-    # Ensure proper spacing around special characters
-    normalized = re.sub(r'([।,?!])', r' \1 ', normalized)
-    normalized = re.sub(r'\s+', ' ', normalized).strip()
+    # NFC, zero-width removal and punctuation/whitespace spacing in one
+    # precompiled pass (see services.text_preprocessing)
+    return PREPROCESSORS['hi'](text)
+
+def prepare_text_for_language(text, language):
+    """
+    Apply the language-specific TTS pre-processing for a voice language.
     
-    return normalized
+    Args:
+        text (str): Extracted document text
+        language (str): Language code (e.g., "en-us", "hi-in")
+        
+    Returns:
+        str: Text ready to pass to text_to_speech(..., prepared=True)
+    """
+    return get_preprocessor(language)(text)
 
 # Update the text_to_speech function to handle Hindi text better
-def text_to_speech(text, output_file_path, language=DEFAULT_LANGUAGE, gender=DEFAULT_GENDER, use_edge_tts=True):
+def text_to_speech(text, output_file_path, language=DEFAULT_LANGUAGE, gender=DEFAULT_GENDER, use_edge_tts=True, prepared=False,
+                   cancel_token=None):
     """
     Convert text to speech and save as audio file
     
@@ -88,6 +143,9 @@ def text_to_speech(text, output_file_path, language=DEFAULT_LANGUAGE, gender=DEF
         language (str): Language code (e.g., "en-us", "hi-in")
         gender (str): Voice gender ("male", "female", or "child")
         use_edge_tts (bool): Whether to use Edge TTS (True) or pyttsx3 (False)
+        prepared (bool): Text already went through prepare_text_for_language
+        cancel_token (CancelToken): Stops synthesis between audio chunks;
+            OperationCancelled is raised to the caller
     
     Returns:
         bool: True if successful, False otherwise
@@ -97,37 +155,39 @@ def text_to_speech(text, output_file_path, language=DEFAULT_LANGUAGE, gender=DEF
         os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
         
         # Pre-process Hindi text if needed
-        if language.lower() == "hi-in":
-            text = prepare_hindi_text(text)
+        if not prepared:
+            text = prepare_text_for_language(text, language)
         
-        # Log the text length being processed
-        text_preview = text[:100] + "..." if len(text) > 100 else text
-        print(f"Processing text ({len(text)} chars): {text_preview}")
+        # Text previews only at debug level
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Processing text (%d chars): %s", len(text), text[:100] + "..." if len(text) > 100 else text)
         
         # Use Edge TTS for better quality and language support
         if use_edge_tts:
             voice_name = VOICE_MAP.get((language.lower(), gender.lower()))
             if not voice_name:
-                print(f"Unsupported language or gender combination: {language}, {gender}")
+                logger.warning("Unsupported language or gender combination: %s, %s", language, gender)
                 # Fallback to default voice
                 voice_name = VOICE_MAP.get((DEFAULT_LANGUAGE, DEFAULT_GENDER))
             
-            print(f"Selected voice: {voice_name} for language: {language}, gender: {gender}")
+            logger.debug("Selected voice %s for language %s, gender %s", voice_name, language, gender)
             
-            # Run the async function in the event loop
-            asyncio.run(_edge_tts_convert(text, voice_name, output_file_path))
-            return True
+            # edge-tts on the shared engine loop, hedged to the local engines when slow
+            engine_used = get_tts_dispatcher().synthesize(text, voice_name, output_file_path, language.lower(),
+                                                          cancel_token=cancel_token)
+            if engine_used == 'local':
+                logger.info("Audio for %s produced by the local fallback engine", output_file_path)
+            return engine_used is not None
         
-        # Fallback to pyttsx3 (original implementation)
+        # Local pyttsx3 engines, pre-initialized in worker processes
         else:
-            engine = pyttsx3.init()
-            engine.setProperty('rate', 150)  # Speed of speech
-            engine.save_to_file(text, output_file_path)
-            engine.runAndWait()
-            return True
+            return get_tts_dispatcher().synthesize_local(text, output_file_path, language.lower(),
+                                                         cancel_token=cancel_token) is not None
             
+    except OperationCancelled:
+        raise
     except Exception as e:
-        print(f"Error in text-to-speech conversion: {e}")
+        logger.exception("Error in text-to-speech conversion: %s", e)
         return False
 
 def get_available_languages():
@@ -139,6 +199,27 @@ def get_available_languages():
     """
     return list(VOICE_MAP.keys())
 
+def suggest_voices(text):
+    """
+    Suggest voices for a document, best match first.
+    
+    Uses the same cached language profile as the summary service, so a
+    bilingual document gets both Hindi and English voices.
+    
+    Args:
+        text (str): Extracted document text
+        
+    Returns:
+        tuple: (language profile dict, list of {"language", "gender"} dicts)
+    """
+    profile = detect_document_languages(text)
+    if profile["primary"] == "hi":
+        order = ["hi-in", "en-us", "en-gb"] if profile["mixed"] else ["hi-in"]
+    else:
+        order = ["en-us", "en-gb", "hi-in"] if profile["mixed"] else ["en-us", "en-gb"]
+    voices = sorted((key for key in VOICE_MAP if key[0] in order), key=lambda key: order.index(key[0]))
+    return profile, [{"language": language, "gender": gender} for language, gender in voices]
+
 def generate_audio_filename(text_source, language, gender):
     """
     Generate a unique filename for TTS output based on options
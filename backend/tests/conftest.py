@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+# Keep the suite's state, stored documents and bulk extraction out of the
+# checkout, and in-process so tests stay fast. Set before the app imports
+_TMP = tempfile.mkdtemp(prefix='dyslexofly-tests-')
+os.environ.setdefault('STATE_DIR', os.path.join(_TMP, 'state'))
+os.environ.setdefault('DOCUMENT_STORE_DIR', os.path.join(_TMP, 'document_store'))
+os.environ.setdefault('BULK_EXTRACT_PROCESSES', '0')
+os.environ.setdefault('BULK_MAX_BYTES', str(1024 * 1024))
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -0,0 +1,76 @@
+import io
+
+import pytest
+
+from app import create_app
+from benchmarks.corpus import write_pdf
+from services.boilerplate import PAGE_BREAK, strip_boilerplate
+
+SUBJECTS = ["Plants", "Leaves", "Roots", "Stems", "Seeds", "Flowers", "Insects", "Birds", "Rivers"]
+VERBS = ["turn light into energy", "hold the chlorophyll", "take up water", "carry sugars upward"]
+
+def body(page):
+    """Four body lines that differ from page to page"""
+    return [f"{SUBJECTS[page % len(SUBJECTS)]} {verb}." for verb in VERBS]
+
+def paged(pages):
+    return f"\n{PAGE_BREAK}\n".join('\n'.join(lines) for lines in pages) + "\n"
+
+def test_running_header_and_page_numbers_removed():
+    text = paged([["Biology Notes"] + body(page) + [str(page + 1)] for page in range(6)])
+    cleaned, report = strip_boilerplate(text)
+    assert "Biology Notes" not in cleaned
+    assert not any(line.strip().isdigit() for line in cleaned.split('\n'))
+    assert report["lines_removed"] == 12
+    assert all(line in cleaned for page in range(6) for line in body(page))
+
+def test_page_number_with_offset_removed():
+    text = paged([body(page) + [f"Unit 4 - {page + 37}"] for page in range(5)])
+    cleaned, _ = strip_boilerplate(text)
+    assert "Unit 4" not in cleaned
+
+@pytest.mark.parametrize('pages, headings', [
+    # A chapter opening every other page
+    ([([f"Chapter {page // 2 + 1}"] if page % 2 == 0 else []) + body(page) for page in range(6)],
+     ["Chapter 1", "Chapter 2", "Chapter 3"]),
+    # Two questions per page
+    ([[f"Question {2 * page + 1}"] + body(page) for page in range(4)],
+     ["Question 1", "Question 3", "Question 5", "Question 7"]),
+])
+def test_numbered_headings_kept(pages, headings):
+    cleaned, report = strip_boilerplate(paged(pages))
+    assert all(heading in cleaned for heading in headings)
+    assert report["lines_removed"] == 0
+
+def test_year_line_kept():
+    pages = [body(page) for page in range(4)]
+    pages[2] = ["1945"] + pages[2]
+    cleaned, report = strip_boilerplate(paged(pages))
+    assert "1945" in cleaned
+    assert report["lines_removed"] == 0
+
+@pytest.fixture
+def client(tmp_path):
+    app = create_app({'UPLOAD_FOLDER': str(tmp_path), 'STATE_BACKEND': 'memory'})
+    return app.test_client()
+
+@pytest.fixture
+def lesson_pdf(tmp_path):
+    path = tmp_path / 'lesson.pdf'
+    write_pdf(str(path), '\n'.join(body(page)[0] for page in range(120)), lines_per_page=40)
+    return path
+
+def test_document_text_has_no_page_breaks(client, lesson_pdf):
+    for url in ('/api/documents/lesson.pdf', '/api/documents/lesson.pdf/extracted-text'):
+        text = client.get(url).get_json()["text_content"]
+        assert "Plants turn light into energy." in text
+        assert PAGE_BREAK not in text
+
+def test_upload_text_has_no_page_breaks(client, lesson_pdf):
+    pytest.importorskip('edge_tts')
+    response = client.post('/api/upload', content_type='multipart/form-data',
+                           data={'file': (io.BytesIO(lesson_pdf.read_bytes()), 'upload.pdf')})
+    result = response.get_json()
+    assert response.status_code == 200, result
+    assert result["statistics"]["pages"] == 3
+    assert PAGE_BREAK not in result["text_content"]
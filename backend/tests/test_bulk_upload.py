@@ -0,0 +1,61 @@
+import io
+import time
+import zipfile
+
+import pytest
+
+from app import create_app
+from services.bulk_ingest import BULK_MAX_BYTES
+
+TEXT = "Photosynthesis converts light energy into chemical energy. Plants use it to make glucose. " * 30
+
+@pytest.fixture
+def client(tmp_path):
+    app = create_app({'UPLOAD_FOLDER': str(tmp_path), 'STATE_BACKEND': 'memory'})
+    return app.test_client()
+
+def wait_for_batch(client, batch_id, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        state = client.get(f'/api/upload/bulk/{batch_id}').get_json()
+        if state["status"] == 'complete':
+            return state
+        time.sleep(0.05)
+    raise AssertionError(f"batch {batch_id} did not finish")
+
+def test_bulk_upload_files_and_zip(client, tmp_path):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('unit/lesson1.txt', TEXT)
+        zf.writestr('unit/diagram.png', b'\x89PNG')
+        zf.writestr('__MACOSX/unit/._lesson1.txt', b'junk')
+    archive.seek(0)
+    response = client.post('/api/upload/bulk', content_type='multipart/form-data', data={
+        'files': [(io.BytesIO(TEXT.encode()), 'notes.txt'), (io.BytesIO(TEXT.encode()), 'notes.txt'),
+                  (archive, 'unit.zip')],
+    })
+    assert response.status_code == 202
+    body = response.get_json()
+    assert [document["fileId"] for document in body["documents"]] == ['notes.txt', 'notes-2.txt', 'lesson1.txt']
+    assert [entry["name"] for entry in body["skipped"]] == ['diagram.png']
+    assert (tmp_path / 'lesson1.txt').read_text() == TEXT
+
+    state = wait_for_batch(client, body["batchId"])
+    assert state["completed"] == 3 and state["failed"] == 0
+    assert all(document["characters"] == len(TEXT) for document in state["documents"])
+
+def test_bulk_upload_over_budget_is_rejected(client, tmp_path):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('first.txt', TEXT)
+        zf.writestr('bomb.txt', b'0' * (BULK_MAX_BYTES + 1))
+    archive.seek(0)
+    response = client.post('/api/upload/bulk', content_type='multipart/form-data',
+                           data={'files': [(archive, 'bomb.zip')]})
+    assert response.status_code == 413
+    assert not any(tmp_path.iterdir())
+
+def test_bulk_upload_without_documents(client):
+    response = client.post('/api/upload/bulk', content_type='multipart/form-data',
+                           data={'files': [(io.BytesIO(b'x'), 'scan.png')]})
+    assert response.status_code == 400
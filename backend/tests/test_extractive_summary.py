@@ -0,0 +1,20 @@
+import numpy as np
+
+from services.extractive_summary import rank_sentences, select_sentences
+
+SENTENCES = [
+    'The cat sat on the mat.',
+    'The cat sat on the mat today.',
+    'A cat and a dog are pets on a mat.',
+    'Dogs and cats sleep on the mat.',
+    'Quantum physics is hard.',
+]
+
+def test_isolated_sentence_ranks_last():
+    scores = rank_sentences(SENTENCES)
+    isolated = SENTENCES.index('Quantum physics is hard.')
+    assert np.argsort(scores)[0] == isolated
+    assert all(scores[isolated] < score for i, score in enumerate(scores) if i != isolated)
+
+def test_isolated_sentence_not_selected():
+    assert 4 not in select_sentences(SENTENCES, max_sentences=2)
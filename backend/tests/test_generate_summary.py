@@ -0,0 +1,44 @@
+import pytest
+
+import app as app_module
+import services.extractive_summary as extractive
+from app import create_app
+
+TEXT = "Photosynthesis converts light energy into chemical energy. Plants use it to make glucose. " * 5
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    (tmp_path / 'uploads').mkdir()
+    (tmp_path / 'audio').mkdir()
+    (tmp_path / 'uploads' / 'photosynthesis.txt').write_text(TEXT)
+    # generate_summary resolves uploads through the module setting
+    monkeypatch.setattr(app_module, 'UPLOAD_FOLDER', str(tmp_path / 'uploads'))
+    app = create_app({'UPLOAD_FOLDER': str(tmp_path / 'uploads'), 'AUDIO_OUTPUTS_DIR': str(tmp_path / 'audio'),
+                      'STATE_BACKEND': 'memory'})
+    hub = app.extensions['progress']
+    app.published = []
+    publish = hub.publish
+    def record(channels, event, **data):
+        app.published.append((event, data.get('status')))
+        return publish(channels, event, **data)
+    hub.publish = record
+    return app
+
+def summarize(app, summary_type):
+    response = app.test_client().post('/api/generate-summary', json={
+        'fileId': 'photosynthesis.txt', 'summaryType': summary_type, 'mode': 'extractive', 'requestId': 'job-1'})
+    return response.get_json()
+
+def test_extractive_summary_publishes_complete(app):
+    body = summarize(app, 'tldr')
+    assert body["success"], body
+    assert ('summary', 'complete') in app.published
+
+@pytest.mark.parametrize('summary_type', ['tldr', 'all'])
+def test_failed_extractive_summary_not_published_complete(app, monkeypatch, summary_type):
+    def fail(sentences, kind):
+        raise RuntimeError('ranking failed')
+    monkeypatch.setattr(extractive, 'extractive_summary', fail)
+    body = summarize(app, summary_type)
+    assert not body["success"]
+    assert ('summary', 'complete') not in app.published
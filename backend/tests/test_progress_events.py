@@ -0,0 +1,23 @@
+import importlib
+
+import pytest
+
+import services.progress_events as progress_events
+
+@pytest.fixture
+def reload_events(monkeypatch):
+    def reload(**env):
+        for name in ('PROGRESS_MAX_STREAMS', 'GUNICORN_THREADS'):
+            monkeypatch.delenv(name, raising=False)
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return importlib.reload(progress_events)
+    yield reload
+    monkeypatch.undo()
+    importlib.reload(progress_events)
+
+def test_stream_limit_sized_from_threads(reload_events):
+    assert reload_events().MAX_STREAMS == 24
+    assert reload_events(GUNICORN_THREADS='64').MAX_STREAMS == 56
+    assert reload_events(GUNICORN_THREADS='8').MAX_STREAMS == 4
+    assert reload_events(GUNICORN_THREADS='64', PROGRESS_MAX_STREAMS='10').MAX_STREAMS == 10
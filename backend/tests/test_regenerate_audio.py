@@ -0,0 +1,31 @@
+import pytest
+
+from app import create_app
+from services.speculative import get_speculative_pipeline, text_fingerprint
+
+TEXT = "Photosynthesis converts light energy into chemical energy. Plants use it to make glucose. " * 5
+
+@pytest.fixture
+def client(tmp_path):
+    (tmp_path / 'uploads').mkdir()
+    (tmp_path / 'audio').mkdir()
+    app = create_app({'UPLOAD_FOLDER': str(tmp_path / 'uploads'), 'AUDIO_OUTPUTS_DIR': str(tmp_path / 'audio'),
+                      'STATE_BACKEND': 'memory'})
+    return app.test_client()
+
+def test_speculative_audio_found_without_extension(client, tmp_path):
+    (tmp_path / 'uploads' / 'photosynthesis.txt').write_text(TEXT)
+    ready = tmp_path / 'audio' / 'photosynthesis_txt_en-us_female_1.mp3'
+    ready.write_bytes(b'ID3')
+    pipeline = get_speculative_pipeline()
+    job = pipeline.schedule('photosynthesis.txt', 'audio', ('en-us', 'female'), lambda cancel_token: str(ready),
+                            text_hash=text_fingerprint(TEXT))
+    assert job.finished.wait(5)
+    try:
+        response = client.post('/api/regenerate-audio', json={'fileId': 'photosynthesis', 'language': 'en-us',
+                                                              'gender': 'female'})
+        body = response.get_json()
+        assert body["success"], body
+        assert body["audioPath"].endswith('/api/audio/photosynthesis_txt_en-us_female_1.mp3')
+    finally:
+        pipeline.cancel('photosynthesis.txt')
@@ -0,0 +1,40 @@
+import threading
+import time
+
+import pytest
+
+from services.scheduler import WorkScheduler
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set()
+
+def submit_blocking(scheduler, release, seconds):
+    return scheduler.submit('tts', release.wait, expected_seconds=seconds)
+
+def wait_running(scheduler, count, timeout=5):
+    deadline = time.time() + timeout
+    while scheduler.metrics()['tts']['in_flight'] < count:
+        assert time.time() < deadline, "tasks did not start"
+        time.sleep(0.01)
+
+def test_idle_workers_mean_no_wait(release):
+    scheduler = WorkScheduler({'tts': 4})
+    submit_blocking(scheduler, release, 251)
+    wait_running(scheduler, 1)
+    assert scheduler.projected_wait('tts') == 0.0
+
+def test_full_lane_waits_for_first_free_worker(release):
+    scheduler = WorkScheduler({'tts': 4})
+    for seconds in (100, 200, 300, 400):
+        submit_blocking(scheduler, release, seconds)
+    wait_running(scheduler, 4)
+    submit_blocking(scheduler, release, 50)
+    submit_blocking(scheduler, release, 50)
+    # Queued tasks start at 100 and 150; the worker freed at 200 takes the new one
+    assert scheduler.projected_wait('tts') == pytest.approx(200, abs=1)
+    # Speculative queued work does not hold up interactive requests
+    scheduler.submit('tts', release.wait, request_class='speculative', expected_seconds=1000)
+    assert scheduler.projected_wait('tts') == pytest.approx(200, abs=1)
@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from services.text_preprocessing import PREPROCESSORS
+
+EN = PREPROCESSORS['en']
+
+TOKENS = ['a', 'exam', 'ple', '-', '\n', '\n', ' ', '\t', '\r\n', '12', 'Page 3', 'of 9',
+          '- 4 -', 'ﬁ', 'X', '.', '​']
+
+def _split(text, cuts):
+    bounds = [0] + sorted(cuts) + [len(text)]
+    return [text[i:j] for i, j in zip(bounds, bounds[1:])]
+
+def test_hyphen_join_stays_within_one_line_break():
+    out = EN('The results were mixed-\n\nnext section')
+    assert 'mixednext' not in out
+    assert EN('exam-\nple') == 'example'
+
+@pytest.mark.parametrize('language, text, expected', [
+    ('en', 'Table 2: Scores\nAlice\n42\nBob\n97\nThe answer is\n7\n',
+     'Table 2: Scores Alice 42 Bob 97 The answer is 7'),
+    ('hi', 'प्रश्न 1\n25\nउत्तर', 'प्रश्न 1 25 उत्तर'),
+])
+def test_bare_number_lines_kept(language, text, expected):
+    assert PREPROCESSORS[language](text) == expected
+
+def test_page_labels_removed():
+    assert EN('one\nPage 3 of 10\ntwo\n- 4 -\nthree\n5 of 9\nfour\npage 12') == 'one two three four'
+
+@pytest.mark.parametrize('chunks', [
+    ['word exam-\n\nple\nend'],
+    ['word exam-', '\n\nple\nend'],
+    ['word exam-\n', '\nple\n', 'end'],
+])
+def test_stream_matches_whole_text(chunks):
+    text = ''.join(chunks)
+    assert ''.join(EN.process_stream(chunks)) == EN(text)
+
+def test_stream_matches_whole_text_random():
+    rng = random.Random(38)
+    for name, preprocessor in PREPROCESSORS.items():
+        for _ in range(2000):
+            text = ''.join(rng.choice(TOKENS) for _ in range(rng.randint(0, 25)))
+            cuts = rng.sample(range(len(text) + 1), min(3, len(text) + 1))
+            whole = preprocessor(text)
+            assert ''.join(preprocessor.process_stream([text])) == whole, (name, text)
+            assert ''.join(preprocessor.process_stream(_split(text, cuts))) == whole, (name, text)
@@ -0,0 +1,16 @@
+import os
+
+import services.tracking_log as tracking_log
+from services.shared_state import MemoryBackend
+from services.tracking_log import TrackingLog
+
+def test_rotation_keeps_max_segments(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracking_log, 'SEGMENT_BYTES', 1)
+    monkeypatch.setattr(tracking_log, 'MAX_SEGMENTS', 3)
+    log = TrackingLog(str(tmp_path), MemoryBackend())
+    for n in range(6):
+        log.record(f"notes-{n}.txt", f"/uploads/notes-{n}.txt", 100, seconds=0.1)
+    segments = log.segments()
+    assert len(segments) == 3
+    assert not os.path.exists(log.active_path)
+    assert 'notes-5.txt' in log.read_all() and 'notes-2.txt' not in log.read_all()
@@ -0,0 +1,88 @@
+import shutil
+import threading
+import wave
+from concurrent.futures import Future
+
+import pytest
+
+import services.tts_dispatcher as tts_dispatcher
+from app import create_app
+from services.tts_dispatcher import CircuitBreaker, HedgedTTSDispatcher, audio_mimetype
+
+class WavPool:
+    """Local pool that writes one second of silence the way pyttsx3 does"""
+
+    def __init__(self):
+        self.paths = []
+
+    def submit(self, text, output_path, language):
+        self.paths.append(output_path)
+        with wave.open(output_path, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(16000)
+            f.writeframes(b'\0\0' * 16000)
+        future = Future()
+        future.set_result(output_path)
+        return future
+
+def failing_primary(text, voice_name, output_path, cancel_token):
+    future = Future()
+    future.set_result(None)
+    return future
+
+def slow_primary(seconds):
+    """Primary engine that writes its file after the given delay"""
+    def primary(text, voice_name, output_path, cancel_token):
+        future = Future()
+        def finish():
+            with open(output_path, 'wb') as f:
+                f.write(b'ID3')
+            future.set_result(output_path)
+        threading.Timer(seconds, finish).start()
+        return future
+    return primary
+
+@pytest.fixture
+def dispatcher():
+    return HedgedTTSDispatcher(failing_primary, local_pool=WavPool(), breaker=CircuitBreaker())
+
+def test_local_fallback_keeps_wav_without_ffmpeg(dispatcher, tmp_path, monkeypatch):
+    monkeypatch.setattr(tts_dispatcher, 'FFMPEG', None)
+    output_path = str(tmp_path / 'lesson_en-us_female_1.mp3')
+    assert dispatcher.synthesize('Hello there.', 'en-US-AriaNeural', output_path, 'en-us') == 'local'
+    assert dispatcher.local_pool.paths[0].endswith('.wav')
+    assert audio_mimetype(output_path) == 'audio/wav'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['lesson_en-us_female_1.mp3']
+
+    app = create_app({'AUDIO_OUTPUTS_DIR': str(tmp_path), 'STATE_BACKEND': 'memory'})
+    response = app.test_client().get('/api/audio/lesson_en-us_female_1.mp3')
+    assert response.status_code == 200
+    assert response.mimetype == 'audio/wav'
+    response.close()
+
+@pytest.mark.skipif(not shutil.which('ffmpeg'), reason='ffmpeg not installed')
+def test_local_audio_transcoded_with_ffmpeg(dispatcher, tmp_path, monkeypatch):
+    monkeypatch.setattr(tts_dispatcher, 'FFMPEG', shutil.which('ffmpeg'))
+    output_path = str(tmp_path / 'lesson.mp3')
+    assert dispatcher.synthesize_local('Hello there.', output_path, 'en-us') == 'local'
+    assert audio_mimetype(output_path) is None
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['lesson.mp3']
+
+def test_budget_scales_with_text_length():
+    dispatcher = HedgedTTSDispatcher(failing_primary, local_pool=WavPool(), breaker=CircuitBreaker())
+    assert dispatcher.latency_budget(50000) is None
+    dispatcher._latencies.extend([0.005] * 20)
+    assert dispatcher.latency_budget(50000) == pytest.approx(300)
+
+@pytest.mark.parametrize('samples', [0, 20])
+def test_primary_within_budget_is_not_hedged(tmp_path, monkeypatch, samples):
+    monkeypatch.setattr(tts_dispatcher, 'MIN_BUDGET', 0.05)
+    text = 'word ' * 10000
+    dispatcher = HedgedTTSDispatcher(slow_primary(0.3), local_pool=WavPool(), breaker=CircuitBreaker())
+    # Cold (no samples), or a primary running under its p95 rate per character
+    dispatcher._latencies.extend([0.5 / len(text)] * samples)
+    output_path = str(tmp_path / 'long.mp3')
+    assert dispatcher.synthesize(text, 'en-US-AriaNeural', output_path, 'en-us') == 'primary'
+    assert dispatcher.local_pool.paths == []
+    assert dispatcher.counters["hedge_started"] == 0
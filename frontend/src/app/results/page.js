@@ -10,6 +10,7 @@ import AudioPane from '@/components/AudioPane'
 import DownloadPackage from '@/components/DownloadPackage';
 import AdvancedDownloadPackage from '@/components/AdvancedDownloadPackage';
 import ResultsFloatingButtons from '@/components/ResultsFloatingButtons';
+import { followJobProgress, newRequestId, progressFraction } from '@/utils/progressEvents';
 
 const demoDocumentsData = {
   'science-textbook.pdf': {
@@ -263,7 +264,7 @@ function ResultsContent() {
     setCurrentPlayingIndex(index);
   };
 
-  const handleVoiceChange = async (newVoice) => {
+  const handleVoiceChange = async (newVoice, onProgress) => {
     const demoDoc = findDemoDocument(fileId);
     if (demoDoc) {
       const voiceOptions = demoDoc.voiceOptions;
@@ -282,6 +283,15 @@ function ResultsContent() {
       }
     }
 
+    // Live synthesis progress (one audio event per finished segment)
+    const requestId = newRequestId();
+    const stopEvents = followJobProgress(requestId, {
+      onEvent: (stage, data) => {
+        const fraction = stage === 'audio' && data.status === 'progress' ? progressFraction(data) : null;
+        if (fraction !== null) onProgress?.(fraction);
+      }
+    });
+
     try {
       console.log("Requesting audio regeneration with:", newVoice);
       const response = await fetch('https://dyslexofly.onrender.com/api/regenerate-audio', {
@@ -292,7 +302,8 @@ function ResultsContent() {
         body: JSON.stringify({
           fileId: fileId,
           language: newVoice.language,
-          gender: newVoice.gender
+          gender: newVoice.gender,
+          requestId
         }),
       });
 
@@ -310,6 +321,8 @@ function ResultsContent() {
     } catch (err) {
       console.error('Error regenerating audio', err);
       return Promise.reject(err);
+    } finally {
+      stopEvents();
     }
   };
 
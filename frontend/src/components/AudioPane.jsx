@@ -337,26 +337,29 @@ export default function AudioPane({ audioUrl, onPlayingIndexChange, textContent,
     setIsProcessing(true);
     setProcessingProgress(0);
     
-    // Calculate estimated time based on text length
+    // Estimated progress from the text length, shown only until live
+    // progress events arrive (or throughout, if they are unavailable)
     const estimatedTime = Math.max(5, Math.min(30, words.length * 0.1)); // 5-30 seconds
     const startTime = Date.now();
+    clearInterval(progressInterval.current);
     
     progressInterval.current = setInterval(() => {
-      setProcessingProgress(prev => {
-        const elapsed = (Date.now() - startTime) / 1000;
-        const timeBasedProgress = (elapsed / estimatedTime) * 100;
-        
-        if (timeBasedProgress >= 100) {
-          clearInterval(progressInterval.current);
-          setIsProcessing(false);
-          setProcessingProgress(100);
-        }
-        
-        return Math.min(100, timeBasedProgress);
-      });
+      const elapsed = (Date.now() - startTime) / 1000;
+      setProcessingProgress(Math.min(95, (elapsed / estimatedTime) * 100));
     }, 100);
     
-    onVoiceChange(newVoice);
+    const onProgress = (fraction) => {
+      clearInterval(progressInterval.current);
+      setProcessingProgress(Math.round(fraction * 100));
+    };
+    
+    Promise.resolve(onVoiceChange?.(newVoice, onProgress))
+      .catch(() => {})
+      .finally(() => {
+        clearInterval(progressInterval.current);
+        setIsProcessing(false);
+        setProcessingProgress(100);
+      });
   };
   
   // Play or pause audio
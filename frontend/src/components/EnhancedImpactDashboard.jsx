@@ -25,13 +25,12 @@ export default function EnhancedImpactDashboard({ isVisible, onClose }) {
     const loadRealData = async () => {
       try {
 
-        const response = await fetch('https://dyslexofly.onrender.com/api/file-tracking')
+        // Precomputed rollups; unchanged data comes back as a 304 via the ETag
+        const response = await fetch('https://dyslexofly.onrender.com/api/analytics')
         if (response.ok) {
           const result = await response.json()
-          const trackingData = result.data || ''
-          const lines = trackingData.split('\n').filter(line => line.trim())
 
-          const documentsProcessed = lines.length
+          const documentsProcessed = result.all_time ? result.all_time.uploads : 0
           const audioGenerated = documentsProcessed * 3.2 // Average audio per document
           const summariesCreated = documentsProcessed * 3 // 3 summary types per document
           const timesSaved = documentsProcessed * 15 // Average 15 minutes saved per document
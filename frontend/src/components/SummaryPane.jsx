@@ -5,6 +5,7 @@ import { motion, AnimatePresence } from 'framer-motion';
 import { useAccessibility } from './AccessibilityProvider';
 import { DocumentStateManager } from '@/utils/documentStateManager';
 import { summaryCache } from '@/utils/githubData';
+import { followJobProgress, newRequestId, progressFraction } from '@/utils/progressEvents';
 
 // Global state for summaries accessible by other components
 const globalSummaryState = {
@@ -366,33 +367,15 @@ export default function SummarySection({ fileId, initialSummaries }) {
       return;
     }
     
-    // Mark file as checked BEFORE the request
-    console.log(`📋 FILE CHECK: Making API call to check file existence for ${fileId}`);
+    // Mark file as checked BEFORE the request. The summary request itself
+    // reports a missing document, so no separate existence check is made
     checkedFiles[fileId] = true;
     setFileChecked(true);
+    setFileExists(true);
     
-    fetch('https://dyslexofly.onrender.com/api/check-file', {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ fileId })
-    })
-    .then(res => res.json())
-    .then(data => {
-      setFileExists(data.exists);
-      
-      if (data.exists) {
-      // Auto-generate TL;DR first, then others on demand
-      console.log(`📋 AUTO-GENERATING: Starting TL;DR summary for ${fileId}`);
-      generateSummary('tldr');
-      } else {
-      console.log(`📋 FILE NOT FOUND: ${fileId} does not exist on server`);
-      }
-    })
-    .catch(err => {
-      console.error(`❌ Check failed for ${fileId}:`, err);
-      setFileExists(false);
-      setError("Failed to verify document");
-    });
+    // Auto-generate TL;DR first, then others on demand
+    console.log(`📋 AUTO-GENERATING: Starting TL;DR summary for ${fileId}`);
+    generateSummary('tldr');
   }, [fileId]);
   
   // Helper to map between UI and API types
@@ -451,21 +434,34 @@ export default function SummarySection({ fileId, initialSummaries }) {
       }
     }));
 
-    // Progressive loading simulation with realistic timing
+    const setProgress = (progress) => {
+      setGenerationStatus(prev => ({
+        ...prev,
+        [type]: { ...prev[type], progress }
+      }));
+    };
+
+    // Estimated progress, shown only until live chunk progress arrives
+    // (or throughout, if the event stream is unavailable)
     const progressSteps = [
       { progress: 15, delay: 300, status: 'Analyzing document...' },
       { progress: 35, delay: 800, status: 'Extracting key concepts...' },
       { progress: 60, delay: 1200, status: 'Generating summary...' },
       { progress: 85, delay: 1800, status: 'Refining content...' }
     ];
+    const estimateTimers = progressSteps.map(({ progress, delay }) => setTimeout(() => setProgress(progress), delay));
+    const stopEstimate = () => estimateTimers.forEach(clearTimeout);
 
-    progressSteps.forEach(({ progress, delay }) => {
-      setTimeout(() => {
-        setGenerationStatus(prev => ({
-          ...prev,
-          [type]: { ...prev[type], progress }
-        }));
-      }, delay);
+    // Live progress: one summary event per finished chunk
+    const requestId = newRequestId();
+    const stopEvents = followJobProgress(requestId, {
+      onEvent: (stage, data) => {
+        const fraction = stage === 'summary' && data.status === 'progress' ? progressFraction(data) : null;
+        if (fraction === null) return;
+        stopEstimate();
+        setProgress(Math.round(5 + fraction * 90));
+      },
+      onUnavailable: () => console.log(`📋 PROGRESS: Event stream unavailable for ${fileId}, showing estimated progress`)
     });
 
     // Make API call
@@ -475,7 +471,8 @@ export default function SummarySection({ fileId, initialSummaries }) {
       headers: {'Content-Type': 'application/json'},
       body: JSON.stringify({
         fileId: fileId,
-        summaryType: apiType
+        summaryType: apiType,
+        requestId
       })
     })
     .then(res => {
@@ -512,6 +509,10 @@ export default function SummarySection({ fileId, initialSummaries }) {
           [type]: { loading: false, progress: 100, error: null, startTime: null }
         }));
       } else {
+        if (/not found/i.test(data.error || '')) {
+          console.log(`📋 FILE NOT FOUND: ${fileId} does not exist on server`);
+          setFileExists(false);
+        }
         throw new Error(data.error || "Failed to generate summary");
       }
     })
@@ -521,6 +522,10 @@ export default function SummarySection({ fileId, initialSummaries }) {
         ...prev,
         [type]: { loading: false, progress: 0, error: err.message, startTime: null }
       }));
+    })
+    .finally(() => {
+      stopEstimate();
+      stopEvents();
     });
   };
   
@@ -0,0 +1,66 @@
+// Live progress for backend requests over server-sent events.
+// A request sent with a requestId publishes its extraction, summary and
+// audio progress to GET /api/jobs/<requestId>/events, which ends with a
+// 'done' event. Missed events are replayed, so the stream can open after
+// the request has been sent.
+
+const API_BASE = 'https://dyslexofly.onrender.com'
+const STAGES = ['extraction', 'summary', 'audio', 'done']
+
+export function newRequestId() {
+  if (typeof crypto !== 'undefined' && crypto.randomUUID) {
+    return crypto.randomUUID()
+  }
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`
+}
+
+/**
+ * Follow a request's progress events.
+ *
+ * onEvent(stage, data) is called for every event (data has status, and
+ * done/total for progress). onUnavailable() is called once if events
+ * cannot be streamed (no EventSource, or the server refused the stream,
+ * e.g. 503 when too many are open), so the caller can fall back to an
+ * estimate. Returns a function that closes the stream.
+ */
+export function followJobProgress(requestId, { onEvent, onUnavailable } = {}) {
+  if (typeof window === 'undefined' || !window.EventSource) {
+    onUnavailable?.()
+    return () => {}
+  }
+
+  const source = new EventSource(`${API_BASE}/api/jobs/${encodeURIComponent(requestId)}/events`)
+  let received = false
+
+  STAGES.forEach(stage => {
+    source.addEventListener(stage, (event) => {
+      received = true
+      let data
+      try {
+        data = JSON.parse(event.data)
+      } catch {
+        return
+      }
+      onEvent?.(stage, data)
+      if (stage === 'done') {
+        source.close()
+      }
+    })
+  })
+
+  source.onerror = () => {
+    // CLOSED means the server refused the stream and EventSource will not
+    // retry; otherwise it reconnects with Last-Event-ID on its own
+    if (source.readyState === EventSource.CLOSED && !received) {
+      onUnavailable?.()
+    }
+  }
+
+  return () => source.close()
+}
+
+/** Share of the work finished, from a progress event's done/total */
+export function progressFraction(data) {
+  if (!data || !data.total) return null
+  return Math.min(1, Math.max(0, data.done / data.total))
+}